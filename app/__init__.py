@@ -1,3 +1,4 @@
-from .main import build_context, create_processor, run
+from .config import AppConfig
+from .main import build_context, build_span_exporter, create_processor, run
 
-__all__ = ["build_context", "create_processor", "run"]
+__all__ = ["AppConfig", "build_context", "build_span_exporter", "create_processor", "run"]
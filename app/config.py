@@ -0,0 +1,79 @@
+"""Runtime configuration for assembling the application."""
+
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+
+@dataclass
+class AppConfig:
+    # Throughput recorder backend: "json" or "sqlite"
+    throughput_backend: str = "json"
+    # JSON snapshot path or SQLite database path; JSON stays in memory when unset
+    throughput_path: Optional[str] = None
+    # Workers draining the event ingestion queue
+    ingest_workers: int = 4
+    # Events buffered before Kopf callbacks wait for the workers
+    ingest_queue_size: int = 1000
+    # Frequency adjustment: "capacity" allocates per-agent plans, "simple" one global frequency
+    adjustment_strategy: str = "capacity"
+    # Frequency dispatcher: "memory" keeps the value in process, "http" pushes it to the agents
+    dispatcher_backend: str = "memory"
+    # Port of the /metrics endpoint; None disables it
+    metrics_port: Optional[int] = 9100
+    # Span export target: "jsonl:<path>" or "otlp:<url>"; tracing is off when unset
+    trace_export: Optional[str] = None
+    # Shared Kubernetes API client: pooled connections, in-flight requests, per-request timeout (s)
+    k8s_max_connections: int = 16
+    k8s_max_concurrency: int = 8
+    k8s_request_timeout: float = 10.0
+    # Seconds service-info/subscription-info may be served from the watch cache
+    # after the watch drops; None reads the API every time
+    k8s_cache_max_staleness: Optional[float] = 30.0
+    # Agent latency samples for HIGH_LATENCY detection: "unix:<socket path>" or "file:<path to tail>"
+    latency_samples: Optional[str] = None
+    # Windowed p99 (ms) that must hold for LATENCY_SUSTAIN seconds before an event is emitted
+    latency_threshold_ms: float = 200.0
+    latency_sustain: float = 5.0
+    # Agent queue telemetry for IDLE_SYSTEM detection: "unix:<socket path>" or "file:<path to tail>"
+    idle_samples: Optional[str] = None
+    # Seconds agents must stay idle before an event is emitted
+    idle_debounce: float = 30.0
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "AppConfig":
+        return cls(
+            throughput_backend=environ.get("THROUGHPUT_BACKEND", cls.throughput_backend),
+            throughput_path=environ.get("THROUGHPUT_PATH") or None,
+            ingest_workers=int(environ.get("INGEST_WORKERS", cls.ingest_workers)),
+            ingest_queue_size=int(environ.get("INGEST_QUEUE_SIZE", cls.ingest_queue_size)),
+            adjustment_strategy=environ.get("ADJUSTMENT_STRATEGY", cls.adjustment_strategy),
+            dispatcher_backend=environ.get("DISPATCHER_BACKEND", cls.dispatcher_backend),
+            metrics_port=_optional_port(environ.get("METRICS_PORT", str(cls.metrics_port))),
+            trace_export=environ.get("TRACE_EXPORT") or None,
+            k8s_max_connections=int(environ.get("K8S_MAX_CONNECTIONS", cls.k8s_max_connections)),
+            k8s_max_concurrency=int(environ.get("K8S_MAX_CONCURRENCY", cls.k8s_max_concurrency)),
+            k8s_request_timeout=float(environ.get("K8S_REQUEST_TIMEOUT", cls.k8s_request_timeout)),
+            k8s_cache_max_staleness=_optional_seconds(
+                environ.get("K8S_CACHE_MAX_STALENESS", str(cls.k8s_cache_max_staleness))
+            ),
+            latency_samples=environ.get("LATENCY_SAMPLES") or None,
+            latency_threshold_ms=float(environ.get("LATENCY_THRESHOLD_MS", cls.latency_threshold_ms)),
+            latency_sustain=float(environ.get("LATENCY_SUSTAIN", cls.latency_sustain)),
+            idle_samples=environ.get("IDLE_SAMPLES") or None,
+            idle_debounce=float(environ.get("IDLE_DEBOUNCE", cls.idle_debounce)),
+        )
+
+
+def _optional_port(value: str) -> Optional[int]:
+    # empty, "0" or "off" disable the endpoint
+    if not value or value.lower() == "off" or value == "0":
+        return None
+    return int(value)
+
+
+def _optional_seconds(value: str) -> Optional[float]:
+    # empty or "off" disable the cache
+    if not value or value.lower() == "off":
+        return None
+    return float(value)
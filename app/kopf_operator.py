@@ -1,12 +1,18 @@
 """Kopf-based operator that feeds Kubernetes events into the domain event processor."""
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 
 import kopf
 
-from app.main import build_context, create_processor
-from domain import Event, deployment_change_detector
+from app.config import AppConfig
+from app.main import build_context, build_span_exporter, create_processor, start_detectors
+from application import EventIngestionPipeline
+from domain import DeploymentChangeDetector, Event
+from infrastructure import MetricsServer
+from infrastructure.k8s_api import shared_k8s_api
+from infrastructure.k8s_informer import shared_resource_cache
+from utils.tracing import TRACER
 
 
 class KopfEventBridge:
@@ -15,30 +21,78 @@ class KopfEventBridge:
     The bridge keeps the event processing logic isolated from Kopf so the
     infrastructure layer can be replaced or extended without touching the
     domain code.  This maintains high cohesion and low coupling in line with
-    DDD principles.
+    DDD principles.  Events are queued on an :class:`EventIngestionPipeline`
+    so Kopf callbacks return without waiting for load tests.
     """
 
-    def __init__(self) -> None:
-        self._processor = create_processor(build_context())
+    def __init__(self, config: Optional[AppConfig] = None) -> None:
+        config = config or AppConfig.from_env()
+        self.config = config
+        self._processor = create_processor(build_context(config))
+        self.pipeline = EventIngestionPipeline(
+            self._processor,
+            workers=config.ingest_workers,
+            max_queue_size=config.ingest_queue_size,
+        )
+        self.metrics_server = MetricsServer(port=config.metrics_port) if config.metrics_port else None
+        self.detectors = []
+        TRACER.exporter = build_span_exporter(config)
+
+    async def start(self) -> None:
+        await self.pipeline.start()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        self.detectors = await start_detectors(self.config, self.pipeline.submit)
+
+    async def stop(self) -> None:
+        for detector in self.detectors:
+            await detector.close()
+        await self.pipeline.stop()
+        # write-behind recorders buffer saves until flushed
+        await self._processor.ctx.recorder.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if TRACER.exporter is not None:
+            await TRACER.exporter.close()
+        close_dispatcher = getattr(self._processor.ctx.dispatcher, "close", None)
+        if close_dispatcher is not None:
+            await close_dispatcher()
+        cache = shared_resource_cache()
+        if cache is not None:
+            await cache.close()
+        await shared_k8s_api().close()
 
     async def forward(self, spec: dict[str, Any]) -> None:
-        event = Event(
-            type=spec.get("type"),
-            payload=spec.get("payload", {}),
-            timestamp=datetime.utcnow(),
-            source="kopf",
-        )
-        print(f"Forwarding event: {event}")
-        await self._processor.process(event)
+        with TRACER.span("kopf.forward", **{"event.type": spec.get("type")}) as span:
+            event = Event(
+                type=spec.get("type"),
+                payload=spec.get("payload", {}),
+                timestamp=datetime.utcnow(),
+                source="kopf",
+                trace=span.context,
+            )
+            print(f"Forwarding event: {event}")
+            await self.pipeline.submit(event)
 
 
 _bridge = KopfEventBridge()
+_detector = DeploymentChangeDetector()
+
+
+@kopf.on.startup()
+async def start_ingestion(**_: Any) -> None:
+    await _bridge.start()
+
+
+@kopf.on.cleanup()
+async def stop_ingestion(**_: Any) -> None:
+    await _bridge.stop()
 
 
 @kopf.on.update("ha.example.com", "v1", "services")
 async def handle_kopf_event(spec, **_: Any) -> None:
     """Receive custom resources and forward them to the event processor."""
-    _bridge.forward(spec)
+    await _bridge.forward(spec)
     print(f"Service CR updated, new spec: {spec}")
 
 
@@ -54,7 +108,15 @@ async def service_deploy_changed(body: dict, meta: dict, old: Any, new: Any, **_
     print(f"[OLD] {old}")
     print(f"[NEW] {new}")
 
-    changed, details = deployment_change_detector.has_deployment_changed(old, new)
+    resource_key = meta.get("uid") or f"{meta.get('namespace')}/{meta.get('name')}"
+    changed, details = _detector.detect(
+        resource_key,
+        new,
+        old_spec=old,
+        resource_version=meta.get("resourceVersion"),
+        # 事件送出成功後才更新快取，送出失敗時 Kopf 重試仍視為變動
+        commit=False,
+    )
     if changed:
         print("⚠ 部署環境發生變動！")
         print(f"變動詳情: {details['diff']}")
@@ -77,7 +139,8 @@ async def service_deploy_changed(body: dict, meta: dict, old: Any, new: Any, **_
 
         print(f"\nForwarding deployment change event: {deployment_event}\n")
         await _bridge.forward(deployment_event)
-        print(f"Deployment change event forwarded")
+        _detector.commit(resource_key)
+        print(f"Deployment change event queued (depth={_bridge.pipeline.queue_depth})")
     else:
         print("✅ 部署環境無變動")
         
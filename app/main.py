@@ -1,5 +1,7 @@
 """Application entry point assembling dependencies."""
 
+from typing import List, Optional
+
 from application import EventProcessor, Context
 from domain import Event, StateManager
 from application.handlers import (
@@ -12,22 +14,104 @@ from infrastructure import (
     SimplePressureTester,
     JSONThroughputRepository,
     InMemoryDispatcher,
+    HttpFanOutDispatcher,
     SimpleAdjustmentStrategy,
+    CapacityAwareAdjustmentStrategy,
+    SQLiteThroughputRepository,
+    NearestNeighbourThroughputEstimator,
 )
+from infrastructure.k8s_api import AsyncK8sApi, configure_shared_k8s_api
+from infrastructure.idle_detector import IdleDetector
+from infrastructure.latency_detector import LatencyDetector
+from infrastructure.sample_stream import Emit, SampleStreamDetector
+from infrastructure.k8s_informer import CustomResourceCache, configure_shared_resource_cache
+from domain.services import AdjustmentStrategy, Dispatcher, ThroughputRepository
+from utils.tracing import JsonlSpanExporter, SpanExporter
+from app.config import AppConfig
 from app.logging_config import setup_logging
 
 # 在模組載入時設置日誌
 setup_logging()
 
 
-def build_context() -> Context:
+def build_recorder(config: AppConfig) -> ThroughputRepository:
+    if config.throughput_backend == "sqlite":
+        return SQLiteThroughputRepository(config.throughput_path or "throughput.db")
+    if config.throughput_backend == "json":
+        return JSONThroughputRepository(file_path=config.throughput_path)
+    raise ValueError(f"Unknown throughput backend: {config.throughput_backend}")
+
+
+def build_adjuster(config: AppConfig) -> AdjustmentStrategy:
+    if config.adjustment_strategy == "capacity":
+        return CapacityAwareAdjustmentStrategy()
+    if config.adjustment_strategy == "simple":
+        return SimpleAdjustmentStrategy()
+    raise ValueError(f"Unknown adjustment strategy: {config.adjustment_strategy}")
+
+
+def build_dispatcher(config: AppConfig) -> Dispatcher:
+    if config.dispatcher_backend == "http":
+        return HttpFanOutDispatcher()
+    if config.dispatcher_backend == "memory":
+        return InMemoryDispatcher()
+    raise ValueError(f"Unknown dispatcher backend: {config.dispatcher_backend}")
+
+
+def build_span_exporter(config: AppConfig) -> Optional[SpanExporter]:
+    if not config.trace_export:
+        return None
+    kind, _, target = config.trace_export.partition(":")
+    if kind == "jsonl":
+        return JsonlSpanExporter(target)
+    if kind == "otlp":
+        from infrastructure.otlp_span_exporter import OtlpHttpSpanExporter
+        return OtlpHttpSpanExporter(target)
+    raise ValueError(f"Unknown trace export: {config.trace_export}")
+
+
+async def start_detectors(config: AppConfig, emit: Emit) -> List[SampleStreamDetector]:
+    detectors: List[SampleStreamDetector] = []
+    if config.latency_samples:
+        detector = LatencyDetector(emit, threshold_ms=config.latency_threshold_ms, sustain=config.latency_sustain)
+        await _listen(detector, config.latency_samples)
+        detectors.append(detector)
+    if config.idle_samples:
+        detector = IdleDetector(emit, debounce=config.idle_debounce)
+        await _listen(detector, config.idle_samples)
+        detectors.append(detector)
+    return detectors
+
+
+async def _listen(detector: SampleStreamDetector, source: str) -> None:
+    kind, _, target = source.partition(":")
+    if kind == "unix":
+        await detector.serve_unix(target)
+    elif kind == "file":
+        await detector.tail(target)
+    else:
+        raise ValueError(f"Unknown sample source: {source}")
+
+
+def build_context(config: Optional[AppConfig] = None) -> Context:
+    config = config or AppConfig.from_env()
+    api = configure_shared_k8s_api(AsyncK8sApi(
+        max_connections=config.k8s_max_connections,
+        max_concurrency=config.k8s_max_concurrency,
+        request_timeout=config.k8s_request_timeout,
+    ))
+    configure_shared_resource_cache(
+        CustomResourceCache(api, max_staleness=config.k8s_cache_max_staleness)
+        if config.k8s_cache_max_staleness is not None else None
+    )
     repo = InMemoryRepository()
     tester = SimplePressureTester()
-    recorder = JSONThroughputRepository()
-    adjuster = SimpleAdjustmentStrategy()
-    dispatcher = InMemoryDispatcher()
+    recorder = build_recorder(config)
+    adjuster = build_adjuster(config)
+    dispatcher = build_dispatcher(config)
     state = StateManager()
-    return Context(repo, tester, recorder, adjuster, dispatcher, state)
+    estimator = NearestNeighbourThroughputEstimator(recorder)
+    return Context(repo, tester, recorder, adjuster, dispatcher, state, estimator)
 
 
 def create_processor(ctx: Context) -> EventProcessor:
@@ -1,4 +1,5 @@
 from .context import Context
 from .processor import EventProcessor
+from .ingestion import EventIngestionPipeline, IngestionStats
 
-__all__ = ["Context", "EventProcessor"]
+__all__ = ["Context", "EventProcessor", "EventIngestionPipeline", "IngestionStats"]
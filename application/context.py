@@ -1,9 +1,10 @@
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 from domain.services import (
     Repository,
     PressureTester,
     ThroughputRepository,
+    ThroughputEstimator,
     AdjustmentStrategy,
     Dispatcher,
 )
@@ -16,3 +17,4 @@ class Context(NamedTuple):
     adjuster: AdjustmentStrategy
     dispatcher: Dispatcher
     state: StateManager
+    estimator: Optional[ThroughputEstimator] = None
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import weakref
+from typing import Any, Collection, Dict, Mapping, Optional, Tuple
+
+from domain import FrequencyPlan
+from utils.helpers import normalize_throughput_key
+from utils.tracing import TRACER
+from ..context import Context
+
+logger = logging.getLogger(__name__)
+
+# ctx.repo key of the last frequency plan dispatched by an adjustment, before scaling
+PLAN_KEY = "frequency_plan"
+# ctx.repo key of the AIMD scales currently below 1.0, {(node, service): scale}
+SCALES_KEY = "frequency_scales"
+
+# (node, service); None matches every node or service
+ScaleKey = Tuple[Optional[str], Optional[str]]
+
+
+# event loop -> lock serializing every read-modify-write of PLAN_KEY / SCALES_KEY
+_plan_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def plan_lock() -> asyncio.Lock:
+    """Lock held from reading the stored plan and scales until the result is dispatched and stored.
+
+    Handlers adjust different nodes concurrently, but every plan covers all
+    nodes; without the lock two of them would each dispatch and store the
+    old plan plus only their own change.
+    """
+    loop = asyncio.get_running_loop()
+    lock = _plan_locks.get(loop)
+    if lock is None:
+        lock = _plan_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def suspect_key(deployment_hash: Any) -> Tuple[str, str]:
+    """ctx.repo key flagging a recorded throughput for re-measurement."""
+    return ("suspect", normalize_throughput_key(deployment_hash))
+
+
+def deployment_key(node: str) -> Tuple[str, str]:
+    """ctx.repo key of the last deployment hash seen for ``node``."""
+    return ("deployment", node)
+
+
+def subset_key(
+    deployment_hash: Any, agents: Collection[str], services: Optional[Collection[str]] = None
+) -> Tuple[str, str, Tuple[str, ...], Optional[Tuple[str, ...]]]:
+    """ctx.repo key of the throughput measured on ``agents`` (``services``) of a deployment alone."""
+    return (
+        "subset",
+        normalize_throughput_key(deployment_hash),
+        tuple(sorted(agents)),
+        None if services is None else tuple(sorted(services)),
+    )
+
+
+def hash_node(deployment_hash: Any) -> Optional[str]:
+    """Node named by a deployment hash (``{"node": ...}`` or ``"node:svc=n,..."``)."""
+    if isinstance(deployment_hash, Mapping):
+        return deployment_hash.get("node")
+    if isinstance(deployment_hash, str):
+        return deployment_hash.split(":", 1)[0]
+    return None
+
+
+def scale_plan(plan: FrequencyPlan, scales: Dict[ScaleKey, float]) -> FrequencyPlan:
+    """Apply the lowest matching scale in ``scales`` to each stream of ``plan``."""
+    if not scales:
+        return plan
+
+    def scale(agent: str, service: str, node: Optional[str]) -> float:
+        factor = 1.0
+        for (key_node, key_service), value in scales.items():
+            if key_node not in (None, node) or key_service not in (None, service):
+                continue
+            factor = min(factor, value)
+        return factor
+
+    return plan.scaled(scale)
+
+
+async def apply_throughput(
+    throughput: int,
+    ctx: Context,
+    node: Optional[str] = None,
+    agents: Optional[Collection[str]] = None,
+    services: Optional[Collection[str]] = None,
+) -> None:
+    """Dispatch the adjuster's plan for ``throughput`` measured on ``node``.
+
+    Without a plan from the adjuster, ``compute_frequency`` is given to the
+    streams the dispatcher knows of on ``node`` (every node without one),
+    the other streams keeping the last plan; a dispatcher that knows no
+    streams gets one frequency for everyone.  ``agents`` (only ``services``,
+    if given) narrows a throughput measured on those agents alone to their
+    streams.  Scales cut by the high latency handler stay applied; the
+    unscaled plan is stored under ``PLAN_KEY``.
+    """
+    async with plan_lock():
+        await _apply_throughput(throughput, ctx, node, agents, services)
+
+
+async def _apply_throughput(
+    throughput: int,
+    ctx: Context,
+    node: Optional[str],
+    agents: Optional[Collection[str]],
+    services: Optional[Collection[str]],
+) -> None:
+    with TRACER.span("adjuster.compute_plan"):
+        plan = await ctx.adjuster.compute_plan(throughput, node=node, agents=agents, services=services)
+    if plan is None:
+        with TRACER.span("adjuster.compute_frequency"):
+            frequency = await ctx.adjuster.compute_frequency(throughput)
+        plan = await ctx.dispatcher.uniform_plan(frequency)
+        if agents:
+            plan = _agent_streams(plan, frequency, node, agents, services)
+            if not plan.agents:
+                logger.warning("No streams of %s on %s to raise", sorted(agents), node)
+                return
+        elif plan is None:
+            with TRACER.span("dispatcher.dispatch", frequency=frequency):
+                await ctx.dispatcher.dispatch(frequency)
+            logger.info("Dispatched frequency %s", frequency)
+            return
+        elif node is not None:
+            plan = plan.for_node(node)
+        if agents or node is not None:
+            previous = await ctx.repo.get(PLAN_KEY) if ctx.repo is not None else None
+            plan = (previous or FrequencyPlan()).merged(plan)
+    await _dispatch_plan(plan, ctx)
+
+
+def _agent_streams(
+    known: Optional[FrequencyPlan],
+    frequency: int,
+    node: Optional[str],
+    agents: Collection[str],
+    services: Optional[Collection[str]],
+) -> FrequencyPlan:
+    # the dispatcher's streams of ``agents`` on ``node``, or ``agents`` x ``services`` when it knows none
+    if known is None:
+        return FrequencyPlan.uniform(
+            [(agent, service, node) for agent in agents for service in services or ()], frequency
+        )
+    scope = known if node is None else known.for_node(node)
+    return FrequencyPlan.uniform(
+        [
+            (agent, service, scope.node_of(agent, service))
+            for agent, planned in scope.frequencies.items() if agent in agents
+            for service in planned if services is None or service in services
+        ],
+        frequency,
+    )
+
+
+async def _dispatch_plan(plan: FrequencyPlan, ctx: Context) -> None:
+    # callers hold plan_lock()
+    scales = await ctx.repo.get(SCALES_KEY) if ctx.repo is not None else None
+    with TRACER.span("dispatcher.dispatch_plan", agents=len(plan.agents)):
+        await ctx.dispatcher.dispatch_plan(scale_plan(plan, scales or {}))
+    if ctx.repo is not None:
+        await ctx.repo.set(PLAN_KEY, plan)
+    logger.info("Dispatched frequency plan for %d agents", len(plan.agents))
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import FrozenSet, Hashable, Optional
 
 from domain import Event
 from ..context import Context
@@ -8,3 +9,19 @@ class BaseHandler(ABC):
     async def handle(self, event: Event, ctx: Context) -> None:
         """Process an event."""
         raise NotImplementedError
+
+    def coalesce_key(self, event: Event) -> Hashable:
+        """Key under which deferred events of this type replace each other.
+
+        Events sharing a type and key are coalesced, the newest one winning.
+        The default coalesces every event of the type into one.
+        """
+        return None
+
+    def partition_keys(self, event: Event) -> Optional[FrozenSet[Hashable]]:
+        """Partitions (e.g. node names) this event adjusts.
+
+        Events with disjoint keys are handled concurrently.  ``None`` claims
+        the whole system.
+        """
+        return None
@@ -1,25 +1,141 @@
+import asyncio
 import logging
+from typing import Any, Dict, FrozenSet, Hashable, Optional
 
 from domain import Event
+from utils.helpers import normalize_throughput_key
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
 from ..context import Context
+from .adjustment import apply_throughput, deployment_key, hash_node, suspect_key
 from .base import BaseHandler
 
 logger = logging.getLogger(__name__)
 
+_LOOKUPS = REGISTRY.counter(
+    "event_handler_throughput_lookups_total",
+    "Deployment throughput lookups by outcome (hit, estimated, measured)",
+    ["result"],
+)
+
+
 class DeploymentChangeHandler(BaseHandler):
+    """Apply the recorded throughput for a deployment, measuring it on a miss.
+
+    When the recorder misses and ``ctx.estimator`` yields an estimate with at
+    least ``min_estimate_confidence``, the estimate is dispatched immediately
+    and a confirming load test runs in the background once the node's
+    partition is free.
+    """
+
+    def __init__(self, min_estimate_confidence: float = 0.6) -> None:
+        self.min_estimate_confidence = min_estimate_confidence
+        self._confirmations: Dict[str, asyncio.Task] = {}
+
+    @property
+    def pending_confirmations(self) -> list:
+        return [task for task in self._confirmations.values() if not task.done()]
+
+    def coalesce_key(self, event: Event) -> Hashable:
+        return hash_node(event.payload.get("hash"))
+
+    def partition_keys(self, event: Event) -> Optional[FrozenSet[Hashable]]:
+        # load tests and plans are node-scoped; plan updates are serialized by plan_lock()
+        node = self.coalesce_key(event)
+        return None if node is None else frozenset([node])
+
     async def handle(self, event: Event, ctx: Context) -> None:
         deployment_hash = event.payload.get("hash")
         logger.info("Deployment change event received: %s", deployment_hash)
         if deployment_hash is None:
             logger.info("No deployment hash provided")
             return
-        throughput = await ctx.recorder.get(deployment_hash)
+        node = self.coalesce_key(event)
+        if node is not None and ctx.repo is not None:
+            await ctx.repo.set(deployment_key(node), deployment_hash)
+        with TRACER.span("recorder.get"):
+            throughput = await ctx.recorder.get(deployment_hash)
         logger.info("Throughput lookup result: %s", throughput)
+        if throughput is None and ctx.estimator is not None:
+            with TRACER.span("estimator.estimate"):
+                estimate = await ctx.estimator.estimate(deployment_hash)
+            if estimate is not None and estimate.confidence >= self.min_estimate_confidence:
+                logger.info(
+                    "Applying estimated throughput %s (confidence %.2f from %s)",
+                    estimate.throughput, estimate.confidence, estimate.neighbours,
+                )
+                _LOOKUPS.labels("estimated").inc()
+                await self._apply(deployment_hash, estimate.throughput, ctx)
+                self._schedule_confirmation(deployment_hash, ctx, self.partition_keys(event))
+                return
+        if throughput is not None and ctx.repo is not None and await ctx.repo.get(suspect_key(deployment_hash)):
+            # latency spikes flagged the record: measure again instead of trusting it
+            logger.info("Recorded throughput for %s is suspect; re-measuring", deployment_hash)
+            await ctx.repo.set(suspect_key(deployment_hash), None)
+            throughput = None
         if throughput is None:
-            logger.info("Running load test for %s", deployment_hash)
-            throughput = await ctx.tester.load_test(deployment_hash)
+            _LOOKUPS.labels("measured").inc()
+            throughput = await self._measure(deployment_hash, ctx)
+        else:
+            _LOOKUPS.labels("hit").inc()
+        await self._apply(deployment_hash, throughput, ctx)
+
+    async def _measure(self, deployment_hash: Any, ctx: Context) -> int:
+        logger.info("Running load test for %s", deployment_hash)
+        with TRACER.span("tester.load_test"):
+            throughput = await ctx.tester.load_test(deployment_hash, node=hash_node(deployment_hash))
+        with TRACER.span("recorder.save"):
             await ctx.recorder.save(deployment_hash, throughput)
-            logger.info("Recorded throughput %s", throughput)
-        frequency = await ctx.adjuster.compute_frequency(throughput)
-        await ctx.dispatcher.dispatch(frequency)
-        logger.info("Dispatched frequency %s", frequency)
+        if ctx.estimator is not None:
+            await ctx.estimator.observe(deployment_hash, throughput)
+        logger.info("Recorded throughput %s", throughput)
+        return throughput
+
+    async def _apply(self, deployment_hash: Any, throughput: int, ctx: Context) -> None:
+        await apply_throughput(throughput, ctx, node=hash_node(deployment_hash))
+
+    def _schedule_confirmation(
+        self, deployment_hash: Any, ctx: Context, partition: Optional[FrozenSet[Hashable]]
+    ) -> None:
+        key = normalize_throughput_key(deployment_hash)
+        if key in self._confirmations and not self._confirmations[key].done():
+            return
+        task = asyncio.create_task(self._confirm(deployment_hash, ctx, partition))
+        self._confirmations[key] = task
+        task.add_done_callback(lambda done: self._forget_confirmation(key, done))
+
+    def _forget_confirmation(self, key: str, task: asyncio.Task) -> None:
+        if self._confirmations.get(key) is task:
+            del self._confirmations[key]
+
+    @staticmethod
+    async def _superseded(deployment_hash: Any, ctx: Context) -> bool:
+        """Whether a newer deployment arrived for the hash's node since it was estimated."""
+        node = hash_node(deployment_hash)
+        if node is None or ctx.repo is None:
+            return False
+        current = await ctx.repo.get(deployment_key(node))
+        if current is None or normalize_throughput_key(current) == normalize_throughput_key(deployment_hash):
+            return False
+        logger.info("Dropping confirmation of %s; %s is now deployed on %s", deployment_hash, current, node)
+        return True
+
+    async def _confirm(
+        self, deployment_hash: Any, ctx: Context, partition: Optional[FrozenSet[Hashable]]
+    ) -> None:
+        # wait for the current adjustment of this partition so load tests never overlap
+        with TRACER.span("state.wait"):
+            await ctx.state.enter_adjusting(partition)
+        try:
+            if await self._superseded(deployment_hash, ctx):
+                return
+            logger.info("Confirming estimated throughput for %s", deployment_hash)
+            with TRACER.span("handler.confirm"):
+                throughput = await self._measure(deployment_hash, ctx)
+                if await self._superseded(deployment_hash, ctx):
+                    return
+                await self._apply(deployment_hash, throughput, ctx)
+        except Exception:
+            logger.exception("Confirming load test failed for %s", deployment_hash)
+        finally:
+            await ctx.state.exit_adjusting(partition)
@@ -1,14 +1,111 @@
+import asyncio
 import logging
+import time
+from typing import Callable, FrozenSet, Hashable, Optional
 
-from domain import Event
+from domain import AimdController, Event, FrequencyPlan
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
 from ..context import Context
+from .adjustment import PLAN_KEY, SCALES_KEY, ScaleKey, plan_lock, scale_plan, suspect_key
 from .base import BaseHandler
 
 logger = logging.getLogger(__name__)
 
+_SCALE_CHANGES = REGISTRY.counter(
+    "event_handler_aimd_changes_total", "AIMD scale changes applied by the high latency handler", ["direction"]
+)
+
+
 class HighLatencyHandler(BaseHandler):
-    """Handle high latency events."""
+    """Cut the affected frequencies within one event and recover them gradually.
+
+    The payload's ``node`` and/or ``service`` select the streams of the last
+    dispatched plan (``ctx.repo[PLAN_KEY]``) and ``latency_ms`` is fed to an
+    :class:`AimdController`; a spike halves those streams right away.  While
+    any scale is reduced, a recovery task adds one increase step every
+    ``controller.cooldown`` seconds without a new spike.  A ``hash`` in the
+    payload marks that signature's recorded throughput as suspect so the next
+    deployment change re-measures it instead of trusting the record.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[AimdController] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.controller = controller or AimdController()
+        self.clock = clock
+        self._recovery: Optional[asyncio.Task] = None
+
+    @property
+    def recovering(self) -> bool:
+        return self._recovery is not None and not self._recovery.done()
+
+    def coalesce_key(self, event: Event) -> Hashable:
+        return event.payload.get("node")
+
+    def partition_keys(self, event: Event) -> Optional[FrozenSet[Hashable]]:
+        node = event.payload.get("node")
+        return None if node is None else frozenset([node])
 
     async def handle(self, event: Event, ctx: Context) -> None:
-        logger.info("High latency event received: %s", event.payload)
-        logger.info("No action taken in stub handler")
+        payload = event.payload
+        logger.info("High latency event received: %s", payload)
+        latency = payload.get("latency_ms")
+        if latency is None:
+            logger.info("No latency provided")
+            return
+        key: ScaleKey = (payload.get("node"), payload.get("service"))
+
+        deployment_hash = payload.get("hash")
+        if deployment_hash is not None and ctx.repo is not None and latency >= self.controller.high_latency_ms:
+            await ctx.repo.set(suspect_key(deployment_hash), {"latency_ms": latency, "at": event.timestamp})
+            logger.info("Marked recorded throughput of %s as suspect", deployment_hash)
+
+        scale = self.controller.observe(key, float(latency), self.clock())
+        if scale is None:
+            return
+        _SCALE_CHANGES.labels("decrease" if scale < 1.0 else "increase").inc()
+        logger.info("Scale of %s is now %.2f", key, scale)
+        await self._dispatch(ctx)
+        if self.controller.reduced() and not self.recovering:
+            self._recovery = asyncio.create_task(self._recover(ctx))
+
+    async def _dispatch(self, ctx: Context) -> None:
+        if ctx.repo is None:
+            logger.warning("No dispatched frequency plan to scale")
+            return
+        async with plan_lock():
+            await self._dispatch_locked(ctx)
+
+    async def _dispatch_locked(self, ctx: Context) -> None:
+        scales = self.controller.reduced()
+        # later adjustments keep these scales applied
+        await ctx.repo.set(SCALES_KEY, scales)
+        plan: Optional[FrequencyPlan] = await ctx.repo.get(PLAN_KEY)
+        if plan is None:
+            logger.warning("No dispatched frequency plan to scale")
+            return
+        scaled = scale_plan(plan, scales)
+        with TRACER.span("dispatcher.dispatch_plan", agents=len(scaled.agents)):
+            await ctx.dispatcher.dispatch_plan(scaled)
+
+    async def _recover(self, ctx: Context) -> None:
+        while self.controller.reduced():
+            await asyncio.sleep(self.controller.cooldown)
+            reduced = self.controller.reduced()
+            nodes = {node for node, _ in reduced}
+            partition = None if None in nodes else frozenset(nodes)
+            await ctx.state.enter_adjusting(partition)
+            try:
+                now = self.clock()
+                changed = [key for key in reduced if self.controller.increase(key, now) is not None]
+                if changed:
+                    _SCALE_CHANGES.labels("increase").inc(len(changed))
+                    logger.info("Recovering frequencies of %s", changed)
+                    await self._dispatch(ctx)
+            except Exception:
+                logger.exception("Frequency recovery failed")
+            finally:
+                await ctx.state.exit_adjusting(partition)
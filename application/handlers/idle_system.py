@@ -1,14 +1,120 @@
 import logging
+import time
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Mapping, Optional
 
 from domain import Event
+from utils.helpers import normalize_throughput_key
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
 from ..context import Context
 from .base import BaseHandler
+from .adjustment import apply_throughput, deployment_key, hash_node, subset_key, suspect_key
 
 logger = logging.getLogger(__name__)
 
+_IDLE_PROBES = REGISTRY.counter(
+    "event_handler_idle_probes_total", "Idle system events by outcome (raised, unchanged, skipped)", ["result"]
+)
+
+
 class IdleSystemHandler(BaseHandler):
-    """Handle idle system events."""
+    """Probe an idle node a few steps above its recorded throughput.
+
+    The payload names the idle ``node`` and the deployment ``hash``; without
+    one, a ``services`` count mapping builds it, or else the node's last
+    deployment hash is used.  ``agents`` (agent ids) and a ``services`` list,
+    as the idle detector sends, narrow the probe to those agents and service
+    types.  Only a recorded throughput is probed, starting from it rather
+    than from ``initial_frequency``, and never while the record is suspect.
+    A higher sustained throughput is recorded and dispatched.  A subset of
+    agents starts from what it last sustained alone, if higher, and its
+    result is kept under its own ``subset_key`` and caps only those agents'
+    streams, since the node's other agents were not loaded and the record
+    must hold for all of them.  Each deployment is probed at most once per
+    ``cooldown`` seconds, so a node that keeps reporting idle is not
+    load-tested continuously.
+    """
+
+    def __init__(self, cooldown: float = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.cooldown = cooldown
+        self.clock = clock
+        self._probed_at: Dict[str, float] = {}
+
+    def coalesce_key(self, event: Event) -> Hashable:
+        return event.payload.get("node")
+
+    def partition_keys(self, event: Event) -> Optional[FrozenSet[Hashable]]:
+        node = event.payload.get("node")
+        return None if node is None else frozenset([node])
 
     async def handle(self, event: Event, ctx: Context) -> None:
-        logger.info("Idle system event received: %s", event.payload)
-        logger.info("No action taken in stub handler")
+        payload = event.payload
+        logger.info("Idle system event received: %s", payload)
+        deployment_hash = await self._deployment_hash(payload, ctx)
+        if deployment_hash is None:
+            logger.info("No deployment hash provided")
+            return
+        key = normalize_throughput_key(deployment_hash)
+        now = self.clock()
+        last = self._probed_at.get(key)
+        if last is not None and now - last < self.cooldown:
+            logger.info("Probed %s %.0fs ago; skipping", key, now - last)
+            _IDLE_PROBES.labels("skipped").inc()
+            return
+
+        with TRACER.span("recorder.get"):
+            throughput = await ctx.recorder.get(deployment_hash)
+        if throughput is None:
+            logger.info("No recorded throughput for %s; nothing to probe from", key)
+            _IDLE_PROBES.labels("skipped").inc()
+            return
+        if ctx.repo is not None and await ctx.repo.get(suspect_key(deployment_hash)):
+            logger.info("Recorded throughput for %s is suspect; not probing upward", key)
+            _IDLE_PROBES.labels("skipped").inc()
+            return
+
+        node = payload.get("node") or hash_node(deployment_hash)
+        agents = payload.get("agents") or None
+        services = payload.get("services")
+        services = None if isinstance(services, Mapping) else services
+        subset = subset_key(deployment_hash, agents, services) if agents and node is not None else None
+        if subset is not None and ctx.repo is not None:
+            throughput = max(throughput, await ctx.repo.get(subset) or 0)
+
+        self._probed_at[key] = now
+        logger.info("Probing %s upward from %s", key, throughput)
+        with TRACER.span("tester.probe_capacity", start=throughput):
+            raised = await ctx.tester.probe_capacity(
+                deployment_hash, throughput, node=payload.get("node"), agents=agents, services=services
+            )
+        if raised is None or raised <= throughput:
+            logger.info("Throughput of %s stays at %s", key, throughput)
+            _IDLE_PROBES.labels("unchanged").inc()
+            return
+
+        _IDLE_PROBES.labels("raised").inc()
+        if subset is not None:
+            if ctx.repo is not None:
+                await ctx.repo.set(subset, raised)
+            logger.info("Raised %s on %s from %s to %s", agents, node, throughput, raised)
+            await apply_throughput(raised, ctx, node=node, agents=agents, services=services)
+            return
+        with TRACER.span("recorder.save"):
+            await ctx.recorder.save(deployment_hash, raised)
+        if ctx.estimator is not None:
+            await ctx.estimator.observe(deployment_hash, raised)
+        logger.info("Raised throughput of %s from %s to %s", key, throughput, raised)
+        await apply_throughput(raised, ctx, node=node)
+
+    @staticmethod
+    async def _deployment_hash(payload: Mapping[str, Any], ctx: Context) -> Optional[Any]:
+        deployment_hash = payload.get("hash")
+        if deployment_hash is not None:
+            return deployment_hash
+        node = payload.get("node")
+        if node is None:
+            return None
+        services = payload.get("services")
+        if isinstance(services, Mapping):
+            return {"node": node, "services": dict(services)}
+        return await ctx.repo.get(deployment_key(node)) if ctx.repo is not None else None
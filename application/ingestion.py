@@ -0,0 +1,131 @@
+"""Bounded asynchronous queue between event sources and the event processor."""
+
+import asyncio
+import logging
+import zlib
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Tuple
+
+from domain import Event
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
+from .processor import EventProcessor
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_DEPTH = REGISTRY.gauge("event_handler_ingest_queue_depth", "Events queued for the ingestion workers")
+_QUEUE_WAIT = REGISTRY.histogram("event_handler_ingest_wait_seconds", "Time from enqueue to a worker picking the event up")
+
+
+@dataclass
+class IngestionStats:
+    """Snapshot of pipeline counters; latencies are enqueue-to-handle seconds."""
+
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    enqueued: int = 0
+    handled: int = 0
+    failed: int = 0
+    latency_count: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency_total / self.latency_count if self.latency_count else 0.0
+
+
+class EventIngestionPipeline:
+    """Feed events to an :class:`EventProcessor` from a pool of workers.
+
+    ``submit`` only enqueues, so event sources return as soon as the event is
+    queued; when the queue is full ``submit`` waits, pushing backpressure onto
+    the source.  Each worker owns a slice of the queue and events are routed
+    to workers by their handler's ``coalesce_key`` so events for the same
+    node are handled in arrival order.
+    """
+
+    def __init__(self, processor: EventProcessor, workers: int = 4, max_queue_size: int = 1000) -> None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.processor = processor
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stats = IngestionStats()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> IngestionStats:
+        snapshot = IngestionStats(**vars(self._stats))
+        snapshot.queue_depth = self.queue_depth
+        return snapshot
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        per_worker = max(1, self.max_queue_size // self.workers)
+        self._queues = [asyncio.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._work(queue), name=f"event-ingestion-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers, by default after the queued events are handled."""
+        if drain:
+            await asyncio.gather(*(queue.join() for queue in self._queues))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, event: Event) -> None:
+        if not self._tasks:
+            await self.start()
+        queue = self._queues[self._shard(event)]
+        span = TRACER.start_span("ingest.queued", event.trace)
+        await queue.put((event, asyncio.get_running_loop().time(), span))
+        self._stats.enqueued += 1
+        depth = self.queue_depth
+        _QUEUE_DEPTH.set(depth)
+        if depth > self._stats.max_queue_depth:
+            self._stats.max_queue_depth = depth
+
+    def _shard(self, event: Event) -> int:
+        handler = self.processor.handlers.get(event.type)
+        key: Optional[Hashable] = handler.coalesce_key(event) if handler else None
+        if key is None:
+            key = event.type
+        # crc32 keeps the routing stable, unlike the salted built-in str hash
+        return zlib.crc32(repr(key).encode()) % len(self._queues)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item: Tuple[Event, float, object] = await queue.get()
+            event, enqueued_at, span = item
+            span.end()
+            waited = loop.time() - enqueued_at
+            _QUEUE_WAIT.observe(waited)
+            _QUEUE_DEPTH.set(self.queue_depth)
+            stats = self._stats
+            stats.latency_count += 1
+            stats.latency_total += waited
+            if waited > stats.latency_max:
+                stats.latency_max = waited
+            try:
+                await self.processor.process(event)
+                stats.handled += 1
+            except Exception:
+                stats.failed += 1
+                logger.exception("Handling %s event failed", event.type)
+            finally:
+                queue.task_done()
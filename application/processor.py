@@ -1,25 +1,168 @@
-from typing import Dict
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
 
 from domain import Event, State
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
 from .context import Context
 from .handlers.base import BaseHandler
 
+logger = logging.getLogger(__name__)
+
+_EVENTS = REGISTRY.counter("event_handler_events_total", "Events received by the processor", ["type"])
+_DEFERRED = REGISTRY.counter("event_handler_events_deferred_total", "Events deferred while their partition was busy", ["type"])
+_COALESCED = REGISTRY.counter("event_handler_events_coalesced_total", "Pending events replaced by a newer event")
+_DROPPED = REGISTRY.counter("event_handler_events_dropped_total", "Pending events dropped because the queue was full")
+_FAILED = REGISTRY.counter("event_handler_events_failed_total", "Events whose handler raised", ["type"])
+_PENDING = REGISTRY.gauge("event_handler_pending_events", "Events waiting for a busy partition")
+_WAIT = REGISTRY.histogram("event_handler_event_wait_seconds", "Time from event creation to handling", ["type"])
+_HANDLE = REGISTRY.histogram("event_handler_handle_seconds", "Handler run time", ["type"])
+
 class EventProcessor:
-    def __init__(self, ctx: Context):
+    """Route events to handlers while the state manager allows adjusting.
+
+    Each handler declares the partitions an event touches through
+    ``handler.partition_keys(event)``; events on disjoint partitions are
+    handled concurrently.  Events whose partitions are busy are kept in a
+    bounded pending queue, coalesced per
+    ``(event.type, handler.coalesce_key(event))`` with the newest event
+    winning.  When an adjustment ends the pending events whose partitions are
+    free are handled concurrently in a follow-up pass; this includes
+    partitions released outside the processor (e.g. a background
+    confirmation), which the state manager reports through a release
+    listener.  When the queue is full the oldest pending event is dropped.
+    """
+
+    def __init__(self, ctx: Context, max_pending: int = 100):
         self.ctx = ctx
         self.handlers: Dict[str, BaseHandler] = {}
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[Tuple[str, Hashable], Event]" = OrderedDict()
+        self.coalesced_events = 0
+        self.dropped_events = 0
+        # per-type metric children, resolved once at registration
+        self._metrics: Dict[str, tuple] = {}
+        self._pending_spans: Dict[Tuple[str, Hashable], object] = {}
+        self._draining = False
+        self._rescan = False
+        self._drain_task: Optional[asyncio.Task] = None
+        if ctx.state is not None:
+            ctx.state.add_release_listener(self._on_release)
+
+    @property
+    def pending_events(self) -> int:
+        return len(self._pending)
 
     def register_handler(self, event_type: str, handler: BaseHandler) -> None:
         self.handlers[event_type] = handler
+        self._metrics[event_type] = (
+            _EVENTS.labels(event_type),
+            _WAIT.labels(event_type),
+            _HANDLE.labels(event_type),
+            _FAILED.labels(event_type),
+        )
 
     async def process(self, event: Event) -> None:
         handler = self.handlers.get(event.type)
         if not handler:
             return
-        entered = await self.ctx.state.try_enter_adjusting()
-        if not entered:
+        self._metrics[event.type][0].inc()
+        with TRACER.span("processor.process", event.trace, **{"event.type": event.type}) as span:
+            keys = handler.partition_keys(event)
+            with TRACER.span("state.acquire"):
+                entered = await self.ctx.state.try_enter_adjusting(keys)
+            if not entered:
+                span.set_attribute("deferred", True)
+                self._defer(event, handler)
+                return
+            try:
+                await self._handle(event, handler)
+            finally:
+                await self.ctx.state.exit_adjusting(keys)
+        await self._drain()
+
+    async def _handle(self, event: Event, handler: BaseHandler) -> None:
+        _, wait, duration, failed = self._metrics[event.type]
+        wait.observe(max(0.0, (datetime.utcnow() - event.timestamp).total_seconds()))
+        started = time.perf_counter()
+        try:
+            with TRACER.span(f"handler.{type(handler).__name__}"):
+                await handler.handle(event, self.ctx)
+        except Exception:
+            failed.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    def _defer(self, event: Event, handler: BaseHandler) -> None:
+        key = (event.type, handler.coalesce_key(event))
+        _DEFERRED.labels(event.type).inc()
+        if key in self._pending:
+            self.coalesced_events += 1
+            _COALESCED.inc()
+            self._pending.move_to_end(key)
+            self._pending_spans.pop(key).end("coalesced")
+        elif len(self._pending) >= self.max_pending:
+            dropped_key, dropped = self._pending.popitem(last=False)
+            self.dropped_events += 1
+            _DROPPED.inc()
+            self._pending_spans.pop(dropped_key).end("dropped")
+            logger.warning("Pending event queue full, dropped %s event", dropped.type)
+        self._pending[key] = event
+        self._pending_spans[key] = TRACER.start_span("processor.pending", event.trace)
+        _PENDING.set(len(self._pending))
+        logger.info("Deferred %s event while adjusting (%d pending)", event.type, len(self._pending))
+
+    def _on_release(self) -> None:
+        if not self._pending:
+            return
+        if self._draining:
+            # the running pass may already have looked at the released partition
+            self._rescan = True
+        elif self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        if self._draining:
+            self._rescan = True
             return
+        self._draining = True
+        try:
+            while self._pending:
+                self._rescan = False
+                ready: List[Tuple[Event, BaseHandler, Optional[FrozenSet[Hashable]]]] = []
+                for key, event in list(self._pending.items()):
+                    handler = self.handlers[event.type]
+                    keys = handler.partition_keys(event)
+                    # events on busy partitions are drained when their holder releases them
+                    if await self.ctx.state.try_enter_adjusting(keys):
+                        if self._pending.get(key) is not event:
+                            # replaced by a newer event while claiming; that one is picked up next pass
+                            await self.ctx.state.exit_adjusting(keys)
+                            continue
+                        del self._pending[key]
+                        self._pending_spans.pop(key).end()
+                        ready.append((event, handler, keys))
+                _PENDING.set(len(self._pending))
+                if not ready:
+                    if self._rescan:
+                        continue
+                    return
+                await asyncio.gather(*(self._run_deferred(*item) for item in ready))
+        finally:
+            self._draining = False
+
+    async def _run_deferred(
+        self, event: Event, handler: BaseHandler, keys: Optional[FrozenSet[Hashable]]
+    ) -> None:
         try:
-            await handler.handle(event, self.ctx)
+            with TRACER.span("processor.deferred", event.trace, **{"event.type": event.type}):
+                await self._handle(event, handler)
+        except Exception:
+            logger.exception("Deferred %s event failed", event.type)
         finally:
-            await self.ctx.state.exit_adjusting()
+            await self.ctx.state.exit_adjusting(keys)
@@ -0,0 +1,219 @@
+"""Benchmark cases for the detector, repository, processor, load-test, allocation and latency paths.
+
+Each case's ``setup`` builds its inputs and returns a ``run`` callable that
+performs one batch of work and returns the number of operations it did.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List
+
+from application import Context, EventProcessor
+from application.handlers.base import BaseHandler
+from domain import DeploymentChangeDetector, Event, StateManager
+from domain.deployment_change_detector import has_deployment_changed
+from infrastructure.capacity_allocator import AllocationProblem, allocate
+from infrastructure.frequency_search import ExponentialBisectionSearch
+from infrastructure.idle_detector import IdleDetector
+from infrastructure.latency_detector import LatencyDetector
+from infrastructure.load_test_config import LoadTestConfig
+from infrastructure.throughput_repository import JSONThroughputRepository
+from infrastructure.virtual_load_engine import CapacityModel, VirtualFrequencyTestExecutor
+from utils.helpers import normalize_throughput_key
+
+from .generators import (
+    churn_spec,
+    service_info_spec,
+    servicespec_info_spec,
+    subscription_info_spec,
+    throughput_keys,
+)
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], int]]
+
+
+def _detector_full(entries: int) -> Callable[[], int]:
+    old = service_info_spec(entries)
+    new = churn_spec(old)
+
+    def run() -> int:
+        has_deployment_changed(old, new)
+        return 1
+
+    return run
+
+
+def _detector_cached(entries: int) -> Callable[[], int]:
+    specs = [service_info_spec(entries), churn_spec(service_info_spec(entries))]
+    detector = DeploymentChangeDetector()
+    detector.detect("uid", specs[0], resource_version="0")
+    version = 0
+
+    def run() -> int:
+        nonlocal version
+        version += 1
+        detector.detect("uid", specs[version % 2], old_spec=specs[(version + 1) % 2], resource_version=str(version))
+        return 1
+
+    return run
+
+
+def _normalize_keys(count: int) -> Callable[[], int]:
+    keys = throughput_keys(count)
+
+    def run() -> int:
+        for key in keys:
+            normalize_throughput_key(key)
+        return len(keys)
+
+    return run
+
+
+def _json_get(count: int) -> Callable[[], int]:
+    keys = throughput_keys(count)
+    repo = JSONThroughputRepository(
+        initial_data={normalize_throughput_key(key): index for index, key in enumerate(keys)}
+    )
+
+    async def batch() -> None:
+        for key in keys:
+            await repo.get(key)
+
+    def run() -> int:
+        asyncio.run(batch())
+        return len(keys)
+
+    return run
+
+
+def _json_save(count: int) -> Callable[[], int]:
+    keys = throughput_keys(count)
+
+    async def batch() -> None:
+        repo = JSONThroughputRepository()
+        for index, key in enumerate(keys):
+            await repo.save(key, index, "pose")
+
+    def run() -> int:
+        asyncio.run(batch())
+        return len(keys)
+
+    return run
+
+
+class _NoopHandler(BaseHandler):
+    def coalesce_key(self, event):
+        return event.payload["hash"]["node"]
+
+    def partition_keys(self, event):
+        return frozenset([event.payload["hash"]["node"]])
+
+    async def handle(self, event, ctx) -> None:
+        return None
+
+
+def _processor(count: int) -> Callable[[], int]:
+    events = [
+        Event(type="DEPLOYMENT_CHANGE", payload={"hash": key}, timestamp=datetime.utcnow(), source="bench")
+        for key in throughput_keys(count)
+    ]
+
+    async def batch() -> None:
+        processor = EventProcessor(Context(None, None, None, None, None, StateManager()))
+        processor.register_handler("DEPLOYMENT_CHANGE", _NoopHandler())
+        for event in events:
+            await processor.process(event)
+
+    def run() -> int:
+        asyncio.run(batch())
+        return len(events)
+
+    return run
+
+
+def _virtual_search(agents: int) -> Callable[[], int]:
+    subscriptions = subscription_info_spec(agents, nodes=1)["raw"]
+    config = LoadTestConfig(search_mode="exponential", max_frequency=1000, max_test_duration=2)
+    capacities = {("node0", svc): 20.0 * agents for svc in {s["serviceType"] for s in subscriptions}}
+    executor = VirtualFrequencyTestExecutor(CapacityModel(capacities), config, seed=1)
+    strategy = ExponentialBisectionSearch()
+
+    async def probe(frequency: int) -> bool:
+        return (await executor.run_probe(subscriptions, frequency, "bench")).passed
+
+    def run() -> int:
+        return asyncio.run(strategy.search(probe, config)).probes
+
+    return run
+
+
+def _allocate(agents: int) -> Callable[[], int]:
+    nodes = max(1, agents // 100)
+    servicespec = servicespec_info_spec(nodes)
+    subscriptions = subscription_info_spec(agents, nodes=nodes)
+
+    def run() -> int:
+        allocate(AllocationProblem.from_specs(servicespec, subscriptions), max_frequency=25)
+        return 1
+
+    return run
+
+
+def _latency_feed(samples: int) -> Callable[[], int]:
+    async def emit(event: Event) -> None:
+        return None
+
+    detector = LatencyDetector(emit)
+    lines = [b"node%d svc%d %.1f\n" % (i % 40, i % 3, (i % 250) * 1.1) for i in range(samples)]
+    chunks = [b"".join(lines[start:start + 2000]) for start in range(0, samples, 2000)]
+
+    def run() -> int:
+        return sum(detector.feed(chunk) for chunk in chunks)
+
+    return run
+
+
+def _idle_feed(samples: int) -> Callable[[], int]:
+    async def emit(event: Event) -> None:
+        return None
+
+    detector = IdleDetector(emit)
+    lines = [
+        b"10.0.%d.%d:8888 node%d svc%d %.1f %.2f\n" % (i % 7, i % 250, i % 40, i % 3, (i % 5) * 0.5, (i % 10) / 10)
+        for i in range(samples)
+    ]
+    chunks = [b"".join(lines[start:start + 2000]) for start in range(0, samples, 2000)]
+
+    def run() -> int:
+        return sum(detector.feed(chunk) for chunk in chunks)
+
+    return run
+
+
+def _sized(name: str, factory, size: int) -> Benchmark:
+    return Benchmark(f"{name}[{size}]", lambda: factory(size))
+
+
+def build_benchmarks(quick: bool = False) -> List[Benchmark]:
+    raw_sizes = (10, 1000) if quick else (10, 1000, 50000)
+    key_count = 10000 if quick else 100000
+    benchmarks: List[Benchmark] = []
+    for size in raw_sizes:
+        benchmarks.append(_sized("detector.has_deployment_changed", _detector_full, size))
+        benchmarks.append(_sized("detector.cached_churn", _detector_cached, size))
+    benchmarks += [
+        _sized("repository.normalize_key", _normalize_keys, key_count),
+        _sized("repository.json_get", _json_get, key_count),
+        _sized("repository.json_save", _json_save, key_count),
+        _sized("processor.process", _processor, key_count // 10),
+        _sized("load_test.virtual_search", _virtual_search, 10 if quick else 100),
+        _sized("allocator.allocate", _allocate, 1000 if quick else 5000),
+        _sized("latency_detector.feed", _latency_feed, 10000 if quick else 100000),
+        _sized("idle_detector.feed", _idle_feed, 10000 if quick else 100000),
+    ]
+    return benchmarks
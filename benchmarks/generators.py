@@ -0,0 +1,96 @@
+"""Synthetic custom resources shaped like the examples in ``doc/cr``."""
+
+import random
+from typing import Any, Dict, List, Optional
+
+SERVICE_TYPES = ("pose", "gesture", "ocr", "depth", "face")
+_SERVICE_PORTS = {svc: 30500 + index for index, svc in enumerate(SERVICE_TYPES)}
+_FREQUENCY_LIMITS = {"pose": [30, 15], "gesture": [20, 10], "ocr": [10, 5], "depth": [15, 10], "face": [30, 15]}
+
+
+def _node_count(entries: int, nodes: Optional[int]) -> int:
+    # roughly 50 services per node unless told otherwise
+    return nodes if nodes else max(1, entries // 50)
+
+
+def service_info_spec(entries: int, nodes: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+    """Return a service-info ``spec`` with ``entries`` items in ``raw``."""
+    rng = random.Random(seed)
+    node_count = _node_count(entries, nodes)
+    raw: List[Dict[str, Any]] = []
+    for index in range(entries):
+        node = rng.randrange(node_count)
+        svc = rng.choice(SERVICE_TYPES)
+        limit = _FREQUENCY_LIMITS[svc]
+        raw.append({
+            "currentConnection": rng.randint(0, 8),
+            "currentFrequency": rng.choice(limit),
+            "frequencyLimit": list(limit),
+            "hostIP": f"10.52.{node // 250}.{node % 250 + 1}",
+            "hostPort": _SERVICE_PORTS[svc],
+            "nodeName": f"node{node}",
+            "podIP": f"10.244.{index // 250 % 250}.{index % 250 + 1}",
+            "serviceType": svc,
+            "workloadLimit": rng.choice([80, 90.5, 180]),
+        })
+    return {"raw": raw}
+
+
+def churn_spec(spec: Dict[str, Any], seed: int = 1) -> Dict[str, Any]:
+    """Copy ``spec`` with new connection/frequency values but the same composition."""
+    rng = random.Random(seed)
+    raw = []
+    for item in spec["raw"]:
+        updated = dict(item)
+        updated["currentConnection"] = rng.randint(0, 8)
+        updated["currentFrequency"] = rng.choice(item["frequencyLimit"])
+        raw.append(updated)
+    return {"raw": raw}
+
+
+def subscription_info_spec(entries: int, nodes: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+    """Return a subscription-info ``spec`` with ``entries`` agent subscriptions."""
+    rng = random.Random(seed)
+    node_count = _node_count(entries, nodes)
+    raw = []
+    for index in range(entries):
+        node = rng.randrange(node_count)
+        raw.append({
+            "agentIP": f"10.52.{100 + index // 60000 % 100}.{index // 250 % 250 + 1}",
+            "agentPort": 8888 + index % 250,
+            "nodeName": f"node{node}",
+            "podIP": f"10.244.{node // 250}.{node % 250 + 1}",
+            "serviceType": rng.choice(SERVICE_TYPES),
+        })
+    return {"raw": raw}
+
+
+def servicespec_info_spec(nodes: int, seed: int = 0) -> Dict[str, Any]:
+    """Return a servicespec-info ``spec`` with a ``workAbility`` for every service on ``node0 .. node<nodes-1>``."""
+    rng = random.Random(seed)
+    return {"raw": [
+        {
+            "serviceType": svc,
+            "frequencyLimit": list(_FREQUENCY_LIMITS[svc]),
+            "workAbility": {f"node{node}": rng.choice([66, 80, 180, 230]) for node in range(nodes)},
+        }
+        for svc in SERVICE_TYPES
+    ]}
+
+
+def throughput_keys(count: int, nodes: int = 50) -> List[Dict[str, Any]]:
+    """Return ``count`` distinct deployment keys in the ``{"node", "services"}`` form.
+
+    Service counts are the base-10 digits of the key index, so up to 100k
+    distinct compositions exist per node.
+    """
+    keys = []
+    for index in range(count):
+        node, combo = index % nodes, index // nodes
+        services = {}
+        for svc in SERVICE_TYPES:
+            combo, instances = divmod(combo, 10)
+            if instances:
+                services[svc] = instances
+        keys.append({"node": f"node{node}", "services": services})
+    return keys
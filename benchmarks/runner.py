@@ -0,0 +1,134 @@
+"""Run the benchmark suite and compare against a saved baseline.
+
+Usage::
+
+    python -m benchmarks.runner                         # full sizes
+    python -m benchmarks.runner --quick --save base.json
+    python -m benchmarks.runner --compare base.json     # exit 1 on regression
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from .cases import Benchmark, build_benchmarks
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    ops_per_sec: float
+    peak_bytes: int
+    ops: int
+    seconds: float
+
+
+def measure(benchmark: Benchmark, min_time: float = 1.0) -> BenchmarkResult:
+    """Time ``benchmark`` for at least ``min_time`` seconds, then trace its peak memory.
+
+    Memory is measured in a separate run because tracemalloc slows the
+    interpreter considerably; the peak covers setup plus one batch.
+    """
+    run = benchmark.setup()
+    run()  # warm-up
+    ops = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        started = time.perf_counter()
+        ops += run()
+        elapsed += time.perf_counter() - started
+    del run
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.setup()()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(benchmark.name, ops / elapsed, peak, ops, elapsed)
+
+
+def compare(
+    results: List[BenchmarkResult], baseline: Dict[str, Dict[str, float]], tolerance: float = 0.2
+) -> List[str]:
+    """Return the names of results slower or larger than the baseline by more than ``tolerance``."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        slower = result.ops_per_sec < base["ops_per_sec"] * (1 - tolerance)
+        larger = result.peak_bytes > base["peak_bytes"] * (1 + tolerance)
+        if slower or larger:
+            regressions.append(result.name)
+    return regressions
+
+
+def _delta(current: float, base: Optional[float]) -> str:
+    if not base:
+        return ""
+    return f"{(current - base) / base * 100:+.1f}%"
+
+
+def _print_table(results: List[BenchmarkResult], baseline: Dict[str, Dict[str, float]]) -> None:
+    width = max(len(result.name) for result in results)
+    print(f"{'benchmark':<{width}}  {'ops/s':>14} {'Δ':>8}  {'peak KiB':>10} {'Δ':>8}")
+    for result in results:
+        base = baseline.get(result.name, {})
+        print(
+            f"{result.name:<{width}}  {result.ops_per_sec:>14,.1f} {_delta(result.ops_per_sec, base.get('ops_per_sec')):>8}"
+            f"  {result.peak_bytes / 1024:>10,.0f} {_delta(result.peak_bytes, base.get('peak_bytes')):>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast check")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to time each benchmark")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="compare against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    benchmarks = [b for b in build_benchmarks(args.quick) if args.filter in b.name]
+    baseline: Dict[str, Dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = []
+    for benchmark in benchmarks:
+        print(f"running {benchmark.name} ...", file=sys.stderr)
+        results.append(measure(benchmark, args.min_time))
+    _print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": {r.name: asdict(r) for r in results},
+                },
+                f,
+                indent=2,
+            )
+        print(f"saved baseline to {args.save}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
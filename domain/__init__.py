@@ -1,4 +1,7 @@
 from .event import Event
 from .state_manager import StateManager, State
+from .deployment_change_detector import DeploymentChangeDetector
+from .frequency_plan import FrequencyPlan
+from .aimd_controller import AimdController
 
-__all__ = ["Event", "StateManager", "State"]
+__all__ = ["Event", "StateManager", "State", "DeploymentChangeDetector", "FrequencyPlan", "AimdController"]
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional
+
+
+@dataclass
+class _ScaleState:
+    scale: float = 1.0
+    last_decrease: Optional[float] = None
+    last_change: Optional[float] = None
+
+
+class AimdController:
+    """Additive-increase / multiplicative-decrease scale factors per key.
+
+    A key (e.g. a node or a ``(node, service)`` pair) starts at scale 1.0.
+    Latency at or above ``high_latency_ms`` multiplies its scale by
+    ``decrease_factor`` (not below ``min_scale``), at most once per
+    ``cooldown`` seconds so one spike reported several times only cuts once.
+    Latency at or below ``low_latency_ms`` lets the scale grow by
+    ``increase_step`` once ``cooldown`` seconds have passed since the last
+    change; latency between the two thresholds holds the scale (hysteresis).
+    Times are caller-supplied seconds, so the controller is deterministic.
+    """
+
+    def __init__(
+        self,
+        high_latency_ms: float = 200.0,
+        low_latency_ms: float = 100.0,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.1,
+        min_scale: float = 0.1,
+        cooldown: float = 10.0,
+    ) -> None:
+        if low_latency_ms > high_latency_ms:
+            raise ValueError("low_latency_ms must not exceed high_latency_ms")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.high_latency_ms = high_latency_ms
+        self.low_latency_ms = low_latency_ms
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.min_scale = min_scale
+        self.cooldown = cooldown
+        self._states: Dict[Hashable, _ScaleState] = {}
+
+    def scale(self, key: Hashable) -> float:
+        state = self._states.get(key)
+        return state.scale if state else 1.0
+
+    def reduced(self) -> Dict[Hashable, float]:
+        """Keys currently below full scale."""
+        return {key: state.scale for key, state in self._states.items() if state.scale < 1.0}
+
+    def observe(self, key: Hashable, latency_ms: float, now: float) -> Optional[float]:
+        """Feed one latency sample; return the new scale if it changed."""
+        if latency_ms >= self.high_latency_ms:
+            return self.decrease(key, now)
+        if latency_ms <= self.low_latency_ms:
+            return self.increase(key, now)
+        return None
+
+    def decrease(self, key: Hashable, now: float) -> Optional[float]:
+        state = self._states.setdefault(key, _ScaleState())
+        if state.last_decrease is not None and now - state.last_decrease < self.cooldown:
+            return None
+        scale = max(self.min_scale, state.scale * self.decrease_factor)
+        state.last_decrease = state.last_change = now
+        if scale == state.scale:
+            return None
+        state.scale = scale
+        return scale
+
+    def increase(self, key: Hashable, now: float) -> Optional[float]:
+        state = self._states.get(key)
+        if state is None or state.scale >= 1.0:
+            return None
+        if state.last_change is not None and now - state.last_change < self.cooldown:
+            return None
+        # rounded so repeated steps land exactly on 1.0
+        state.scale = min(1.0, round(state.scale + self.increase_step, 9))
+        state.last_change = now
+        if state.scale >= 1.0:
+            del self._states[key]
+        return state.scale
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Return ``key`` (or every key) to full scale."""
+        if key is None:
+            self._states.clear()
+        else:
+            self._states.pop(key, None)
@@ -1,5 +1,6 @@
+import hashlib
 from collections import Counter
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, NamedTuple, Optional, Tuple
 
 def _summarize_spec(spec: Dict[str, Any]) -> Dict[str, Counter]:
     """
@@ -168,3 +169,123 @@ def has_deployment_changed(old_spec: Dict[str, Any], new_spec: Dict[str, Any]) -
         "new_signatures": new_sigs,
         "diff": diff,
     }
+
+
+def _digest(counts: Dict[str, Counter]) -> bytes:
+    """
+    將 node 服務計數轉為固定長度的穩定摘要，與服務/節點的出現順序無關。
+
+    參數:
+        counts: {nodeName: Counter({serviceType: 數量})}
+
+    回傳:
+        16 bytes 的 blake2b 摘要；組成相同時摘要相同。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for node in sorted(counts):
+        h.update(node.encode())
+        h.update(b"\x00")
+        for svc, count in sorted(counts[node].items()):
+            if count:
+                h.update(f"{svc}={count}\x00".encode())
+        h.update(b"\x01")
+    return h.digest()
+
+
+class _Composition(NamedTuple):
+    resource_version: Optional[str]
+    digest: bytes
+    counts: Dict[str, Counter]
+    signatures: Dict[str, str]
+
+
+class DeploymentChangeDetector:
+    """
+    以快取加速的部署變動偵測器。
+
+    每個資源 (以 uid 等 key 區分) 快取上一次的服務組成與其摘要。
+    currentConnection/currentFrequency 等欄位頻繁更新時，只需統計新 spec 並比對
+    摘要即可判定無變動；摘要不同時才產生簽名與完整 diff。相同 resourceVersion
+    重送 (例如 Kopf 重試) 時直接回傳無變動。
+
+    以 commit=False 偵測到的變動只會暫存，呼叫端在事件成功送出後呼叫 commit()
+    才寫入快取；送出失敗時 Kopf 以相同 resourceVersion 重試，仍會再次判定為變動。
+
+    回傳格式與 has_deployment_changed 相同。
+    """
+
+    def __init__(self) -> None:
+        self._cache: Dict[str, _Composition] = {}
+        self._staged: Dict[str, _Composition] = {}
+
+    def forget(self, resource_key: str) -> None:
+        """資源刪除時移除快取"""
+        self._cache.pop(resource_key, None)
+        self._staged.pop(resource_key, None)
+
+    def commit(self, resource_key: str) -> None:
+        """將 commit=False 偵測到的變動寫入快取"""
+        staged = self._staged.pop(resource_key, None)
+        if staged is not None:
+            self._cache[resource_key] = staged
+
+    def detect(
+        self,
+        resource_key: str,
+        new_spec: Dict[str, Any],
+        old_spec: Optional[Dict[str, Any]] = None,
+        resource_version: Optional[str] = None,
+        commit: bool = True,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        判斷 resource_key 對應資源的部署組成是否變更。
+
+        參數:
+            resource_key: 資源識別 (建議使用 metadata.uid)
+            new_spec: 新的 CRD spec
+            old_spec: 舊的 CRD spec，僅在快取中沒有該資源時作為比較基準
+            resource_version: metadata.resourceVersion，用於略過重送的事件
+            commit: False 時變動先暫存，待 commit() 後才更新快取
+        """
+        previous = self._cache.get(resource_key)
+        if previous is not None and resource_version is not None and previous.resource_version == resource_version:
+            return False, self._unchanged(previous)
+
+        new_counts = _summarize_spec(new_spec or {})
+        new_digest = _digest(new_counts)
+
+        if previous is None:
+            if old_spec is None:
+                # 第一次看到此資源且沒有舊 spec：只建立基準
+                current = _Composition(resource_version, new_digest, new_counts, _signatures(new_counts))
+                self._cache[resource_key] = current
+                return False, self._unchanged(current)
+            old_counts = _summarize_spec(old_spec)
+            previous = _Composition(None, _digest(old_counts), old_counts, None)
+
+        if previous.digest == new_digest:
+            if previous.signatures is None:
+                previous = previous._replace(signatures=_signatures(previous.counts))
+            self._cache[resource_key] = previous._replace(resource_version=resource_version)
+            return False, self._unchanged(previous)
+
+        new_sigs = _signatures(new_counts)
+        old_sigs = previous.signatures if previous.signatures is not None else _signatures(previous.counts)
+        current = _Composition(resource_version, new_digest, new_counts, new_sigs)
+        if commit:
+            self._cache[resource_key] = current
+        else:
+            self._staged[resource_key] = current
+        return True, {
+            "old_signatures": old_sigs,
+            "new_signatures": new_sigs,
+            "diff": _diff_counts(previous.counts, new_counts),
+        }
+
+    @staticmethod
+    def _unchanged(composition: _Composition) -> Dict[str, Any]:
+        return {
+            "old_signatures": composition.signatures,
+            "new_signatures": composition.signatures,
+            "diff": {"added_nodes": [], "removed_nodes": [], "changed_nodes": {}},
+        }
@@ -1,5 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
+
+from utils.tracing import TraceContext
 
 @dataclass
 class Event:
@@ -7,3 +10,5 @@ class Event:
     payload: dict
     timestamp: datetime
     source: str
+    # span the event's processing spans are recorded under, if traced
+    trace: Optional[TraceContext] = None
@@ -0,0 +1,88 @@
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class FrequencyPlan:
+    """Request frequency each agent should use for each service type.
+
+    ``frequencies`` maps an agent id (``"<ip>:<port>"``) to ``{service_type:
+    frequency}``; ``nodes`` optionally records which node serves each of
+    those agent/service streams.  Plans are values: build a new plan instead
+    of mutating one.
+    """
+
+    frequencies: Mapping[str, Mapping[str, int]] = field(default_factory=dict)
+    nodes: Mapping[str, Mapping[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def uniform(cls, targets: Iterable[Tuple[str, ...]], frequency: int) -> "FrequencyPlan":
+        """Give every ``(agent, service_type)`` target the same frequency.
+
+        Targets may carry the serving node as a third item,
+        ``(agent, service_type, node)``, which the plan then records.
+        """
+        frequencies: Dict[str, Dict[str, int]] = {}
+        nodes: Dict[str, Dict[str, str]] = {}
+        for agent, service_type, *node in targets:
+            frequencies.setdefault(agent, {})[service_type] = frequency
+            if node and node[0] is not None:
+                nodes.setdefault(agent, {})[service_type] = node[0]
+        return cls(frequencies, nodes)
+
+    @property
+    def agents(self) -> Tuple[str, ...]:
+        return tuple(self.frequencies)
+
+    def for_agent(self, agent: str) -> Dict[str, int]:
+        return dict(self.frequencies.get(agent, {}))
+
+    def node_of(self, agent: str, service_type: str) -> Optional[str]:
+        return self.nodes.get(agent, {}).get(service_type)
+
+    def for_node(self, node: str) -> "FrequencyPlan":
+        """The streams of this plan served by ``node``."""
+        frequencies: Dict[str, Dict[str, int]] = {}
+        nodes: Dict[str, Dict[str, str]] = {}
+        for agent, services in self.frequencies.items():
+            for service, frequency in services.items():
+                if self.node_of(agent, service) == node:
+                    frequencies.setdefault(agent, {})[service] = frequency
+                    nodes.setdefault(agent, {})[service] = node
+        return FrequencyPlan(frequencies, nodes)
+
+    def merged(self, other: "FrequencyPlan") -> "FrequencyPlan":
+        """This plan with ``other``'s streams added or replacing its own."""
+        frequencies = {agent: dict(services) for agent, services in self.frequencies.items()}
+        nodes = {agent: dict(services) for agent, services in self.nodes.items()}
+        for agent, services in other.frequencies.items():
+            frequencies.setdefault(agent, {}).update(services)
+            for service in services:
+                node = other.node_of(agent, service)
+                if node is not None:
+                    nodes.setdefault(agent, {})[service] = node
+                else:
+                    nodes.get(agent, {}).pop(service, None)
+        return FrequencyPlan(frequencies, nodes)
+
+    def changed_agents(self, applied: Mapping[str, Optional[Mapping[str, int]]]) -> Tuple[str, ...]:
+        """Agents whose frequencies differ from ``applied`` (agent -> last applied frequencies)."""
+        return tuple(
+            agent for agent, frequencies in self.frequencies.items()
+            if applied.get(agent) != frequencies
+        )
+
+    def scaled(self, scale: Callable[[str, str, Optional[str]], float], minimum: int = 1) -> "FrequencyPlan":
+        """Multiply each stream by ``scale(agent, service_type, node)``, rounding down.
+
+        Scaled frequencies never drop below ``minimum`` unless the planned
+        frequency already was lower.
+        """
+        frequencies: Dict[str, Dict[str, int]] = {}
+        for agent, services in self.frequencies.items():
+            frequencies[agent] = {}
+            for service, frequency in services.items():
+                factor = scale(agent, service, self.node_of(agent, service))
+                frequencies[agent][service] = max(min(frequency, minimum), math.floor(frequency * factor))
+        return FrequencyPlan(frequencies, self.nodes)
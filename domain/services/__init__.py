@@ -2,12 +2,15 @@ from .adjustment_strategy import AdjustmentStrategy
 from .dispatcher import Dispatcher
 from .pressure_tester import PressureTester
 from .throughput_repository import ThroughputRepository
+from .throughput_estimator import ThroughputEstimate, ThroughputEstimator
 
 __all__ = [
     "AdjustmentStrategy",
     "Dispatcher",
     "PressureTester",
     "ThroughputRepository",
+    "ThroughputEstimate",
+    "ThroughputEstimator",
 ]
 from .repository import Repository
 
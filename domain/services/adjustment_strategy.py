@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Collection, Optional
+
+from ..frequency_plan import FrequencyPlan
 
 class AdjustmentStrategy(ABC):
     """Compute new request frequency based on throughput."""
@@ -7,3 +10,18 @@ class AdjustmentStrategy(ABC):
     async def compute_frequency(self, throughput: int) -> int:
         """Return a request frequency derived from throughput."""
         raise NotImplementedError
+
+    async def compute_plan(
+        self,
+        throughput: int,
+        node: Optional[str] = None,
+        agents: Optional[Collection[str]] = None,
+        services: Optional[Collection[str]] = None,
+    ) -> Optional[FrequencyPlan]:
+        """Return per-agent frequencies, or ``None`` to dispatch ``compute_frequency`` to everyone.
+
+        ``throughput`` was measured on ``node``; without one it applies to every node.
+        With ``agents`` it was measured on those agents' streams of ``node``
+        alone (only ``services``, if given) and applies to them only.
+        """
+        return None
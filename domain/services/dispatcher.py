@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from ..frequency_plan import FrequencyPlan
 
 class Dispatcher(ABC):
     """Send commands to external agents."""
@@ -7,3 +10,12 @@ class Dispatcher(ABC):
     async def dispatch(self, frequency: int) -> None:
         """Dispatch the new frequency value."""
         raise NotImplementedError
+
+    @abstractmethod
+    async def dispatch_plan(self, plan: FrequencyPlan) -> None:
+        """Dispatch per-agent, per-service frequencies."""
+        raise NotImplementedError
+
+    async def uniform_plan(self, frequency: int) -> Optional[FrequencyPlan]:
+        """Plan giving every known stream ``frequency``, or ``None`` if the streams are unknown."""
+        return None
@@ -1,9 +1,21 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Optional
 
 class PressureTester(ABC):
     """Interface for performing load tests."""
 
     @abstractmethod
-    async def load_test(self, deployment_hash: str) -> int:
-        """Return measured throughput for the deployment."""
+    async def load_test(self, deployment_hash: str, node: Optional[str] = None) -> int:
+        """Return measured throughput for the deployment, loading only ``node``'s agents when given."""
         raise NotImplementedError
+
+    async def probe_capacity(
+        self,
+        deployment_hash: str,
+        start_frequency: int,
+        node: Optional[str] = None,
+        agents: Optional[Iterable[str]] = None,
+        services: Optional[Iterable[str]] = None,
+    ) -> Optional[int]:
+        """Probe a few steps above ``start_frequency``; return a higher sustained throughput or ``None``."""
+        return None
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, List, Mapping, Optional, Union
+
+
+@dataclass
+class ThroughputEstimate:
+    """Estimated throughput for a deployment signature without a record."""
+
+    throughput: int
+    confidence: float
+    neighbours: List[str] = field(default_factory=list)
+
+
+class ThroughputEstimator(ABC):
+    """Estimate throughput for unseen signatures from stored measurements."""
+
+    @abstractmethod
+    async def estimate(
+        self, key: Union[str, Mapping[str, Any]], category: Optional[str] = None
+    ) -> Optional[ThroughputEstimate]:
+        """Return an estimate, or ``None`` when nothing comparable is stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def observe(
+        self, key: Union[str, Mapping[str, Any]], throughput: int, category: Optional[str] = None
+    ) -> None:
+        """Add a new measurement to the estimator's index."""
+        raise NotImplementedError
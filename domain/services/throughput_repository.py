@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Mapping, Union, Any
+from typing import Optional, Mapping, Union, Any, Dict, Iterable, List, Tuple
+
+from utils.helpers import normalize_throughput_key
 
 class ThroughputRepository(ABC):
     """Persist and retrieve throughput values."""
@@ -13,3 +15,17 @@ class ThroughputRepository(ABC):
     async def save(self, key: Union[str, Mapping[str, Any]], throughput: int, category: Optional[str] = None) -> None:
         """Persist throughput information."""
         raise NotImplementedError
+
+    async def get_many(
+        self, keys: Iterable[Union[str, Mapping[str, Any]]], category: Optional[str] = None
+    ) -> Dict[str, Optional[int]]:
+        """Retrieve several throughputs, keyed by normalized key string."""
+        return {
+            normalize_throughput_key(key): await self.get(key, category)
+            for key in keys
+        }
+
+    @abstractmethod
+    async def entries(self) -> List[Tuple[str, Optional[str], int]]:
+        """Return every stored ``(key, category, throughput)``."""
+        raise NotImplementedError
@@ -1,22 +1,72 @@
 import asyncio
 from enum import Enum
+from typing import Callable, Hashable, Iterable, List, Optional, Set
 
 class State(Enum):
     STABLE = "stable"
     ADJUSTING = "adjusting"
 
 class StateManager:
+    """Track which partitions (e.g. nodes) are currently adjusting.
+
+    Callers pass the partition keys they touch; ``keys=None`` claims the
+    whole system and conflicts with every partition.  A caller claims all of
+    its keys at once or none of them, so it never holds some keys while
+    waiting for others, and multi-key callers cannot deadlock.  Release
+    listeners are called after every ``exit_adjusting``, so work deferred
+    while a partition was held can resume whoever held it.
+    """
+
     def __init__(self):
-        self.state = State.STABLE
-        self._lock = asyncio.Lock()
+        self._condition = asyncio.Condition()
+        self._adjusting: Set[Hashable] = set()
+        self._global = False
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_release_listener(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    @property
+    def state(self) -> State:
+        return State.ADJUSTING if self._global or self._adjusting else State.STABLE
 
-    async def try_enter_adjusting(self) -> bool:
-        async with self._lock:
-            if self.state == State.ADJUSTING:
+    def partition_state(self, key: Hashable) -> State:
+        return State.ADJUSTING if self._global or key in self._adjusting else State.STABLE
+
+    def _is_free(self, keys: Optional[Set[Hashable]]) -> bool:
+        if self._global:
+            return False
+        if keys is None:
+            return not self._adjusting
+        return self._adjusting.isdisjoint(keys)
+
+    def _claim(self, keys: Optional[Set[Hashable]]) -> None:
+        if keys is None:
+            self._global = True
+        else:
+            self._adjusting.update(keys)
+
+    async def try_enter_adjusting(self, keys: Optional[Iterable[Hashable]] = None) -> bool:
+        keys = None if keys is None else set(keys)
+        async with self._condition:
+            if not self._is_free(keys):
                 return False
-            self.state = State.ADJUSTING
+            self._claim(keys)
             return True
 
-    async def exit_adjusting(self) -> None:
-        async with self._lock:
-            self.state = State.STABLE
+    async def enter_adjusting(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        """Wait until every key is free, then claim them together."""
+        keys = None if keys is None else set(keys)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._is_free(keys))
+            self._claim(keys)
+
+    async def exit_adjusting(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        async with self._condition:
+            if keys is None:
+                self._global = False
+            else:
+                self._adjusting.difference_update(keys)
+            self._condition.notify_all()
+        for listener in self._listeners:
+            listener()
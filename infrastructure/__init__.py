@@ -1,15 +1,29 @@
 from .repository import InMemoryRepository
 from .pressure_tester import SimplePressureTester
 from .throughput_repository import JSONThroughputRepository
+from .sqlite_throughput_repository import SQLiteThroughputRepository
+from .throughput_estimator import NearestNeighbourThroughputEstimator
 from .dispatcher import InMemoryDispatcher
+from .http_dispatcher import HttpFanOutDispatcher
 from .adjustment_strategy import SimpleAdjustmentStrategy
+from .capacity_allocator import CapacityAwareAdjustmentStrategy
 from .k8s_cr_client import K8sCustomResourceClient
+from .metrics_server import MetricsServer
+from .latency_detector import LatencyDetector
+from .idle_detector import IdleDetector
 
 __all__ = [
     "InMemoryRepository",
     "SimplePressureTester",
     "JSONThroughputRepository",
+    "SQLiteThroughputRepository",
+    "NearestNeighbourThroughputEstimator",
     "InMemoryDispatcher",
+    "HttpFanOutDispatcher",
     "SimpleAdjustmentStrategy",
+    "CapacityAwareAdjustmentStrategy",
     "K8sCustomResourceClient",
+    "MetricsServer",
+    "LatencyDetector",
+    "IdleDetector",
 ]
@@ -1,36 +1,136 @@
 import asyncio
 import random
-from typing import Dict
+from typing import Callable, Dict, Optional
+
+from .load_test_result import AgentLoadResult
 
 class AgentLoadSimulator:
-    """Agent 負載模擬器"""
-    
-    async def simulate_load(self, agent: Dict, interval: float, duration: int, deployment_hash: str) -> bool:
-        """模擬單個 agent 的負載"""
+    """Agent 負載模擬器
+
+    pacing:
+    - "closed": 每個請求完成後再等待 interval (實際速率為 1/(interval+latency))
+    - "open": 依 loop.time() 絕對時間表排程請求起始時間，不受回應延遲影響，
+      延遲自排定時間起算以修正 coordinated omission
+    """
+
+    def __init__(self, pacing: str = "closed", max_in_flight: int = 1000, success_threshold: float = 0.9):
+        if pacing not in ("closed", "open"):
+            raise ValueError(f"未知的 pacing 模式: {pacing}")
+        self.pacing = pacing
+        self.max_in_flight = max_in_flight
+        self.success_threshold = success_threshold
+
+    async def simulate_load(
+        self,
+        agent: Dict,
+        interval: float,
+        duration: float,
+        deployment_hash: str,
+        on_result: Optional[Callable[[bool], None]] = None,
+        stop: Optional[asyncio.Event] = None,
+    ) -> bool:
+        """模擬單個 agent 的負載
+
+        on_result 會在每個請求完成時收到成功與否；stop 被設定時提前結束。
+        """
+        result = await self.run_load(agent, interval, duration, deployment_hash, on_result, stop)
+        return result.passed
+
+    async def run_load(
+        self,
+        agent: Dict,
+        interval: float,
+        duration: float,
+        deployment_hash: str,
+        on_result: Optional[Callable[[bool], None]] = None,
+        stop: Optional[asyncio.Event] = None,
+    ) -> AgentLoadResult:
+        """對單個 agent 施加負載並回傳詳細結果"""
+        result = AgentLoadResult(agent=agent, target_rate=1.0 / interval if interval > 0 else 0.0)
         try:
-            start_time = asyncio.get_event_loop().time()
-            success_count = 0
-            total_requests = 0
-            
-            while (asyncio.get_event_loop().time() - start_time) < duration:
-                try:
-                    await self._send_request(agent, deployment_hash)
-                    success_count += 1
-                except:
-                    pass
-                
-                total_requests += 1
-                await asyncio.sleep(interval)
-            
-            success_rate = success_count / total_requests if total_requests > 0 else 0
-            return success_rate >= 0.9
-            
+            if self.pacing == "open":
+                await self._run_open_loop(result, agent, interval, duration, deployment_hash, on_result, stop)
+            else:
+                await self._run_closed_loop(result, agent, interval, duration, deployment_hash, on_result, stop)
+            result.passed = result.success_rate >= self.success_threshold
         except Exception as e:
             print(f"Agent 模擬失敗: {e}")
-            return False
-    
+            result.passed = False
+        return result
+
+    async def _run_closed_loop(self, result, agent, interval, duration, deployment_hash, on_result, stop):
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        while (loop.time() - start_time) < duration:
+            if stop is not None and stop.is_set():
+                break
+            sent_at = loop.time()
+            try:
+                await self._send_request(agent, deployment_hash)
+                succeeded = True
+            except Exception:
+                succeeded = False
+
+            result.sent += 1
+            result.record(succeeded, loop.time() - sent_at)
+            if on_result is not None:
+                on_result(succeeded)
+            await asyncio.sleep(interval)
+
+        result.elapsed = loop.time() - start_time
+
+    async def _run_open_loop(self, result, agent, interval, duration, deployment_hash, on_result, stop):
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        deadline = start_time + duration
+        in_flight = set()
+
+        async def timed_request(scheduled_at: float) -> None:
+            try:
+                await self._send_request(agent, deployment_hash)
+                succeeded = True
+            except Exception:
+                succeeded = False
+            # 延遲從排定時間起算，落後排程的等待時間也計入
+            result.record(succeeded, loop.time() - scheduled_at)
+            if on_result is not None:
+                on_result(succeeded)
+
+        index = 0
+        while True:
+            scheduled_at = start_time + index * interval
+            if scheduled_at >= deadline:
+                break
+            delay = scheduled_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if stop is not None and stop.is_set():
+                break
+            index += 1
+
+            if len(in_flight) >= self.max_in_flight:
+                # 超過同時請求上限，視為無法承受的負載
+                result.dropped += 1
+                if on_result is not None:
+                    on_result(False)
+                continue
+
+            result.sent += 1
+            task = asyncio.create_task(timed_request(scheduled_at))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        # 至少以排程涵蓋的時間窗計算，避免最後一個請求提早完成而高估速率
+        result.elapsed = max(loop.time() - start_time, index * interval)
+
+    async def close(self) -> None:
+        """釋放連線等資源"""
+
     async def _send_request(self, agent: Dict, deployment_hash: str):
         """發送請求到 agent"""
         await asyncio.sleep(0.01)  # 模擬延遲
         if random.random() < 0.05:  # 5% 失敗率
-            raise Exception("模擬請求失敗")
\ No newline at end of file
+            raise Exception("模擬請求失敗")
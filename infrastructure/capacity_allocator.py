@@ -0,0 +1,262 @@
+"""Capacity-aware per-agent frequency allocation.
+
+Every ``subscription-info`` entry is a *stream*: one agent sending one service
+type's requests to one node.  Streams of the same ``(node, service)`` share a
+*pool* whose capacity is that service's ``workAbility`` on the node in
+``servicespec-info``.  Each stream is bounded by the service's
+``frequencyLimit`` (``[max, min]``) and, when given, by the measured
+per-agent throughput.
+
+Fairness rule: within a pool, minimums are granted first (split max-min
+fairly if the pool cannot cover them all), then the remaining capacity is
+water-filled max-min fairly up to each stream's maximum.  Pools are
+independent, so this also maximises the total served frequency.  All pools
+are solved at once with NumPy.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from domain import FrequencyPlan
+from domain.services import AdjustmentStrategy
+from .http_dispatcher import agent_id
+from .k8s_cr_client import K8sCustomResourceClient
+
+logger = logging.getLogger(__name__)
+
+
+def water_fill(groups: np.ndarray, demand: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """Max-min fair split of ``capacity[g]`` among the members of each group ``g``.
+
+    ``groups`` holds dense group ids (``0 .. len(capacity) - 1``) per member and
+    ``demand`` each member's upper bound.  Members below the group's water
+    level get their full demand, the others get the level.
+    """
+    n = len(demand)
+    allocation = np.zeros(n)
+    if n == 0:
+        return allocation
+    order = np.lexsort((demand, groups))
+    g = groups[order]
+    d = demand[order]
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    # members of the group with demand >= d[k], including k itself
+    remaining = np.repeat(starts + sizes, sizes) - np.arange(n)
+    cumulative = np.cumsum(d)
+    below = cumulative - d - np.repeat(np.r_[0.0, cumulative][starts], sizes)
+    # fill[k]: capacity used if the level rises to d[k]; non-decreasing within a group
+    cap = np.maximum(capacity[g], 0.0)
+    fits = below + d * remaining <= cap
+
+    satisfied = np.add.reduceat(fits.astype(np.intp), starts)
+    level = np.full(len(starts), np.inf)
+    partial = satisfied < sizes
+    first = starts[partial] + satisfied[partial]
+    level[partial] = (cap[first] - below[first]) / remaining[first]
+
+    allocation[order] = np.minimum(d, np.repeat(level, sizes))
+    return allocation
+
+
+@dataclass
+class AllocationProblem:
+    """Streams and pools as arrays; build it with :meth:`from_specs`.
+
+    ``lower``/``upper`` are each stream's ``frequencyLimit`` (``upper`` is
+    infinite for services without one); the measured throughput is applied
+    per solve, so a problem can be reused until the specs change.
+    """
+
+    streams: List[Tuple[str, str, str]]  # (agent, node, service)
+    pools: List[Tuple[str, str]]  # (node, service)
+    pool_of: np.ndarray
+    capacity: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+    @classmethod
+    def from_specs(cls, servicespec: Mapping[str, Any], subscriptions: Mapping[str, Any]) -> "AllocationProblem":
+        """Build the problem from the ``spec`` of servicespec-info and subscription-info.
+
+        Pools without a ``workAbility`` entry are unbounded.
+        """
+        limits: Dict[str, Tuple[float, float]] = {}
+        abilities: Dict[Tuple[str, str], float] = {}
+        for item in servicespec.get("raw", []):
+            service = item.get("serviceType")
+            limit = item.get("frequencyLimit") or []
+            if limit:
+                limits[service] = (float(min(limit)), float(max(limit)))
+            for node, ability in (item.get("workAbility") or {}).items():
+                abilities[(node, service)] = float(ability)
+
+        streams: List[Tuple[str, str, str]] = []
+        pool_index: Dict[Tuple[str, str], int] = {}
+        service_index: Dict[str, int] = {}
+        pool_of: List[int] = []
+        service_of: List[int] = []
+        for entry in subscriptions.get("raw", []):
+            if not entry.get("agentIP") or not entry.get("agentPort"):
+                continue
+            pool = (entry.get("nodeName"), entry.get("serviceType"))
+            streams.append((agent_id(entry), pool[0], pool[1]))
+            pool_of.append(pool_index.setdefault(pool, len(pool_index)))
+            service_of.append(service_index.setdefault(pool[1], len(service_index)))
+
+        pools = list(pool_index)
+        bounds = np.array(
+            [limits.get(service, (0.0, np.inf)) for service in service_index], dtype=float
+        ).reshape(-1, 2)
+        services = np.array(service_of, dtype=np.intp)
+        return cls(
+            streams=streams,
+            pools=pools,
+            pool_of=np.array(pool_of, dtype=np.intp),
+            capacity=np.array([abilities.get(pool, np.inf) for pool in pools], dtype=float),
+            lower=bounds[services, 0],
+            upper=bounds[services, 1],
+        )
+
+
+@dataclass
+class Allocation:
+    problem: AllocationProblem
+    frequencies: np.ndarray
+    minimum: np.ndarray
+
+    @property
+    def total(self) -> int:
+        return int(self.frequencies.sum())
+
+    def below_minimum(self) -> List[Tuple[str, str, str]]:
+        """Streams whose pool could not cover their minimum frequency."""
+        short = self.frequencies < np.floor(self.minimum)
+        return [stream for stream, flag in zip(self.problem.streams, short) if flag]
+
+    def to_plan(self) -> FrequencyPlan:
+        frequencies: Dict[str, Dict[str, int]] = {}
+        nodes: Dict[str, Dict[str, str]] = {}
+        for (agent, node, service), frequency in zip(self.problem.streams, self.frequencies.tolist()):
+            per_agent = frequencies.setdefault(agent, {})
+            # an agent feeding one service on several nodes sends at the lowest rate
+            if service not in per_agent or frequency < per_agent[service]:
+                per_agent[service] = frequency
+                nodes.setdefault(agent, {})[service] = node
+        return FrequencyPlan(frequencies, nodes)
+
+
+def allocate(problem: AllocationProblem, max_frequency: Union[None, float, np.ndarray] = None) -> Allocation:
+    """Solve all pools at once; frequencies are whole requests per second.
+
+    ``max_frequency`` (the measured per-agent throughput) caps every stream,
+    or each stream when it is an array aligned with ``problem.streams``
+    (``inf`` leaves a stream uncapped); streams with neither a
+    ``frequencyLimit`` nor a finite ``max_frequency`` get 0.
+    """
+    maximum = problem.upper if max_frequency is None else np.minimum(problem.upper, np.asarray(max_frequency, dtype=float))
+    maximum = np.where(np.isfinite(maximum), maximum, 0.0)
+    minimum = np.minimum(problem.lower, maximum)
+    pools = problem.pool_of
+    base = water_fill(pools, minimum, problem.capacity)
+    used = np.bincount(pools, weights=base, minlength=len(problem.pools))
+    extra = water_fill(pools, maximum - base, problem.capacity - used)
+    # flooring never exceeds a pool's capacity
+    return Allocation(problem, np.floor(base + extra + 1e-9).astype(np.int64), minimum)
+
+
+class CapacityAwareAdjustmentStrategy(AdjustmentStrategy):
+    """Turn a measured per-agent throughput into a per-agent frequency plan.
+
+    Reads ``servicespec-info`` and ``subscription-info`` through ``cr_client``
+    (served from the informer cache when one is configured).  A throughput
+    for one ``node`` caps only that node's streams; every other node keeps
+    the throughput it was last given (or the last node-less one), and nodes
+    never given one are bounded by their ``frequencyLimit`` alone.  A
+    throughput for some ``agents`` of a node caps only their streams, until
+    the node is given a throughput of its own; ``frequencyLimit`` and
+    ``workAbility`` bound those streams like any other.
+    """
+
+    def __init__(self, cr_client: Optional[K8sCustomResourceClient] = None, namespace: str = "arha-system") -> None:
+        self.cr_client = cr_client or K8sCustomResourceClient()
+        self.namespace = namespace
+        self.last_allocation: Optional[Allocation] = None
+        # node -> per-agent throughput capping that node's streams
+        self.node_throughput: Dict[str, float] = {}
+        # (node, agent, service or None for all) -> throughput capping that agent's streams
+        self.stream_throughput: Dict[Tuple[str, str, Optional[str]], float] = {}
+        self._default_throughput: Optional[float] = None
+        # (servicespec resourceVersion, subscription resourceVersion) -> problem
+        self._problem: Optional[Tuple[Tuple[Any, Any], AllocationProblem]] = None
+
+    async def compute_frequency(self, throughput: int) -> int:
+        return throughput
+
+    async def compute_plan(
+        self,
+        throughput: int,
+        node: Optional[str] = None,
+        agents: Optional[Collection[str]] = None,
+        services: Optional[Collection[str]] = None,
+    ) -> Optional[FrequencyPlan]:
+        if node is None:
+            self.node_throughput.clear()
+            self.stream_throughput.clear()
+            self._default_throughput = float(throughput)
+        elif agents:
+            if services is None:
+                # a cap for all of an agent's services replaces its per-service caps
+                self.stream_throughput = {
+                    key: value for key, value in self.stream_throughput.items()
+                    if key[0] != node or key[1] not in agents
+                }
+            for agent in agents:
+                for service in services if services is not None else (None,):
+                    self.stream_throughput[(node, agent, service)] = float(throughput)
+        else:
+            self.node_throughput[node] = float(throughput)
+            self.stream_throughput = {
+                key: value for key, value in self.stream_throughput.items() if key[0] != node
+            }
+        servicespec = await self.cr_client.get_servicespec_info(self.namespace)
+        subscriptions = await self.cr_client.get_subscription_info(self.namespace)
+        if not servicespec or not subscriptions:
+            logger.warning("servicespec-info or subscription-info unavailable; dispatching one frequency")
+            return None
+        problem = self._problem_for(servicespec, subscriptions)
+        allocation = allocate(problem, max_frequency=self._stream_caps(problem))
+        self.last_allocation = allocation
+        short = allocation.below_minimum()
+        if short:
+            logger.warning("Pools cannot cover the minimum frequency of %d streams: %s", len(short), short[:5])
+        logger.info(
+            "Allocated %d req/s over %d streams in %d pools",
+            allocation.total, len(allocation.problem.streams), len(allocation.problem.pools),
+        )
+        return allocation.to_plan()
+
+    def _stream_caps(self, problem: AllocationProblem) -> np.ndarray:
+        default = np.inf if self._default_throughput is None else self._default_throughput
+        caps = [self.node_throughput.get(node, default) for _, node, _ in problem.streams]
+        if self.stream_throughput:
+            for index, (agent, node, service) in enumerate(problem.streams):
+                cap = self.stream_throughput.get((node, agent, service))
+                if cap is None:
+                    cap = self.stream_throughput.get((node, agent, None))
+                if cap is not None:
+                    caps[index] = cap
+        return np.array(caps, dtype=float)
+
+    def _problem_for(self, servicespec: Mapping[str, Any], subscriptions: Mapping[str, Any]) -> AllocationProblem:
+        versions = (
+            servicespec.get("metadata", {}).get("resourceVersion"),
+            subscriptions.get("metadata", {}).get("resourceVersion"),
+        )
+        if self._problem is None or None in versions or self._problem[0] != versions:
+            problem = AllocationProblem.from_specs(servicespec.get("spec", {}), subscriptions.get("spec", {}))
+            self._problem = (versions, problem)
+        return self._problem[1]
@@ -1,10 +1,34 @@
+from typing import Iterable, Optional, Tuple
+
+from domain import FrequencyPlan
 from domain.services import Dispatcher as DispatcherInterface
+from utils.metrics import REGISTRY
+
+_DISPATCHES = REGISTRY.counter("event_handler_dispatches_total", "Frequencies dispatched", ["dispatcher"])
+_DISPATCHED_FREQUENCY = REGISTRY.gauge("event_handler_dispatched_frequency", "Last dispatched frequency")
 
 class InMemoryDispatcher(DispatcherInterface):
-    """Store dispatched frequency for inspection in tests."""
+    """Store dispatched frequency for inspection in tests.
+
+    ``targets`` (``(agent, service_type, node)``) are the streams a uniform
+    frequency is planned for; without them ``uniform_plan`` returns ``None``.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, targets: Optional[Iterable[Tuple[str, str, str]]] = None) -> None:
+        self.targets = list(targets) if targets is not None else None
         self.last_dispatched = None
+        self.last_plan = None
 
     async def dispatch(self, frequency: int) -> None:
         self.last_dispatched = frequency
+        _DISPATCHES.labels("memory").inc()
+        _DISPATCHED_FREQUENCY.set(frequency)
+
+    async def dispatch_plan(self, plan: FrequencyPlan) -> None:
+        self.last_plan = plan
+        _DISPATCHES.labels("memory").inc()
+
+    async def uniform_plan(self, frequency: int) -> Optional[FrequencyPlan]:
+        if self.targets is None:
+            return None
+        return FrequencyPlan.uniform(self.targets, frequency)
@@ -0,0 +1,100 @@
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from .load_test_config import LoadTestConfig
+
+# 單次探測: 輸入頻率, 回傳該頻率是否通過測試
+Probe = Callable[[int], Awaitable[bool]]
+
+
+@dataclass
+class SearchResult:
+    """頻率搜尋結果"""
+    max_successful_frequency: int
+    probes: int
+
+
+class FrequencySearchStrategy(ABC):
+    """最大可承受頻率的搜尋策略"""
+
+    @abstractmethod
+    async def search(self, probe: Probe, config: LoadTestConfig) -> SearchResult:
+        """回傳最大成功頻率與使用的探測次數"""
+        raise NotImplementedError
+
+
+class LinearFrequencySearch(FrequencySearchStrategy):
+    """從 initial_frequency 起每次增加 frequency_step，直到失敗或達上限"""
+
+    async def search(self, probe: Probe, config: LoadTestConfig) -> SearchResult:
+        current_frequency = config.initial_frequency
+        max_successful_frequency = 0
+        probes = 0
+
+        while current_frequency <= config.max_frequency:
+            probes += 1
+            if not await probe(current_frequency):
+                break
+            max_successful_frequency = current_frequency
+            current_frequency += config.frequency_step
+
+        return SearchResult(max_successful_frequency, probes)
+
+
+class ExponentialBisectionSearch(FrequencySearchStrategy):
+    """先以 growth_factor 指數擴張找出失敗上界，再於 [成功, 失敗) 區間二分至 search_resolution"""
+
+    async def search(self, probe: Probe, config: LoadTestConfig) -> SearchResult:
+        probes = 0
+        low = config.initial_frequency
+        if low > config.max_frequency:
+            return SearchResult(0, probes)
+
+        probes += 1
+        if not await probe(low):
+            return SearchResult(0, probes)
+
+        # 階段一: 指數擴張，找到第一個失敗的頻率作為上界
+        high = None
+        while low < config.max_frequency:
+            candidate = min(
+                max(math.ceil(low * config.growth_factor), low + 1),
+                config.max_frequency,
+            )
+            probes += 1
+            if await probe(candidate):
+                low = candidate
+            else:
+                high = candidate
+                break
+
+        if high is None:
+            return SearchResult(low, probes)
+
+        # 階段二: 二分搜尋，維持 low 成功、high 失敗
+        resolution = max(1, config.search_resolution)
+        while high - low > resolution:
+            mid = (low + high) // 2
+            probes += 1
+            if await probe(mid):
+                low = mid
+            else:
+                high = mid
+
+        return SearchResult(low, probes)
+
+
+SEARCH_STRATEGIES = {
+    "linear": LinearFrequencySearch,
+    "exponential": ExponentialBisectionSearch,
+}
+
+
+def create_search_strategy(mode: str) -> FrequencySearchStrategy:
+    """依名稱建立搜尋策略"""
+    try:
+        return SEARCH_STRATEGIES[mode]()
+    except KeyError:
+        raise ValueError(f"未知的頻率搜尋模式: {mode}") from None
@@ -1,31 +1,159 @@
 import asyncio
+import time
 from typing import List, Dict
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
 from .agent_load_simulator import AgentLoadSimulator
+from .http_load_driver import HttpAgentLoadSimulator
+from .load_test_config import LoadTestConfig
+from .load_test_result import AgentLoadResult, FrequencyProbeResult
+from .sequential_verdict import StreamingVerdict
+
+_PROBE_SECONDS = REGISTRY.histogram(
+    "event_handler_probe_seconds", "Duration of one frequency probe", ["result"]
+)
+
 
 class FrequencyTestExecutor:
     """頻率測試執行器"""
     
-    def __init__(self, simulator: AgentLoadSimulator = None):
-        self.simulator = simulator or AgentLoadSimulator()
+    def __init__(self, simulator: AgentLoadSimulator = None, config: LoadTestConfig = None):
+        self.config = config or LoadTestConfig()
+        self.simulator = simulator or _create_simulator(self.config)
     
     async def test_frequency(self, agents: List[Dict], frequency: int, deployment_hash: str) -> bool:
         """測試指定頻率"""
+        result = await self.run_probe(agents, frequency, deployment_hash)
+        return result.passed
+
+    async def close(self) -> None:
+        await self.simulator.close()
+
+    async def recover(self, seconds: float) -> None:
+        """兩次測試之間讓 agents 恢復"""
+        await asyncio.sleep(seconds)
+
+    async def run_probe(self, agents: List[Dict], frequency: int, deployment_hash: str) -> FrequencyProbeResult:
+        """測試指定頻率並回傳各 agent 的詳細結果"""
+        started = time.perf_counter()
+        with TRACER.span("probe", frequency=frequency, agents=len(agents)) as span:
+            result = await self._run_probe(agents, frequency, deployment_hash)
+            span.set_attribute("passed", result.passed)
+        _PROBE_SECONDS.labels("pass" if result.passed else "fail").observe(time.perf_counter() - started)
+        return result
+
+    async def _run_probe(self, agents: List[Dict], frequency: int, deployment_hash: str) -> FrequencyProbeResult:
         try:
             interval = 1.0 / frequency if frequency > 0 else 1.0
-            test_duration = 10
-            
-            tasks = [
-                asyncio.create_task(
-                    self.simulator.simulate_load(agent, interval, test_duration, deployment_hash)
-                ) for agent in agents
-            ]
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            success_count = sum(1 for result in results if result is True)
-            success_rate = success_count / len(agents)
-            
-            return success_rate >= 0.8
+            test_duration = self.config.max_test_duration
+
+            if self.config.verdict_mode == "sequential":
+                result = await self._probe_sequential(agents, frequency, interval, test_duration, deployment_hash)
+            else:
+                tasks = [
+                    asyncio.create_task(
+                        self.simulator.run_load(agent, interval, test_duration, deployment_hash)
+                    ) for agent in agents
+                ]
+                agent_results = self._collect(await asyncio.gather(*tasks, return_exceptions=True))
+                result = FrequencyProbeResult(
+                    frequency, self._quorum_passed(agent_results, len(agents)), agent_results
+                )
+
+            if result.agents:
+                rates = [agent_result.achieved_rate for agent_result in result.agents]
+                latency = result.latency
+                print(
+                    f"頻率 {frequency}: 目標 {result.agents[0].target_rate:.1f} 請求/秒，"
+                    f"實際平均 {result.achieved_rate:.1f} (最低 {min(rates):.1f}) 請求/秒，"
+                    f"錯誤 {result.errors}，延遲 p50/p95/p99 = "
+                    f"{_ms(latency.p50)}/{_ms(latency.p95)}/{_ms(latency.p99)} ms"
+                )
+            return result
             
         except Exception as e:
             print(f"頻率測試失敗: {e}")
-            return False
\ No newline at end of file
+            return FrequencyProbeResult(frequency, False)
+
+    async def _probe_sequential(
+        self, agents: List[Dict], frequency: int, interval: float, test_duration: float, deployment_hash: str
+    ) -> FrequencyProbeResult:
+        """以 SPRT 串流判定，判定達到信心水準時停止所有 agent"""
+        stop = asyncio.Event()
+        verdict = StreamingVerdict(
+            range(len(agents)),
+            self.config.success_threshold,
+            self.config.agent_success_threshold,
+            self.config.verdict_confidence,
+        )
+
+        loop = asyncio.get_running_loop()
+        pass_after = loop.time() + self.config.min_test_duration
+
+        def observer(index: int):
+            def on_result(success: bool) -> None:
+                if verdict.record(index, success, loop.time() >= pass_after) is not None:
+                    stop.set()
+            return on_result
+
+        tasks = [
+            asyncio.create_task(
+                self.simulator.run_load(
+                    agent, interval, test_duration, deployment_hash,
+                    on_result=observer(index), stop=stop,
+                )
+            ) for index, agent in enumerate(agents)
+        ]
+        agent_results = self._collect(await asyncio.gather(*tasks, return_exceptions=True))
+
+        if verdict.verdict is not None:
+            # SPRT 只檢定成功率，延遲 SLO 仍需另外符合
+            passed = verdict.verdict and (
+                self.config.latency_slo_ms is None
+                or self._quorum_passed(agent_results, len(agents))
+            )
+            return FrequencyProbeResult(frequency, passed, agent_results)
+
+        # 達到最長測試時間仍未判定，退回固定門檻判定
+        return FrequencyProbeResult(
+            frequency, self._quorum_passed(agent_results, len(agents)), agent_results
+        )
+
+    @staticmethod
+    def _collect(results) -> List[AgentLoadResult]:
+        return [result for result in results if isinstance(result, AgentLoadResult)]
+
+    def _agent_passed(self, result: AgentLoadResult) -> bool:
+        if not result.passed:
+            return False
+        if self.config.latency_slo_ms is None:
+            return True
+        observed = result.latency.percentile(self.config.latency_slo_percentile)
+        return observed is not None and observed * 1000 <= self.config.latency_slo_ms
+
+    def _quorum_passed(self, agent_results: List[AgentLoadResult], total: int) -> bool:
+        success_count = sum(1 for result in agent_results if self._agent_passed(result))
+        return success_count / total >= self.config.success_threshold
+
+
+def _create_simulator(config: LoadTestConfig) -> AgentLoadSimulator:
+    """依 load_driver 建立負載產生器"""
+    options = dict(
+        pacing=config.pacing_mode,
+        max_in_flight=config.max_in_flight,
+        success_threshold=config.agent_success_threshold,
+    )
+    if config.load_driver == "http":
+        return HttpAgentLoadSimulator(
+            **options,
+            request_path=config.request_path,
+            request_timeout=config.request_timeout,
+            max_connections_per_agent=config.max_connections_per_agent,
+        )
+    if config.load_driver != "simulated":
+        raise ValueError(f"未知的負載驅動: {config.load_driver}")
+    return AgentLoadSimulator(**options)
+
+
+def _ms(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
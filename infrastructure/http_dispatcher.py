@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from domain import FrequencyPlan
+from domain.services import Dispatcher
+from utils.metrics import REGISTRY
+from utils.tracing import TRACER
+from .k8s_subscription_client import K8sSubscriptionClient
+
+logger = logging.getLogger(__name__)
+
+_DISPATCHES = REGISTRY.counter("event_handler_dispatches_total", "Frequencies dispatched", ["dispatcher"])
+_DISPATCH_SECONDS = REGISTRY.histogram(
+    "event_handler_dispatch_seconds", "Time to push a frequency plan to all changed agents"
+)
+_AGENT_PUSH_SECONDS = REGISTRY.histogram(
+    "event_handler_agent_push_seconds", "Time to push frequencies to one agent, including retries", ["result"]
+)
+
+
+def agent_id(agent: Dict) -> str:
+    """subscription-info 項目對應的 agent 識別 (<agentIP>:<agentPort>)"""
+    return f"{agent['agentIP']}:{agent['agentPort']}"
+
+
+class HttpFanOutDispatcher(Dispatcher):
+    """把頻率計畫同時推送給 subscription-info 中的每個 agent
+
+    每個 agent 以 POST {path} 收到 {"frequencies": {serviceType: frequency}}。
+    只推送與上次成功推送不同的 agent；推送以 max_parallel 限制同時數量，所有
+    agent 共用一個連線池。每次嘗試有 timeout 秒的逾時，失敗 (連線錯誤、逾時、
+    非 2xx) 時最多重試 retries 次；仍失敗的 agent 會在下一次 dispatch 時重送。
+    """
+
+    def __init__(
+        self,
+        subscriptions: Optional[K8sSubscriptionClient] = None,
+        *,
+        path: str = "/frequency",
+        max_parallel: int = 32,
+        max_connections: int = 64,
+        timeout: float = 2.0,
+        retries: int = 2,
+        retry_backoff: float = 0.1,
+    ):
+        self.subscriptions = subscriptions or K8sSubscriptionClient()
+        self.path = path
+        self.max_parallel = max_parallel
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        # agent -> 上次成功推送的頻率
+        self.applied: Dict[str, Dict[str, int]] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _agents(self) -> Dict[str, List[Dict]]:
+        subscription_data = await self.subscriptions.get_subscription_info()
+        agents: Dict[str, List[Dict]] = {}
+        for agent in subscription_data.get('raw', []):
+            if agent.get('agentIP') and agent.get('agentPort'):
+                agents.setdefault(agent_id(agent), []).append(agent)
+        return agents
+
+    async def dispatch(self, frequency: int) -> None:
+        """所有 agent 的所有訂閱服務使用同一個頻率"""
+        agents = await self._agents()
+        await self._dispatch(self._uniform(agents, frequency), agents)
+
+    async def uniform_plan(self, frequency: int) -> FrequencyPlan:
+        """subscription-info 中每個 agent 的每個訂閱服務都使用 frequency 的計畫"""
+        return self._uniform(await self._agents(), frequency)
+
+    @staticmethod
+    def _uniform(agents: Dict[str, List[Dict]], frequency: int) -> FrequencyPlan:
+        return FrequencyPlan.uniform(
+            (
+                (agent, entry.get('serviceType'), entry.get('nodeName'))
+                for agent, entries in agents.items() for entry in entries
+            ),
+            frequency,
+        )
+
+    async def dispatch_plan(self, plan: FrequencyPlan) -> None:
+        await self._dispatch(plan, await self._agents())
+
+    async def _dispatch(self, plan: FrequencyPlan, agents: Dict[str, List[Dict]]) -> Dict[str, bool]:
+        # 已不在 subscription-info 中的 agent 不再追蹤
+        for gone in set(self.applied) - set(agents):
+            del self.applied[gone]
+        targets = [agent for agent in plan.changed_agents(self.applied) if agent in agents]
+        unknown = set(plan.agents) - set(agents)
+        if unknown:
+            logger.warning(f"頻率計畫中的 agent 不在 subscription-info 中: {sorted(unknown)}")
+        if not targets:
+            return {}
+
+        _DISPATCHES.labels("http").inc()
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def push(agent: str) -> Tuple[str, bool]:
+            async with semaphore:
+                return agent, await self._push(agent, plan.for_agent(agent))
+
+        started = time.perf_counter()
+        with TRACER.span("dispatcher.fan_out", agents=len(targets)):
+            results = dict(await asyncio.gather(*(push(agent) for agent in targets)))
+        _DISPATCH_SECONDS.observe(time.perf_counter() - started)
+
+        failed = sorted(agent for agent, ok in results.items() if not ok)
+        if failed:
+            logger.error(f"頻率推送失敗的 agent: {failed}")
+        logger.info(f"已推送頻率給 {len(results) - len(failed)}/{len(results)} 個 agent")
+        return results
+
+    async def _push(self, agent: str, frequencies: Dict[str, int]) -> bool:
+        session = self._ensure_session()
+        url = f"http://{agent}{self.path}"
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                async with session.post(url, json={"frequencies": frequencies}) as response:
+                    await response.read()
+                    if response.status < 300:
+                        self.applied[agent] = frequencies
+                        _AGENT_PUSH_SECONDS.labels("ok").observe(time.perf_counter() - started)
+                        return True
+                    error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+            logger.warning(f"推送頻率給 {agent} 失敗 (第 {attempt + 1} 次): {error}")
+        _AGENT_PUSH_SECONDS.labels("failed").observe(time.perf_counter() - started)
+        return False
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
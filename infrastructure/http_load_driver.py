@@ -0,0 +1,75 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+from .agent_load_simulator import AgentLoadSimulator
+
+# 請求內容產生器: (agent, deployment_hash) -> JSON body
+PayloadFactory = Callable[[Dict, str], Any]
+
+
+def default_payload(agent: Dict, deployment_hash: str) -> Dict[str, Any]:
+    """預設請求內容：告知 agent 目標服務與部署簽名"""
+    return {
+        "serviceType": agent.get("serviceType"),
+        "nodeName": agent.get("nodeName"),
+        "podIP": agent.get("podIP"),
+        "deploymentHash": deployment_hash,
+    }
+
+
+class HttpAgentLoadSimulator(AgentLoadSimulator):
+    """對 subscription-info 中的 agent (agentIP/agentPort) 發送真實 HTTP 請求
+
+    每個 agent 端點共用一個 ClientSession，連線保持 keep-alive，
+    並以 max_connections_per_agent 限制同時連線數。
+    """
+
+    def __init__(
+        self,
+        pacing: str = "closed",
+        max_in_flight: int = 1000,
+        success_threshold: float = 0.9,
+        *,
+        request_path: str = "/",
+        request_timeout: float = 2.0,
+        max_connections_per_agent: int = 64,
+        keepalive_timeout: float = 30.0,
+        payload_factory: Optional[PayloadFactory] = None,
+    ):
+        super().__init__(pacing, max_in_flight, success_threshold)
+        self.request_path = request_path
+        self.request_timeout = request_timeout
+        self.max_connections_per_agent = max_connections_per_agent
+        self.keepalive_timeout = keepalive_timeout
+        self.payload_factory = payload_factory or default_payload
+        self._sessions: Dict[Tuple[str, int], aiohttp.ClientSession] = {}
+
+    def _session_for(self, endpoint: Tuple[str, int]) -> aiohttp.ClientSession:
+        session = self._sessions.get(endpoint)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections_per_agent,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._sessions[endpoint] = session
+        return session
+
+    async def _send_request(self, agent: Dict, deployment_hash: str):
+        """發送請求到 agent，非 2xx 回應視為失敗"""
+        endpoint = (agent["agentIP"], int(agent["agentPort"]))
+        session = self._session_for(endpoint)
+        url = f"http://{endpoint[0]}:{endpoint[1]}{self.request_path}"
+        async with session.post(url, json=self.payload_factory(agent, deployment_hash)) as response:
+            await response.read()
+            if response.status >= 300:
+                raise Exception(f"agent 回應狀態碼 {response.status}")
+
+    async def close(self) -> None:
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            await session.close()
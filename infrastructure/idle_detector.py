@@ -0,0 +1,267 @@
+"""Idle detector that turns per-agent queue telemetry into IDLE_SYSTEM events.
+
+Agents report one sample per line, ``<agent> <node> <service> <queue_depth>
+<zero_ratio>``, where ``agent`` is ``<ip>:<port>`` and ``zero_ratio`` is the
+fraction of recent requests that returned no result.  Each ``(agent, node,
+service)`` stream owns a slot in :class:`EwmaAgentStats`, whose exponentially
+weighted averages live in NumPy arrays so a chunk of samples is folded in at
+once.
+
+A stream is idle while its smoothed queue depth is at most
+``max_queue_depth`` and its smoothed zero ratio at least ``min_zero_ratio``.
+Once streams on a node have been idle for ``debounce`` seconds, the node
+emits one ``Event(type="IDLE_SYSTEM")`` naming those agents and services,
+and at most one per ``cooldown`` seconds after that.
+"""
+
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from domain import Event
+from utils.metrics import REGISTRY
+from .sample_stream import Emit, SampleStreamDetector
+
+logger = logging.getLogger(__name__)
+
+_SAMPLES = REGISTRY.counter("event_handler_idle_samples_total", "Queue telemetry samples ingested by the idle detector")
+_MALFORMED = REGISTRY.counter("event_handler_idle_malformed_total", "Queue telemetry lines that could not be parsed")
+_IDLE_EVENTS = REGISTRY.counter("event_handler_idle_events_total", "IDLE_SYSTEM events emitted by the detector", ["node"])
+
+# (agent, node, service)
+Stream = Tuple[str, str, str]
+
+
+class EwmaAgentStats:
+    """Exponentially weighted queue depth and zero ratio per stream slot.
+
+    ``alpha`` weighs each new sample; the first sample of a slot seeds its
+    averages.  Arrays double in size as slots are added.
+    """
+
+    def __init__(self, alpha: float = 0.2, capacity: int = 64) -> None:
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.streams: List[Stream] = []
+        self._index: Dict[Stream, int] = {}
+        self.node_of = np.zeros(capacity, dtype=np.intp)
+        self.nodes: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self.queue_depth = np.zeros(capacity)
+        self.zero_ratio = np.zeros(capacity)
+        self.samples = np.zeros(capacity, dtype=np.int64)
+        self.last_seen = np.full(capacity, -np.inf)
+
+    def __len__(self) -> int:
+        return len(self.streams)
+
+    def slot(self, stream: Stream) -> int:
+        index = self._index.get(stream)
+        if index is None:
+            index = self._index[stream] = len(self.streams)
+            self.streams.append(stream)
+            if index >= len(self.samples):
+                self._grow()
+            node = stream[1]
+            node_id = self._node_index.get(node)
+            if node_id is None:
+                node_id = self._node_index[node] = len(self.nodes)
+                self.nodes.append(node)
+            self.node_of[index] = node_id
+        return index
+
+    def update(self, slots: np.ndarray, queue_depth: np.ndarray, zero_ratio: np.ndarray, now: float) -> None:
+        """Fold one sample per entry of ``slots`` into the averages, in order.
+
+        A slot repeated ``k`` times in one batch gets the same result as ``k``
+        single updates: its average decays by ``(1 - alpha) ** k`` and each
+        sample is weighted by ``alpha * (1 - alpha) ** (later samples)``.
+        """
+        if not len(slots):
+            return
+        order = np.argsort(slots, kind="stable")
+        ordered = slots[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        sizes = np.diff(np.r_[starts, len(ordered)])
+        group = ordered[starts]
+        later = np.repeat(starts + sizes, sizes) - np.arange(len(ordered)) - 1
+        keep = 1.0 - self.alpha
+        weights = self.alpha * keep ** later
+        # a slot's first sample seeds its averages
+        seeded = self.samples[group] == 0
+        weights[starts[seeded]] = 0.0
+        decay = keep ** (sizes - seeded)
+        for values, samples in ((self.queue_depth, queue_depth), (self.zero_ratio, zero_ratio)):
+            ordered_samples = samples[order]
+            base = np.where(seeded, ordered_samples[starts], values[group])
+            values[group] = decay * base + np.add.reduceat(weights * ordered_samples, starts)
+        self.samples[group] += sizes
+        self.last_seen[group] = now
+
+    def _grow(self) -> None:
+        size = len(self.samples)
+        self.node_of = np.concatenate([self.node_of, np.zeros(size, dtype=np.intp)])
+        self.queue_depth = np.concatenate([self.queue_depth, np.zeros(size)])
+        self.zero_ratio = np.concatenate([self.zero_ratio, np.zeros(size)])
+        self.samples = np.concatenate([self.samples, np.zeros(size, dtype=np.int64)])
+        self.last_seen = np.concatenate([self.last_seen, np.full(size, -np.inf)])
+
+
+class IdleDetector(SampleStreamDetector):
+    """Emit debounced ``IDLE_SYSTEM`` events per node.
+
+    A stream counts only after ``min_samples`` samples and while it reported
+    within ``stale_after`` seconds.  Event payloads carry ``node``,
+    ``services`` and ``agents`` (the idle ones, sorted) plus their mean
+    smoothed ``queue_depth`` and ``zero_ratio``, so
+    :class:`IdleSystemHandler` can probe just those agents.
+    """
+
+    def __init__(
+        self,
+        emit: Emit,
+        max_queue_depth: float = 0.5,
+        min_zero_ratio: float = 0.9,
+        alpha: float = 0.2,
+        min_samples: int = 5,
+        debounce: float = 30.0,
+        cooldown: float = 300.0,
+        stale_after: float = 60.0,
+        evaluate_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        source: str = "idle-detector",
+    ) -> None:
+        super().__init__()
+        self.emit = emit
+        self.max_queue_depth = max_queue_depth
+        self.min_zero_ratio = min_zero_ratio
+        self.min_samples = min_samples
+        self.debounce = debounce
+        self.cooldown = cooldown
+        self.stale_after = stale_after
+        self.evaluate_interval = evaluate_interval
+        self.clock = clock
+        self.source = source
+        self.stats = EwmaAgentStats(alpha)
+        # (agent, node, service) as raw bytes -> slot, so parsing skips decoding
+        self._byte_streams: Dict[Tuple[bytes, bytes, bytes], int] = {}
+        self._idle_since = np.full(len(self.stats.samples), np.nan)
+        self._emitted_at: Dict[str, float] = {}
+
+    def record(self, agent: str, node: str, service: str, queue_depth: float, zero_ratio: float) -> None:
+        if not (math.isfinite(queue_depth) and math.isfinite(zero_ratio)):
+            _MALFORMED.inc()
+            return
+        slot = self.stats.slot((agent, node, service))
+        self.stats.update(np.array([slot]), np.array([float(queue_depth)]), np.array([float(zero_ratio)]), self.clock())
+        _SAMPLES.inc()
+
+    def feed(self, data: bytes) -> int:
+        """Fold the complete ``<agent> <node> <service> <queue_depth> <zero_ratio>`` lines into the averages."""
+        rows = list(map(bytes.split, data.splitlines()))
+        try:
+            # every line must have exactly five fields, or fields shift into the wrong streams
+            if set(map(len, rows)) != {5}:
+                raise ValueError("uneven lines")
+            agents, nodes, services, depth_values, ratio_values = zip(*rows)
+            depths = np.array(list(map(float, depth_values)), dtype=float)
+            ratios = np.array(list(map(float, ratio_values)), dtype=float)
+            streams: Sequence[Tuple[bytes, bytes, bytes]] = list(zip(agents, nodes, services))
+        except ValueError:
+            streams, depths, ratios = self._parse_lines(data)
+        finite = np.isfinite(depths) & np.isfinite(ratios)
+        if not finite.all():
+            # nan/inf parse as floats but would poison the averages
+            _MALFORMED.inc(int((~finite).sum()))
+            streams = [stream for stream, keep in zip(streams, finite.tolist()) if keep]
+            depths, ratios = depths[finite], ratios[finite]
+        slots = self._slots(streams)
+        self.stats.update(slots, depths, ratios, self.clock())
+        _SAMPLES.inc(len(slots))
+        return len(slots)
+
+    def _parse_lines(self, data: bytes) -> Tuple[List[Tuple[bytes, bytes, bytes]], np.ndarray, np.ndarray]:
+        streams: List[Tuple[bytes, bytes, bytes]] = []
+        depths: List[float] = []
+        ratios: List[float] = []
+        for line in data.splitlines():
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                depth, ratio = float(parts[3]), float(parts[4])
+            except (IndexError, ValueError):
+                _MALFORMED.inc()
+                continue
+            streams.append((parts[0], parts[1], parts[2]))
+            depths.append(depth)
+            ratios.append(ratio)
+        return streams, np.array(depths, dtype=float), np.array(ratios, dtype=float)
+
+    def _slots(self, streams: Sequence[Tuple[bytes, bytes, bytes]]) -> np.ndarray:
+        lookup = self._byte_streams.get
+        slots = [lookup(stream, -1) for stream in streams]
+        if -1 in slots:
+            for position, stream in enumerate(streams):
+                if slots[position] == -1:
+                    slot = self._byte_streams.get(stream)
+                    if slot is None:
+                        slot = self.stats.slot(tuple(part.decode() for part in stream))
+                        self._byte_streams[stream] = slot
+                    slots[position] = slot
+        return np.array(slots, dtype=np.intp)
+
+    async def evaluate(self) -> List[Event]:
+        """Update every stream's idle state and emit the nodes whose idleness has settled."""
+        now = self.clock()
+        stats = self.stats
+        count = len(stats)
+        if len(self._idle_since) < len(stats.samples):
+            grown = np.full(len(stats.samples), np.nan)
+            grown[: len(self._idle_since)] = self._idle_since
+            self._idle_since = grown
+        idle = (
+            (stats.samples[:count] >= self.min_samples)
+            & (now - stats.last_seen[:count] <= self.stale_after)
+            & (stats.queue_depth[:count] <= self.max_queue_depth)
+            & (stats.zero_ratio[:count] >= self.min_zero_ratio)
+        )
+        since = self._idle_since[:count]
+        since[idle & np.isnan(since)] = now
+        since[~idle] = np.nan
+        settled = np.flatnonzero(idle & (now - since >= self.debounce))
+
+        events: List[Event] = []
+        for node_id in np.unique(stats.node_of[settled]).tolist():
+            node = stats.nodes[node_id]
+            last = self._emitted_at.get(node)
+            if last is not None and now - last < self.cooldown:
+                continue
+            members = settled[stats.node_of[settled] == node_id]
+            self._emitted_at[node] = now
+            events.append(self._event(node, members))
+        for event in events:
+            _IDLE_EVENTS.labels(event.payload["node"]).inc()
+            logger.info("Idle agents detected: %s", event.payload)
+            await self.emit(event)
+        return events
+
+    def _event(self, node: str, members: np.ndarray) -> Event:
+        streams = [self.stats.streams[slot] for slot in members.tolist()]
+        return Event(
+            type="IDLE_SYSTEM",
+            payload={
+                "node": node,
+                "services": sorted({service for _, _, service in streams}),
+                "agents": sorted({agent for agent, _, _ in streams}),
+                "queue_depth": round(float(self.stats.queue_depth[members].mean()), 3),
+                "zero_ratio": round(float(self.stats.zero_ratio[members].mean()), 3),
+            },
+            timestamp=datetime.utcnow(),
+            source=self.source,
+        )
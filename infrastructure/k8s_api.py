@@ -0,0 +1,253 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import ssl
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+from kubernetes import client, config
+from kubernetes.client.rest import ApiException
+from kubernetes.config.config_exception import ConfigException
+
+logger = logging.getLogger(__name__)
+
+MERGE_PATCH = "application/merge-patch+json"
+JSON_PATCH = "application/json-patch+json"
+
+
+def _query(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    return {
+        key: str(value).lower() if isinstance(value, bool) else str(value)
+        for key, value in (params or {}).items()
+        if value is not None
+    }
+
+
+def _log_close_error(future: concurrent.futures.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"關閉舊的 Kubernetes API session 失敗: {future.exception()!r}")
+
+
+class AsyncK8sApi:
+    """原生 async 的 Kubernetes API 客戶端
+
+    所有請求共用一個 aiohttp 連線池 (max_connections)，並以 semaphore 限制同時進行
+    的請求數 (max_concurrency)；每個請求有 request_timeout 秒的逾時。錯誤回應以
+    kubernetes.client.rest.ApiException 拋出，與同步 client 的錯誤處理相容。
+
+    未指定 host 時，第一次請求才載入叢集內或本地 kubeconfig 設定。
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        *,
+        token: Optional[str] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        max_connections: int = 16,
+        max_concurrency: int = 8,
+        request_timeout: float = 10.0,
+    ):
+        self.host = host.rstrip("/") if host else None
+        self.token = token
+        self.ssl_context = ssl_context
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self._configuration: Optional[client.Configuration] = None
+        self._config_error: Optional[ConfigException] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # 在其他執行緒的舊 loop 上關閉中的 session
+        self._closing: List[concurrent.futures.Future] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _load_configuration(self) -> None:
+        """載入叢集內或本地 kubeconfig，失敗時記住錯誤避免重複嘗試"""
+        if self.host or self._config_error:
+            if self._config_error:
+                raise self._config_error
+            return
+        configuration = client.Configuration()
+        try:
+            config.load_incluster_config(client_configuration=configuration)
+            logger.info("已載入叢集內 Kubernetes 配置")
+        except ConfigException:
+            try:
+                config.load_kube_config(client_configuration=configuration)
+                logger.info("已載入本地 Kubernetes 配置")
+            except ConfigException as e:
+                logger.warning("無法載入 Kubernetes 配置，部分功能將不可用")
+                self._config_error = e
+                raise
+        self._configuration = configuration
+        self.host = configuration.host.rstrip("/")
+        if configuration.verify_ssl:
+            context = ssl.create_default_context(cafile=configuration.ssl_ca_cert)
+            if configuration.cert_file:
+                context.load_cert_chain(configuration.cert_file, configuration.key_file)
+            self.ssl_context = context
+        else:
+            self.ssl_context = False
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Accept": "application/json"}
+        if self._configuration is not None:
+            # 叢集內 token 會輪替，由 kubernetes client 的 hook 負責更新
+            if self._configuration.refresh_api_key_hook is not None:
+                self._configuration.refresh_api_key_hook(self._configuration)
+            authorization = self._configuration.get_api_key_with_prefix("authorization")
+            if authorization:
+                headers["Authorization"] = authorization
+        elif self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._discard_session()
+            self._load_configuration()
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                ssl=self.ssl_context if self.ssl_context is not None else True,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _discard_session(self) -> None:
+        """事件迴圈更換時釋放舊 session 的連線，避免洩漏連線與 socket"""
+        session, loop = self._session, self._session_loop
+        self._session = None
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # 舊 loop 仍在其他執行緒執行，在它上面 await close()，並保留 future 以回報錯誤
+            closing = asyncio.run_coroutine_threadsafe(session.close(), loop)
+            closing.add_done_callback(_log_close_error)
+            self._closing.append(closing)
+            return
+        # 舊 loop 已停止：無法在它上面 await close()，已關閉的 loop 連線也隨之失效
+        session.detach()
+        if loop is not None and not loop.is_closed():
+            logger.warning("舊事件迴圈已停止但未關閉，其 Kubernetes API 連線無法釋放")
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        body: Any = None,
+        content_type: str = "application/json",
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """送出請求並回傳解析後的 JSON，HTTP 錯誤時拋出 ApiException"""
+        session = self._ensure_session()
+        headers = self._headers()
+        data = None
+        if body is not None:
+            headers["Content-Type"] = content_type
+            data = json.dumps(body)
+        async with self._semaphore:
+            async with session.request(
+                method,
+                self.host + path,
+                params=_query(params),
+                data=data,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout or self.request_timeout),
+            ) as response:
+                text = await response.text()
+                if response.status >= 400:
+                    error = ApiException(status=response.status, reason=response.reason)
+                    error.body = text
+                    error.headers = dict(response.headers)
+                    raise error
+                return json.loads(text) if text else None
+
+    async def stream(
+        self, path: str, *, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """以 GET 讀取逐行 JSON 串流 (watch)，不佔用並行請求額度"""
+        session = self._ensure_session()
+        async with session.get(
+            self.host + path,
+            params=_query(params),
+            headers=self._headers(),
+            timeout=aiohttp.ClientTimeout(total=timeout, sock_read=timeout),
+        ) as response:
+            if response.status >= 400:
+                error = ApiException(status=response.status, reason=response.reason)
+                error.body = await response.text()
+                raise error
+            async for line in response.content:
+                if line.strip():
+                    yield json.loads(line)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        closing, self._closing = self._closing, []
+        # 等待舊 loop 上的關閉完成 (錯誤已由 _log_close_error 記錄)
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in closing), return_exceptions=True)
+
+    # CustomObjects API
+
+    @staticmethod
+    def custom_object_path(group: str, version: str, namespace: str, plural: str, name: Optional[str] = None) -> str:
+        path = f"/apis/{group}/{version}/namespaces/{namespace}/{plural}"
+        return f"{path}/{name}" if name else path
+
+    async def get_namespaced_custom_object(self, group, version, namespace, plural, name) -> Dict[str, Any]:
+        return await self.request("GET", self.custom_object_path(group, version, namespace, plural, name))
+
+    async def list_namespaced_custom_object(
+        self, group, version, namespace, plural, label_selector: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "GET",
+            self.custom_object_path(group, version, namespace, plural),
+            params={"labelSelector": label_selector},
+        )
+
+    async def create_namespaced_custom_object(self, group, version, namespace, plural, body) -> Dict[str, Any]:
+        return await self.request("POST", self.custom_object_path(group, version, namespace, plural), body=body)
+
+    async def replace_namespaced_custom_object(self, group, version, namespace, plural, name, body) -> Dict[str, Any]:
+        return await self.request("PUT", self.custom_object_path(group, version, namespace, plural, name), body=body)
+
+    async def patch_namespaced_custom_object(
+        self, group, version, namespace, plural, name, patch, content_type: str = MERGE_PATCH
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "PATCH",
+            self.custom_object_path(group, version, namespace, plural, name),
+            body=patch,
+            content_type=content_type,
+        )
+
+    async def delete_namespaced_custom_object(self, group, version, namespace, plural, name) -> Dict[str, Any]:
+        return await self.request("DELETE", self.custom_object_path(group, version, namespace, plural, name))
+
+
+_shared_api: Optional[AsyncK8sApi] = None
+
+
+def shared_k8s_api() -> AsyncK8sApi:
+    """回傳行程內共用的 AsyncK8sApi，第一次呼叫時以預設值建立"""
+    global _shared_api
+    if _shared_api is None:
+        _shared_api = AsyncK8sApi()
+    return _shared_api
+
+
+def configure_shared_k8s_api(api: AsyncK8sApi) -> AsyncK8sApi:
+    """替換共用的 AsyncK8sApi (需在建立使用它的客戶端之前呼叫)"""
+    global _shared_api
+    _shared_api = api
+    return api
@@ -1,42 +1,77 @@
 import asyncio
+import functools
 import json
-from typing import Any, Dict, List, Optional
-from kubernetes import client, config
+from typing import Any, Dict, List, Optional, Set, Tuple
 from kubernetes.client.rest import ApiException
-from kubernetes.config.config_exception import ConfigException
 import logging
 
+from utils.metrics import REGISTRY
+from utils.tracing import traced
+from .k8s_api import JSON_PATCH, AsyncK8sApi, shared_k8s_api
+from .k8s_informer import CustomResourceCache, shared_resource_cache
+
 logger = logging.getLogger(__name__)
 
+_FREQUENCY_WRITES = REGISTRY.counter(
+    "event_handler_frequency_writes_total", "service-info frequency writes by outcome", ["result"]
+)
+
+
+def frequency_patch(service_info: Dict[str, Any], frequencies: Dict[str, int]) -> List[Dict[str, Any]]:
+    """
+    計算把 frequencies 套用到 service-info 所需的最小 JSON patch
+
+    只針對 currentFrequency 實際改變的項目產生操作，並以 metadata.resourceVersion
+    作為前置條件 (物件已被他人修改時 API server 回 409)。沒有任何改變時回傳 []。
+    """
+    operations = []
+    for index, item in enumerate(service_info.get('spec', {}).get('raw', [])):
+        service_type = item.get('serviceType')
+        if service_type not in frequencies:
+            continue
+        frequency = frequencies[service_type]
+        if 'currentFrequency' not in item:
+            operations.append({'op': 'add', 'path': f'/spec/raw/{index}/currentFrequency', 'value': frequency})
+        elif item['currentFrequency'] != frequency:
+            operations.append({'op': 'replace', 'path': f'/spec/raw/{index}/currentFrequency', 'value': frequency})
+    if not operations:
+        return []
+    resource_version = service_info.get('metadata', {}).get('resourceVersion')
+    if resource_version:
+        operations.insert(0, {'op': 'replace', 'path': '/metadata/resourceVersion', 'value': resource_version})
+    return operations
+
 class K8sCustomResourceClient:
     """Kubernetes CustomResource 讀寫客戶端"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        api: Optional[AsyncK8sApi] = None,
+        cache: Optional[CustomResourceCache] = None,
+        batch_window: float = 0.05,
+        max_conflict_retries: int = 3,
+    ):
         """
         初始化 Kubernetes client
         
-        Side Effects:
-        - 載入 Kubernetes 配置 (叢集內或本地)
-        - 建立 CustomObjectsApi client
+        Input:
+        - api: 使用的 AsyncK8sApi，預設為行程內共用的實例
+          (共用連線池與並行上限，設定於第一次請求時載入)
+        - cache: 讀取 service-info / subscription-info 用的 informer 快取，
+          預設為行程內共用的快取；皆未設定時直接讀取 API
+        - batch_window: 合併頻率更新的時間窗 (秒)
+        - max_conflict_retries: 頻率寫入遇到 409 Conflict 時的重試次數
         """
-        try:
-            # 嘗試載入叢集內配置
-            config.load_incluster_config()
-            logger.info("已載入叢集內 Kubernetes 配置")
-        except ConfigException:
-            try:
-                # 如果不在叢集內，則載入本地配置
-                config.load_kube_config()
-                logger.info("已載入本地 Kubernetes 配置")
-            except ConfigException:
-                logger.warning("無法載入 Kubernetes 配置，部分功能將不可用")
-                self.custom_api = None
-                self.core_api = None
-                return
-
-        self.custom_api = client.CustomObjectsApi()
-        self.core_api = client.CoreV1Api()
+        self.api = api or shared_k8s_api()
+        self.cache = cache or shared_resource_cache()
+        self.batch_window = batch_window
+        self.max_conflict_retries = max_conflict_retries
+        # namespace -> (合併中的頻率, 等待寫入結果的 future)
+        self._pending_frequencies: Dict[str, Tuple[Dict[str, int], asyncio.Future]] = {}
+        # 保留合併寫入 task 的參考，避免執行中被回收
+        self._flush_tasks: Set[asyncio.Task] = set()
 
+    @traced("k8s.get_custom_resource")
     async def get_custom_resource(
         self,
         group: str,
@@ -59,13 +94,8 @@ class K8sCustomResourceClient:
         - Dict[str, Any]: CustomResource 的完整內容，包含 metadata, spec, status
         - None: 如果資源不存在或讀取失敗
         """
-        if not self.custom_api:
-            return None
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.custom_api.get_namespaced_custom_object,
+            response = await self.api.get_namespaced_custom_object(
                 group,
                 version,
                 namespace,
@@ -85,6 +115,7 @@ class K8sCustomResourceClient:
             logger.error(f"執行 Kubernetes API 時發生錯誤: {e}")
             return None
 
+    @traced("k8s.list_custom_resources")
     async def list_custom_resources(
         self,
         group: str,
@@ -106,19 +137,13 @@ class K8sCustomResourceClient:
         Output:
         - List[Dict[str, Any]]: CustomResource 列表
         """
-        if not self.custom_api:
-            return []
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.custom_api.list_namespaced_custom_object(
-                    group,
-                    version,
-                    namespace,
-                    plural,
-                    label_selector=label_selector,
-                ),
+            response = await self.api.list_namespaced_custom_object(
+                group,
+                version,
+                namespace,
+                plural,
+                label_selector=label_selector,
             )
             items = response.get('items', [])
             logger.info(f"成功列出 {len(items)} 個 CustomResources")
@@ -131,6 +156,7 @@ class K8sCustomResourceClient:
             logger.error(f"執行 Kubernetes API 時發生錯誤: {e}")
             return []
 
+    @traced("k8s.create_custom_resource")
     async def create_custom_resource(
         self,
         group: str,
@@ -153,13 +179,8 @@ class K8sCustomResourceClient:
         - Dict[str, Any]: 創建成功的 CustomResource
         - None: 如果創建失敗
         """
-        if not self.custom_api:
-            return None
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.custom_api.create_namespaced_custom_object,
+            response = await self.api.create_namespaced_custom_object(
                 group,
                 version,
                 namespace,
@@ -177,6 +198,7 @@ class K8sCustomResourceClient:
             logger.error(f"執行 Kubernetes API 時發生錯誤: {e}")
             return None
 
+    @traced("k8s.update_custom_resource")
     async def update_custom_resource(
         self,
         group: str,
@@ -201,13 +223,8 @@ class K8sCustomResourceClient:
         - Dict[str, Any]: 更新成功的 CustomResource
         - None: 如果更新失敗
         """
-        if not self.custom_api:
-            return None
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.custom_api.replace_namespaced_custom_object,
+            response = await self.api.replace_namespaced_custom_object(
                 group,
                 version,
                 namespace,
@@ -225,6 +242,7 @@ class K8sCustomResourceClient:
             logger.error(f"執行 Kubernetes API 時發生錯誤: {e}")
             return None
 
+    @traced("k8s.patch_custom_resource")
     async def patch_custom_resource(
         self,
         group: str,
@@ -249,13 +267,8 @@ class K8sCustomResourceClient:
         - Dict[str, Any]: 更新成功的 CustomResource
         - None: 如果更新失敗
         """
-        if not self.custom_api:
-            return None
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.custom_api.patch_namespaced_custom_object,
+            response = await self.api.patch_namespaced_custom_object(
                 group,
                 version,
                 namespace,
@@ -273,6 +286,7 @@ class K8sCustomResourceClient:
             logger.error(f"執行 Kubernetes API 時發生錯誤: {e}")
             return None
 
+    @traced("k8s.delete_custom_resource")
     async def delete_custom_resource(
         self,
         group: str,
@@ -294,13 +308,8 @@ class K8sCustomResourceClient:
         Output:
         - bool: 刪除是否成功
         """
-        if not self.custom_api:
-            return False
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                self.custom_api.delete_namespaced_custom_object,
+            await self.api.delete_namespaced_custom_object(
                 group,
                 version,
                 namespace,
@@ -321,18 +330,34 @@ class K8sCustomResourceClient:
             return False
 
     # 便利方法：針對您專案中的特定 CustomResources
+    @traced("k8s.get_service_info")
     async def get_service_info(self, namespace: str = "default") -> Optional[Dict[str, Any]]:
-        """獲取服務資訊 CustomResource"""
-        return await self.get_custom_resource(
-            "ha.example.com", "v1", namespace, "services", "service-info"
-        )
+        """獲取服務資訊 CustomResource (有快取時由記憶體提供，不可修改)"""
+        return await self._get_cached(namespace, "services", "service-info")
 
+    @traced("k8s.get_subscription_info")
     async def get_subscription_info(self, namespace: str = "arha-system") -> Optional[Dict[str, Any]]:
-        """獲取訂閱資訊 CustomResource"""
-        return await self.get_custom_resource(
-            "ha.example.com", "v1", namespace, "subscriptions", "subscription-info"
-        )
+        """獲取訂閱資訊 CustomResource (有快取時由記憶體提供，不可修改)"""
+        return await self._get_cached(namespace, "subscriptions", "subscription-info")
+
+    @traced("k8s.get_servicespec_info")
+    async def get_servicespec_info(self, namespace: str = "arha-system") -> Optional[Dict[str, Any]]:
+        """獲取服務規格 (frequencyLimit / workAbility) CustomResource (有快取時由記憶體提供，不可修改)"""
+        return await self._get_cached(namespace, "servicespecs", "servicespec-info")
+
+    async def _get_cached(self, namespace: str, plural: str, name: str) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return await self.get_custom_resource("ha.example.com", "v1", namespace, plural, name)
+        try:
+            response = await self.cache.get("ha.example.com", "v1", namespace, plural, name)
+            if response is None:
+                logger.warning(f"CustomResource 不存在: {namespace}/{name}")
+            return response
+        except Exception as e:
+            logger.error(f"讀取 CustomResource 快取失敗: {e}")
+            return None
 
+    @traced("k8s.update_service_frequencies")
     async def update_service_frequencies(
         self, 
         frequencies: Dict[str, int], 
@@ -340,39 +365,90 @@ class K8sCustomResourceClient:
     ) -> bool:
         """
         更新服務頻率
+
+        batch_window 內對同一 namespace 的多次呼叫會合併成一次寫入 (同一服務以最後
+        一次的值為準)，所有呼叫者取得同一個結果。只寫入實際改變的 currentFrequency，
+        沒有改變時不呼叫 API。
         
         Input:
         - frequencies: {service_type: frequency} 的字典
         - namespace: namespace 名稱
         
         Output:
-        - bool: 更新是否成功
+        - bool: 更新是否成功 (沒有需要改變的頻率也視為成功)
         """
-        # 首先獲取當前的服務資訊
+        pending = self._pending_frequencies.get(namespace)
+        if pending is None:
+            pending = ({}, asyncio.get_running_loop().create_future())
+            self._pending_frequencies[namespace] = pending
+            task = asyncio.create_task(self._flush_frequencies(namespace))
+            self._flush_tasks.add(task)
+            task.add_done_callback(functools.partial(self._flush_done, namespace, pending[1]))
+        pending[0].update(frequencies)
+        return await asyncio.shield(pending[1])
+
+    async def _flush_frequencies(self, namespace: str) -> None:
+        await asyncio.sleep(self.batch_window)
+        frequencies, future = self._pending_frequencies.pop(namespace)
+        try:
+            result = await self._write_frequencies(frequencies, namespace)
+        except Exception as e:
+            logger.error(f"更新服務頻率時發生錯誤: {e}")
+            _FREQUENCY_WRITES.labels("failed").inc()
+            result = False
+        future.set_result(result)
+
+    def _flush_done(self, namespace: str, future: asyncio.Future, task: asyncio.Task) -> None:
+        self._flush_tasks.discard(task)
+        # task 被取消 (可能尚未開始執行) 時也要讓等待中的呼叫者取得結果，視為失敗
+        pending = self._pending_frequencies.get(namespace)
+        if pending is not None and pending[1] is future:
+            del self._pending_frequencies[namespace]
+        if not future.done():
+            future.set_result(False)
+
+    @traced("k8s.write_service_frequencies")
+    async def _write_frequencies(self, frequencies: Dict[str, int], namespace: str) -> bool:
+        # 先用快取的內容計算差異；衝突時改讀 API 上的最新版本再重算
         current = await self.get_service_info(namespace)
-        if not current:
-            logger.error("無法獲取當前服務資訊")
-            return False
+        if current and self.cache is not None and not frequency_patch(current, frequencies):
+            informer = self.cache.informer("ha.example.com", "v1", namespace, "services", "service-info")
+            if not informer.watching:
+                # 快取未由 watch 即時維護，可能落後於 API：確認後才判定無需寫入
+                current = await self.get_custom_resource("ha.example.com", "v1", namespace, "services", "service-info")
+        for attempt in range(self.max_conflict_retries + 1):
+            if not current:
+                logger.error("無法獲取當前服務資訊")
+                _FREQUENCY_WRITES.labels("failed").inc()
+                return False
 
-        # 更新頻率
-        updated_raw = []
-        for item in current.get('spec', {}).get('raw', []):
-            service_type = item.get('serviceType')
-            if service_type in frequencies:
-                item = item.copy()  # 避免修改原始資料
-                item['currentFrequency'] = frequencies[service_type]
-            updated_raw.append(item)
+            patch = frequency_patch(current, frequencies)
+            if not patch:
+                logger.info(f"服務頻率未改變，略過寫入: {namespace}/service-info")
+                _FREQUENCY_WRITES.labels("unchanged").inc()
+                return True
 
-        # 準備 patch
-        patch = {
-            'spec': {
-                'raw': updated_raw
-            }
-        }
+            try:
+                updated = await self.api.patch_namespaced_custom_object(
+                    "ha.example.com", "v1", namespace, "services", "service-info",
+                    patch, content_type=JSON_PATCH,
+                )
+                if self.cache is not None and updated:
+                    # 後續的無變動判斷不必等 watch 送來自己寫入的版本
+                    self.cache.observe("ha.example.com", "v1", namespace, "services", updated)
+                changed = sum(1 for operation in patch if operation['path'].startswith('/spec/'))
+                logger.info(f"成功更新 {changed} 個服務頻率: {namespace}/service-info")
+                _FREQUENCY_WRITES.labels("patched").inc()
+                return True
+            except ApiException as e:
+                if e.status != 409:
+                    logger.error(f"Patch CustomResource 失敗: {e}")
+                    _FREQUENCY_WRITES.labels("failed").inc()
+                    return False
+                logger.info(f"service-info 已被修改 (第 {attempt + 1} 次衝突)，重新讀取")
+                _FREQUENCY_WRITES.labels("conflict").inc()
+                current = await self.get_custom_resource("ha.example.com", "v1", namespace, "services", "service-info")
 
-        # 執行更新
-        result = await self.patch_custom_resource(
-            "ha.example.com", "v1", namespace, "services", "service-info", patch
-        )
-        
-        return result is not None
\ No newline at end of file
+        logger.error(f"更新服務頻率失敗: 連續 {self.max_conflict_retries + 1} 次衝突")
+        _FREQUENCY_WRITES.labels("failed").inc()
+        return False
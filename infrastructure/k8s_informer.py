@@ -0,0 +1,237 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from kubernetes.client.rest import ApiException
+
+from utils.metrics import REGISTRY
+from .k8s_api import AsyncK8sApi, shared_k8s_api
+
+logger = logging.getLogger(__name__)
+
+_READS = REGISTRY.counter(
+    "event_handler_k8s_cache_reads_total", "Custom object reads served by the informer cache", ["plural", "result"]
+)
+
+ObjectKey = Tuple[str, str, str, str, str]
+
+
+class _WatchExpired(Exception):
+    """watch 的 resourceVersion 已被壓縮 (410 Gone)，必須重新 list"""
+
+
+class CustomResourceInformer:
+    """以 list-watch 在記憶體中維護單一 CustomResource 的最新內容
+
+    先 list (以 fieldSelector 選定名稱) 取得物件與 resourceVersion，再從該版本
+    watch 後續變更。watch 連線存活時快取視為最新；連線中斷超過 max_staleness 秒
+    後，get() 會先重新 list 再回傳。watch 逾時會從目前版本續看，收到 410 Gone
+    (版本已過期) 時重新 list。
+
+    get() 回傳的是快取中的物件本身，呼叫端不可修改。
+    """
+
+    def __init__(
+        self,
+        api: AsyncK8sApi,
+        group: str,
+        version: str,
+        namespace: str,
+        plural: str,
+        name: str,
+        *,
+        max_staleness: float = 30.0,
+        watch_timeout: int = 300,
+        retry_interval: float = 1.0,
+    ):
+        self.api = api
+        self.group = group
+        self.version = version
+        self.namespace = namespace
+        self.plural = plural
+        self.name = name
+        self.max_staleness = max_staleness
+        self.watch_timeout = watch_timeout
+        self.retry_interval = retry_interval
+        self.object: Optional[Dict[str, Any]] = None
+        self.resource_version: Optional[str] = None
+        self._synced_at: Optional[float] = None
+        self._watching = False
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def fresh(self) -> bool:
+        if self._synced_at is None or self._loop is None:
+            return False
+        return self._watching or self._loop.time() - self._synced_at <= self.max_staleness
+
+    @property
+    def watching(self) -> bool:
+        """watch 連線存活中，快取內容會即時跟上 API"""
+        return self._watching
+
+    def observe(self, obj: Dict[str, Any]) -> None:
+        """以寫入 API 的回應更新快取，不必等 watch 送來同一個版本"""
+        if self.object is not None and _older(obj, self.object):
+            return
+        self.object = obj
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """回傳快取的物件 (不存在時為 None)，過期時先重新 list"""
+        self._ensure_running()
+        if self.fresh:
+            _READS.labels(self.plural, "hit").inc()
+        else:
+            _READS.labels(self.plural, "relist").inc()
+            await self._relist()
+        return self.object
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 新的 event loop：舊的 task 與同步狀態都不再有效
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._task = None
+            self._synced_at = None
+            self._watching = False
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name=f"informer-{self.plural}/{self.name}")
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._watching = False
+
+    async def _relist(self, force: bool = False) -> None:
+        async with self._lock:
+            if self.fresh and not force:
+                # 等待鎖的期間已由其他呼叫者或 watch 更新
+                return
+            response = await self.api.request(
+                "GET",
+                self.api.custom_object_path(self.group, self.version, self.namespace, self.plural),
+                params={"fieldSelector": f"metadata.name={self.name}"},
+            )
+            items = response.get("items", [])
+            self.object = items[0] if items else None
+            self.resource_version = response.get("metadata", {}).get("resourceVersion")
+            self._synced_at = self._loop.time()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self.resource_version is None or not self.fresh:
+                    # 首次同步可能已由 get() 完成；之後 (錯誤、過期) 一律重新 list
+                    await self._relist(force=self.resource_version is None and self._synced_at is not None)
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except _WatchExpired:
+                logger.info(f"watch {self.namespace}/{self.name} 版本已過期，重新 list")
+                self.resource_version = None
+            except Exception as e:
+                logger.warning(f"watch {self.namespace}/{self.name} 失敗: {e}")
+                self.resource_version = None
+                await asyncio.sleep(self.retry_interval)
+
+    async def _watch(self) -> None:
+        params = {
+            "watch": True,
+            "fieldSelector": f"metadata.name={self.name}",
+            "resourceVersion": self.resource_version,
+            "timeoutSeconds": self.watch_timeout,
+            "allowWatchBookmarks": True,
+        }
+        path = self.api.custom_object_path(self.group, self.version, self.namespace, self.plural)
+        self._watching = True
+        try:
+            async for event in self.api.stream(path, params=params, timeout=self.watch_timeout + 30):
+                kind = event.get("type")
+                obj = event.get("object") or {}
+                if kind == "ERROR":
+                    if obj.get("code") == 410:
+                        raise _WatchExpired()
+                    raise ApiException(status=obj.get("code"), reason=obj.get("message") or obj.get("reason"))
+                if kind in ("ADDED", "MODIFIED"):
+                    self.object = obj
+                elif kind == "DELETED":
+                    self.object = None
+                version = obj.get("metadata", {}).get("resourceVersion")
+                if version:
+                    self.resource_version = version
+                self._synced_at = self._loop.time()
+        except ApiException as e:
+            if e.status == 410:
+                raise _WatchExpired() from e
+            raise
+        finally:
+            self._watching = False
+        # 伺服器端 timeoutSeconds 到期：至此為止的內容仍是最新
+        self._synced_at = self._loop.time()
+
+
+def _older(obj: Dict[str, Any], than: Dict[str, Any]) -> bool:
+    """obj 的 resourceVersion 是否早於 than (無法比較時視為較新)"""
+    version = obj.get("metadata", {}).get("resourceVersion")
+    current = than.get("metadata", {}).get("resourceVersion")
+    try:
+        return int(version) < int(current)
+    except (TypeError, ValueError):
+        return False
+
+
+class CustomResourceCache:
+    """依 (group, version, namespace, plural, name) 管理 CustomResourceInformer
+
+    第一次讀取某個物件時才建立並啟動對應的 informer。
+    """
+
+    def __init__(self, api: Optional[AsyncK8sApi] = None, *, max_staleness: float = 30.0, watch_timeout: int = 300):
+        self.api = api or shared_k8s_api()
+        self.max_staleness = max_staleness
+        self.watch_timeout = watch_timeout
+        self._informers: Dict[ObjectKey, CustomResourceInformer] = {}
+
+    def informer(self, group: str, version: str, namespace: str, plural: str, name: str) -> CustomResourceInformer:
+        key = (group, version, namespace, plural, name)
+        informer = self._informers.get(key)
+        if informer is None:
+            informer = CustomResourceInformer(
+                self.api, group, version, namespace, plural, name,
+                max_staleness=self.max_staleness,
+                watch_timeout=self.watch_timeout,
+            )
+            self._informers[key] = informer
+        return informer
+
+    async def get(self, group: str, version: str, namespace: str, plural: str, name: str) -> Optional[Dict[str, Any]]:
+        return await self.informer(group, version, namespace, plural, name).get()
+
+    def observe(self, group: str, version: str, namespace: str, plural: str, obj: Dict[str, Any]) -> None:
+        """將寫入後的物件交給對應 informer (尚未讀取過的物件不建立 informer)"""
+        informer = self._informers.get((group, version, namespace, plural, obj.get("metadata", {}).get("name")))
+        if informer is not None:
+            informer.observe(obj)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(informer.stop() for informer in self._informers.values()))
+
+
+_shared_cache: Optional[CustomResourceCache] = None
+
+
+def shared_resource_cache() -> Optional[CustomResourceCache]:
+    """回傳行程內共用的 CustomResourceCache，未設定時為 None (直接讀取 API)"""
+    return _shared_cache
+
+
+def configure_shared_resource_cache(cache: Optional[CustomResourceCache]) -> Optional[CustomResourceCache]:
+    """設定共用的 CustomResourceCache (需在建立使用它的客戶端之前呼叫)"""
+    global _shared_cache
+    _shared_cache = cache
+    return cache
@@ -1,36 +1,40 @@
-import asyncio
-from typing import Dict, Any
-from kubernetes import client, config
+from typing import Dict, Any, Optional
 from kubernetes.client.rest import ApiException
-from kubernetes.config.config_exception import ConfigException
+
+from utils.tracing import traced
+from .k8s_api import AsyncK8sApi, shared_k8s_api
+from .k8s_informer import CustomResourceCache, shared_resource_cache
 
 
 class K8sSubscriptionClient:
-    """專門處理 Kubernetes 訂閱資訊的客戶端"""
+    """專門處理 Kubernetes 訂閱資訊的客戶端
 
-    def __init__(self) -> None:
-        try:
-            config.load_incluster_config()
-        except ConfigException:
-            try:
-                config.load_kube_config()
-            except ConfigException:
-                self.custom_api = None
-                return
-        self.custom_api = client.CustomObjectsApi()
+    設定了 informer 快取 (cache 或行程內共用的快取) 時，訂閱資訊由記憶體提供。
+    """
 
+    def __init__(
+        self,
+        api: Optional[AsyncK8sApi] = None,
+        namespace: str = "arha-system",
+        cache: Optional[CustomResourceCache] = None,
+    ) -> None:
+        self.api = api or shared_k8s_api()
+        self.namespace = namespace
+        self.cache = cache or shared_resource_cache()
+
+    @traced("k8s.get_subscription_info")
     async def get_subscription_info(self) -> Dict[str, Any]:
         """獲取訂閱資訊"""
-        if not self.custom_api:
-            return {}
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.custom_api.get_namespaced_custom_object,
+            if self.cache is not None:
+                response = await self.cache.get(
+                    "ha.example.com", "v1", self.namespace, "subscriptions", "subscription-info"
+                )
+                return (response or {}).get("spec", {})
+            response = await self.api.get_namespaced_custom_object(
                 "ha.example.com",
                 "v1",
-                "arha-system",
+                self.namespace,
                 "subscriptions",
                 "subscription-info",
             )
@@ -0,0 +1,261 @@
+"""Streaming latency detector that turns agent samples into HIGH_LATENCY events.
+
+Agents (or a sidecar) write one sample per line, ``<node> <service>
+<latency_ms>``, to a Unix socket or to a file the detector tails.  Samples
+are counted into a :class:`SlidingLatencySketch`: per ``(node, service)``,
+a ring of log-bucketed histograms, one per slot of the window, so memory is
+fixed by the window and bucket layout rather than by the sample rate.
+Parsing and counting are done a chunk at a time with NumPy.
+
+Every slot the detector reads each key's windowed percentile; a key whose
+percentile stays at or above the threshold for ``sustain`` seconds emits an
+``Event(type="HIGH_LATENCY")``, repeated every ``sustain`` seconds while the
+breach lasts.
+"""
+
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from domain import Event
+from utils.metrics import REGISTRY
+from .sample_stream import Emit, SampleStreamDetector
+
+logger = logging.getLogger(__name__)
+
+_SAMPLES = REGISTRY.counter("event_handler_latency_samples_total", "Latency samples ingested by the detector")
+_MALFORMED = REGISTRY.counter("event_handler_latency_malformed_total", "Latency sample lines that could not be parsed")
+_BREACHES = REGISTRY.counter(
+    "event_handler_latency_breaches_total", "HIGH_LATENCY events emitted by the detector", ["node", "service"]
+)
+
+
+class SlidingLatencySketch:
+    """Windowed log-bucketed latency histograms for many keys at once.
+
+    The window is split into ``slots`` slots of ``window / slots`` seconds;
+    advancing the clock clears the slots that fell out of the window and
+    subtracts them from the running totals.  Bucket bounds grow by
+    ``growth``, so percentiles have a relative error of about
+    ``(growth - 1) / 2``.  Latencies are in milliseconds.
+    """
+
+    def __init__(
+        self,
+        window: float = 10.0,
+        slots: int = 10,
+        min_ms: float = 0.1,
+        max_ms: float = 60_000.0,
+        growth: float = 1.05,
+    ) -> None:
+        if slots < 1 or window <= 0:
+            raise ValueError("window and slots must be positive")
+        self.window = window
+        self.slots = slots
+        self.slot_seconds = window / slots
+        self.min_ms = min_ms
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.buckets = int(math.ceil(math.log(max_ms / min_ms) / self._log_growth)) + 2
+        self.keys: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+        self._counts = np.zeros((slots, 0, self.buckets), dtype=np.int64)
+        self._totals = np.zeros((0, self.buckets), dtype=np.int64)
+        self._slot: Optional[int] = None
+
+    def key_index(self, key: Hashable) -> int:
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.keys)
+            self.keys.append(key)
+            if index >= self._totals.shape[0]:
+                grow = max(8, self._totals.shape[0])
+                self._counts = np.concatenate(
+                    [self._counts, np.zeros((self.slots, grow, self.buckets), dtype=np.int64)], axis=1
+                )
+                self._totals = np.concatenate([self._totals, np.zeros((grow, self.buckets), dtype=np.int64)])
+        return index
+
+    def advance(self, now: float) -> None:
+        """Move the window to ``now``, dropping the slots that left it."""
+        slot = int(now // self.slot_seconds)
+        if self._slot is None:
+            self._slot = slot
+            return
+        expired = min(slot - self._slot, self.slots)
+        for step in range(1, expired + 1):
+            position = (self._slot + step) % self.slots
+            self._totals -= self._counts[position]
+            self._counts[position] = 0
+        if slot > self._slot:
+            self._slot = slot
+
+    def add(self, keys: np.ndarray, latencies_ms: np.ndarray, now: float) -> None:
+        """Count samples; ``keys`` holds :meth:`key_index` ids."""
+        self.advance(now)
+        if not len(keys):
+            return
+        ratio = np.maximum(latencies_ms, self.min_ms) / self.min_ms
+        buckets = np.minimum(np.log(ratio) / self._log_growth + 1, self.buckets - 1).astype(np.intp)
+        buckets[latencies_ms <= self.min_ms] = 0
+        width = self._totals.shape[0] * self.buckets
+        counts = np.bincount(keys * self.buckets + buckets, minlength=width).reshape(-1, self.buckets)
+        self._counts[self._slot % self.slots] += counts
+        self._totals += counts
+
+    def counts(self) -> np.ndarray:
+        """Samples in the window per key."""
+        return self._totals[: len(self.keys)].sum(axis=1)
+
+    def percentiles(self, percentile: float) -> np.ndarray:
+        """Windowed percentile (0-100) per key in ms; NaN for keys without samples."""
+        totals = self._totals[: len(self.keys)]
+        cumulative = np.cumsum(totals, axis=1)
+        count = cumulative[:, -1] if len(self.keys) else np.zeros(0, dtype=np.int64)
+        rank = np.maximum(1, np.ceil(percentile / 100.0 * count))
+        index = (cumulative < rank[:, None]).sum(axis=1)
+        # geometric midpoint of the bucket, as LatencyHistogram does
+        value = self.min_ms * self.growth ** (index - 0.5)
+        value[index == 0] = self.min_ms
+        value[count == 0] = np.nan
+        return value
+
+
+class LatencyDetector(SampleStreamDetector):
+    """Emit ``HIGH_LATENCY`` when a node/service percentile stays above a threshold.
+
+    ``emit`` receives each event, e.g. ``EventIngestionPipeline.submit``.  A
+    key must have ``min_samples`` samples in the window before it can breach.
+    Event payloads carry ``node``, ``service``, ``latency_ms`` (the windowed
+    percentile), ``percentile``, ``samples`` and ``window``, which is what
+    :class:`HighLatencyHandler` reads.  Keys are evaluated once per slot.
+    """
+
+    def __init__(
+        self,
+        emit: Emit,
+        threshold_ms: float = 200.0,
+        percentile: float = 99.0,
+        sustain: float = 5.0,
+        window: float = 10.0,
+        slots: int = 10,
+        min_samples: int = 100,
+        clock: Callable[[], float] = time.monotonic,
+        source: str = "latency-detector",
+    ) -> None:
+        super().__init__()
+        self.emit = emit
+        self.threshold_ms = threshold_ms
+        self.percentile = percentile
+        self.sustain = sustain
+        self.min_samples = min_samples
+        self.clock = clock
+        self.source = source
+        self.sketch = SlidingLatencySketch(window, slots)
+        self.evaluate_interval = self.sketch.slot_seconds
+        # (node, service) as raw bytes -> sketch key id, so parsing skips decoding
+        self._byte_keys: Dict[Tuple[bytes, bytes], int] = {}
+        self._breach_since: Dict[int, float] = {}
+        self._emitted_at: Dict[int, float] = {}
+
+    def record(self, node: str, service: str, latency_ms: float) -> None:
+        if not math.isfinite(latency_ms):
+            _MALFORMED.inc()
+            return
+        key = self.sketch.key_index((node, service))
+        self.sketch.add(np.array([key], dtype=np.intp), np.array([latency_ms], dtype=float), self.clock())
+        _SAMPLES.inc()
+
+    def feed(self, data: bytes) -> int:
+        """Count the complete ``<node> <service> <latency_ms>`` lines in ``data``; return the sample count."""
+        rows = list(map(bytes.split, data.splitlines()))
+        try:
+            # every line must have exactly three fields, or fields shift into the wrong keys
+            if set(map(len, rows)) != {3}:
+                raise ValueError("uneven lines")
+            nodes, services, values = zip(*rows)
+            latencies = np.array(list(map(float, values)), dtype=float)
+            pairs: Sequence[Tuple[bytes, bytes]] = list(zip(nodes, services))
+        except ValueError:
+            pairs, latencies = self._parse_lines(data)
+        finite = np.isfinite(latencies)
+        if not finite.all():
+            # nan/inf parse as floats but cannot be bucketed
+            _MALFORMED.inc(int((~finite).sum()))
+            pairs = [pair for pair, keep in zip(pairs, finite.tolist()) if keep]
+            latencies = latencies[finite]
+        keys = self._key_ids(pairs)
+        self.sketch.add(keys, latencies, self.clock())
+        _SAMPLES.inc(len(keys))
+        return len(keys)
+
+    def _parse_lines(self, data: bytes) -> Tuple[List[Tuple[bytes, bytes]], np.ndarray]:
+        pairs: List[Tuple[bytes, bytes]] = []
+        latencies: List[float] = []
+        for line in data.splitlines():
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                latency = float(parts[2])
+            except (IndexError, ValueError):
+                _MALFORMED.inc()
+                continue
+            pairs.append((parts[0], parts[1]))
+            latencies.append(latency)
+        return pairs, np.array(latencies, dtype=float)
+
+    def _key_ids(self, pairs: Sequence[Tuple[bytes, bytes]]) -> np.ndarray:
+        lookup = self._byte_keys.get
+        ids = [lookup(pair, -1) for pair in pairs]
+        if -1 in ids:
+            for position, pair in enumerate(pairs):
+                if ids[position] == -1:
+                    key = self._byte_keys.get(pair)
+                    if key is None:
+                        key = self.sketch.key_index((pair[0].decode(), pair[1].decode()))
+                        self._byte_keys[pair] = key
+                    ids[position] = key
+        return np.array(ids, dtype=np.intp)
+
+    async def evaluate(self) -> List[Event]:
+        """Check every key once and emit the sustained breaches."""
+        now = self.clock()
+        self.sketch.advance(now)
+        values = self.sketch.percentiles(self.percentile)
+        counts = self.sketch.counts()
+        breached = (values >= self.threshold_ms) & (counts >= self.min_samples)
+        events: List[Event] = []
+        for key in range(len(values)):
+            if not breached[key]:
+                self._breach_since.pop(key, None)
+                self._emitted_at.pop(key, None)
+                continue
+            since = self._breach_since.setdefault(key, now)
+            last = self._emitted_at.get(key)
+            if now - since < self.sustain or (last is not None and now - last < self.sustain):
+                continue
+            self._emitted_at[key] = now
+            node, service = self.sketch.keys[key]
+            events.append(Event(
+                type="HIGH_LATENCY",
+                payload={
+                    "node": node,
+                    "service": service,
+                    "latency_ms": round(float(values[key]), 3),
+                    "percentile": self.percentile,
+                    "samples": int(counts[key]),
+                    "window": self.sketch.window,
+                },
+                timestamp=datetime.utcnow(),
+                source=self.source,
+            ))
+        for event in events:
+            _BREACHES.labels(event.payload["node"], event.payload["service"]).inc()
+            logger.warning("Sustained high latency: %s", event.payload)
+            await self.emit(event)
+        return events
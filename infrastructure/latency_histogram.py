@@ -0,0 +1,106 @@
+import math
+from array import array
+from typing import Iterable, Optional
+
+
+class LatencyHistogram:
+    """對數分桶、以 array 儲存的延遲直方圖 (單位: 秒)
+
+    桶的上下界呈等比數列，相對誤差約為 (growth - 1) / 2。
+    相同參數的直方圖可直接合併，適合彙整多個 agent/服務的結果。
+    """
+
+    __slots__ = ("min_value", "max_value", "growth", "_log_growth", "_counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self, min_value: float = 1e-5, max_value: float = 60.0, growth: float = 1.02):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        buckets = int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 2
+        self._counts = array("Q", bytes(8 * buckets))
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = int(math.log(value / self.min_value) / self._log_growth) + 1
+        last = len(self._counts) - 1
+        return index if index < last else last
+
+    def record(self, value: float, count: int = 1) -> None:
+        self._counts[self._index(value)] += count
+        self.count += count
+        self.total += value * count
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def record_many(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.record(value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """將 other 的計數加入本直方圖，回傳 self"""
+        if (other.min_value, other.max_value, other.growth) != (self.min_value, self.max_value, self.growth):
+            raise ValueError("只能合併相同分桶參數的直方圖")
+        counts = self._counts
+        for index, value in enumerate(other._counts):
+            if value:
+                counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def copy(self) -> "LatencyHistogram":
+        clone = LatencyHistogram(self.min_value, self.max_value, self.growth)
+        return clone.merge(self)
+
+    def clear(self) -> None:
+        for index in range(len(self._counts)):
+            self._counts[index] = 0
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """回傳百分位數 (0-100)，無資料時回傳 None"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100.0 * self.count))
+        seen = 0
+        for index, value in enumerate(self._counts):
+            seen += value
+            if seen >= rank:
+                return min(max(self._bucket_value(index), self.minimum), self.maximum)
+        return self.maximum
+
+    def _bucket_value(self, index: int) -> float:
+        if index == 0:
+            return self.min_value
+        lower = self.min_value * self.growth ** (index - 1)
+        # 取桶內幾何中點作為代表值
+        return lower * math.sqrt(self.growth)
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    @property
+    def p99(self) -> Optional[float]:
+        return self.percentile(99)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class LoadTestConfig:
@@ -8,4 +9,28 @@ class LoadTestConfig:
     frequency_step: int = 10
     success_threshold: float = 0.8
     agent_success_threshold: float = 0.9
-    recovery_time: int = 2
\ No newline at end of file
+    recovery_time: int = 2
+    # 頻率搜尋模式: "linear" 逐步遞增, "exponential" 指數擴張後二分搜尋
+    search_mode: str = "linear"
+    growth_factor: float = 2.0
+    search_resolution: int = 10
+    # 閒置探測: 從目前紀錄的吞吐量往上最多探測幾步 (每步 frequency_step)
+    idle_probe_steps: int = 3
+    # 單一頻率測試的最長時間(秒)
+    max_test_duration: float = 10
+    # 判定模式: "fixed" 跑滿 max_test_duration, "sequential" 以 SPRT 提前停止
+    verdict_mode: str = "fixed"
+    verdict_confidence: float = 0.95
+    # sequential 模式下，判定通過前至少需測試的時間(秒)；判定失敗不受限制
+    min_test_duration: float = 2
+    # 請求節奏: "closed" 回應後才等待下一個間隔, "open" 依絕對時間表發送
+    pacing_mode: str = "closed"
+    max_in_flight: int = 1000
+    # 延遲 SLO (毫秒)，設定後 agent 的指定百分位延遲也必須低於此值才算通過
+    latency_slo_ms: Optional[float] = None
+    latency_slo_percentile: float = 99.0
+    # 負載驅動: "simulated" 模擬請求, "http" 對 agent 發送真實 HTTP 請求
+    load_driver: str = "simulated"
+    request_path: str = "/"
+    request_timeout: float = 2.0
+    max_connections_per_agent: int = 64
@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .latency_histogram import LatencyHistogram
+
+
+@dataclass
+class AgentLoadResult:
+    """單一 agent 在一次頻率測試中的結果"""
+    agent: Dict
+    target_rate: float
+    elapsed: float = 0.0
+    sent: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    dropped: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    passed: bool = False
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def errors(self) -> int:
+        """失敗與被丟棄的請求總數"""
+        return self.failed + self.dropped
+
+    @property
+    def success_rate(self) -> float:
+        total = self.completed + self.dropped
+        return self.succeeded / total if total else 0.0
+
+    @property
+    def achieved_rate(self) -> float:
+        """實際完成的請求速率 (請求/秒)"""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency.mean
+
+    @property
+    def max_latency(self) -> float:
+        return self.latency.maximum
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.latency.p50
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.latency.p95
+
+    @property
+    def p99(self) -> Optional[float]:
+        return self.latency.p99
+
+    def record(self, success: bool, latency: float) -> None:
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.latency.record(latency)
+
+
+@dataclass
+class FrequencyProbeResult:
+    """一次頻率測試 (所有 agents) 的結果"""
+    frequency: int
+    passed: bool
+    agents: List[AgentLoadResult] = field(default_factory=list)
+
+    @property
+    def achieved_rate(self) -> float:
+        """各 agent 實際達成速率的平均值"""
+        if not self.agents:
+            return 0.0
+        return sum(result.achieved_rate for result in self.agents) / len(self.agents)
+
+    @property
+    def sustained_frequency(self) -> int:
+        """實際可持續的頻率，不超過目標頻率"""
+        if not self.agents:
+            return self.frequency
+        return min(self.frequency, round(self.achieved_rate))
+
+    @property
+    def errors(self) -> int:
+        return sum(result.errors for result in self.agents)
+
+    @property
+    def latency(self) -> LatencyHistogram:
+        """合併所有 agent 的延遲直方圖"""
+        merged = LatencyHistogram()
+        for result in self.agents:
+            merged.merge(result.latency)
+        return merged
+
+    def service_latency(self) -> Dict[str, LatencyHistogram]:
+        """依 serviceType 合併的延遲直方圖"""
+        merged: Dict[str, LatencyHistogram] = {}
+        for result in self.agents:
+            service = result.agent.get("serviceType", "unknown")
+            merged.setdefault(service, LatencyHistogram()).merge(result.latency)
+        return merged
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        latency = self.latency
+        return {
+            "frequency": self.frequency,
+            "achieved_rate": self.achieved_rate,
+            "errors": self.errors,
+            "p50": latency.p50,
+            "p95": latency.p95,
+            "p99": latency.p99,
+        }
@@ -0,0 +1,43 @@
+"""HTTP endpoint exposing the metrics registry for Prometheus scraping."""
+
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from utils.metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Serve ``registry.render()`` at ``/metrics`` from the running event loop."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "0.0.0.0", port: int = 9100) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # resolve the bound port when started with port 0
+        self.port = self._runner.addresses[0][1]
+        logger.info("Serving metrics on %s:%s/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,101 @@
+"""Span exporter posting OTLP/HTTP JSON to a collector."""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from utils.tracing import Span, SpanExporter
+
+logger = logging.getLogger(__name__)
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def to_otlp(spans: List[Span], service_name: str = "event-handler") -> Dict[str, Any]:
+    """Encode spans as an OTLP ``ExportTraceServiceRequest`` in JSON form."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "event_handler"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_id or "",
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+                        # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+                        "status": {"code": 2 if span.status == "error" else 1},
+                    }
+                    for span in spans
+                ],
+            }],
+        }]
+    }
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Batch finished spans and POST them to ``endpoint`` (e.g. ``http://collector:4318/v1/traces``).
+
+    Spans are buffered and sent by a background task ``flush_interval``
+    seconds after the first span of a batch; export failures are logged and
+    the batch is dropped.
+    """
+
+    def __init__(self, endpoint: str, flush_interval: float = 1.0, service_name: str = "event-handler") -> None:
+        self.endpoint = endpoint
+        self.flush_interval = flush_interval
+        self.service_name = service_name
+        self._pending: List[Span] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def export(self, span: Span) -> None:
+        self._pending.append(span)
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                # no loop: keep the span for the next flush
+                pass
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        try:
+            async with self._session.post(self.endpoint, json=to_otlp(batch, self.service_name)) as response:
+                if response.status >= 300:
+                    logger.warning("Span export rejected with HTTP %s", response.status)
+        except aiohttp.ClientError as exc:
+            logger.warning("Span export to %s failed: %s", self.endpoint, exc)
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
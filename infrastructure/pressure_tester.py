@@ -1,55 +1,167 @@
-import asyncio
-from typing import List, Dict
+import time
+from typing import Dict, Iterable, List, Optional
 from domain.services import PressureTester
+from utils.metrics import REGISTRY
+from utils.tracing import traced
 from .k8s_subscription_client import K8sSubscriptionClient
 from .frequency_test_executor import FrequencyTestExecutor
+from .http_dispatcher import agent_id
+from .frequency_search import FrequencySearchStrategy, create_search_strategy
 from .load_test_config import LoadTestConfig
+from .load_test_result import FrequencyProbeResult
+
+_LOAD_TESTS = REGISTRY.counter("event_handler_load_tests_total", "Load tests run")
+_LOAD_TEST_SECONDS = REGISTRY.histogram("event_handler_load_test_seconds", "Load test duration")
+_CAPACITY_PROBES = REGISTRY.counter(
+    "event_handler_capacity_probes_total", "Bounded upward probes by outcome (raised, unchanged)", ["result"]
+)
+_LOAD_TEST_PROBES = REGISTRY.histogram(
+    "event_handler_load_test_probes", "Probes per load test", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
 
 class SimplePressureTester(PressureTester):
     """壓力測試器 - 專注於測試流程編排"""
 
-    def __init__(self, config: LoadTestConfig = None):
-        self.k8s_client = K8sSubscriptionClient()
-        self.test_executor = FrequencyTestExecutor()
+    def __init__(
+        self,
+        config: LoadTestConfig = None,
+        search_strategy: FrequencySearchStrategy = None,
+        test_executor: FrequencyTestExecutor = None,
+        k8s_client: K8sSubscriptionClient = None,
+    ):
+        self.k8s_client = k8s_client or K8sSubscriptionClient()
         self.config = config or LoadTestConfig()
+        self.test_executor = test_executor or FrequencyTestExecutor(config=self.config)
+        self.search_strategy = search_strategy or create_search_strategy(self.config.search_mode)
 
-    async def load_test(self, deployment_hash: str) -> int:
-        """執行負載測試"""
+    @traced("load_test")
+    async def load_test(self, deployment_hash: str, node: Optional[str] = None) -> int:
+        """執行負載測試；指定 node 時只對該節點的 agents 施壓"""
         # 獲取 agents
         subscription_data = await self.k8s_client.get_subscription_info()
         if not subscription_data:
             return 100
 
         agents = subscription_data.get('raw', [])
+        if node is not None:
+            agents = _select_agents(agents, node, None, None)
         if not agents:
             return 100
 
         # 執行測試
-        return await self._execute_load_test(agents, deployment_hash)
+        _LOAD_TESTS.inc()
+        started = time.perf_counter()
+        try:
+            return await self._execute_load_test(agents, deployment_hash)
+        finally:
+            _LOAD_TEST_SECONDS.observe(time.perf_counter() - started)
+            await self.test_executor.close()
     
+    @traced("probe_capacity")
+    async def probe_capacity(
+        self,
+        deployment_hash: str,
+        start_frequency: int,
+        node: Optional[str] = None,
+        agents: Optional[Iterable[str]] = None,
+        services: Optional[Iterable[str]] = None,
+    ) -> Optional[int]:
+        """從目前紀錄的吞吐量往上探測，最多 idle_probe_steps 步
+
+        只對 node 上 (且在 agents、services 之中) 的 agents 施壓；在第一個失敗的頻率停止，
+        回傳最高通過頻率的實際持續頻率，未高於 start_frequency 則回傳 None。
+        """
+        subscription_data = await self.k8s_client.get_subscription_info()
+        targets = _select_agents(
+            subscription_data.get('raw', []) if subscription_data else [], node, agents, services
+        )
+        if not targets:
+            return None
+
+        _LOAD_TESTS.inc()
+        started = time.perf_counter()
+        best: Optional[FrequencyProbeResult] = None
+        try:
+            frequency = start_frequency
+            for step in range(self.config.idle_probe_steps):
+                frequency = min(frequency + self.config.frequency_step, self.config.max_frequency)
+                if frequency <= start_frequency or (best and frequency <= best.frequency):
+                    break
+                if step:
+                    await self.test_executor.recover(self.config.recovery_time)
+                print(f"閒置探測頻率: {frequency} 請求/秒 ({len(targets)} 個 agents)")
+                result = await self.test_executor.run_probe(targets, frequency, deployment_hash)
+                if not result.passed:
+                    print(f"✗ 頻率 {frequency} 測試失敗")
+                    break
+                print(f"✓ 頻率 {frequency} 測試成功")
+                best = result
+        finally:
+            _LOAD_TEST_SECONDS.observe(time.perf_counter() - started)
+            await self.test_executor.close()
+
+        sustained = self._recorded_frequency(best) if best else None
+        if sustained is None or sustained <= start_frequency:
+            _CAPACITY_PROBES.labels("unchanged").inc()
+            return None
+        _CAPACITY_PROBES.labels("raised").inc()
+        return sustained
+
     async def _execute_load_test(self, agents: List[Dict], deployment_hash: str) -> int:
         """執行測試流程"""
-        current_frequency = self.config.initial_frequency
-        max_successful_frequency = 0
-        
-        print(f"開始對 {len(agents)} 個 agents 進行壓力測試...")
-        
-        while current_frequency <= self.config.max_frequency:
-            print(f"測試頻率: {current_frequency} 請求/秒")
-            
-            success = await self.test_executor.test_frequency(
-                agents, current_frequency, deployment_hash
+        probes: Dict[int, FrequencyProbeResult] = {}
+
+        async def probe(frequency: int) -> bool:
+            if probes:
+                await self.test_executor.recover(self.config.recovery_time)
+
+            print(f"測試頻率: {frequency} 請求/秒")
+            result = await self.test_executor.run_probe(
+                agents, frequency, deployment_hash
             )
-            
-            if success:
-                max_successful_frequency = current_frequency
-                print(f"✓ 頻率 {current_frequency} 測試成功")
-                current_frequency += self.config.frequency_step
+            probes[frequency] = result
+            if result.passed:
+                print(f"✓ 頻率 {frequency} 測試成功")
             else:
-                print(f"✗ 頻率 {current_frequency} 測試失敗，停止測試")
-                break
-                
-            await asyncio.sleep(self.config.recovery_time)
-        
-        print(f"壓力測試完成，最大成功頻率: {max_successful_frequency} 請求/秒")
-        return max_successful_frequency
+                print(f"✗ 頻率 {frequency} 測試失敗")
+            return result.passed
+
+        print(f"開始對 {len(agents)} 個 agents 進行壓力測試...")
+
+        result = await self.search_strategy.search(probe, self.config)
+        _LOAD_TEST_PROBES.observe(result.probes)
+
+        best = probes.get(result.max_successful_frequency)
+        sustained = self._recorded_frequency(best) if best else result.max_successful_frequency
+        print(
+            f"壓力測試完成，最大成功頻率: {result.max_successful_frequency} 請求/秒 "
+            f"(實際持續 {sustained} 請求/秒)，共探測 {result.probes} 次"
+        )
+        return sustained
+
+
+    def _recorded_frequency(self, result: FrequencyProbeResult) -> int:
+        """要記錄的頻率：open pacing 依排程送出，記錄實際達成的頻率；
+        closed pacing 的實際速率受回應延遲拖慢，必然低於目標，因此記錄通過的目標頻率"""
+        if self.config.pacing_mode == "open":
+            return result.sustained_frequency
+        return result.frequency
+
+
+def _select_agents(
+    entries: List[Dict],
+    node: Optional[str],
+    agents: Optional[Iterable[str]],
+    services: Optional[Iterable[str]],
+) -> List[Dict]:
+    """篩選 node 上、且 agent 識別與服務分別在 agents、services 之中的 subscription-info 項目"""
+    wanted = None if agents is None else set(agents)
+    service_types = None if services is None else set(services)
+    return [
+        entry for entry in entries
+        if entry.get('agentIP') and entry.get('agentPort')
+        and (node is None or entry.get('nodeName') == node)
+        and (wanted is None or agent_id(entry) in wanted)
+        and (service_types is None or entry.get('serviceType') in service_types)
+    ]
@@ -0,0 +1,141 @@
+"""Line-oriented telemetry sources shared by the streaming detectors.
+
+A detector subclasses :class:`SampleStreamDetector`, implementing ``feed``
+(count the complete lines of one chunk) and ``evaluate`` (emit events from
+what was counted).  The base class reads the lines from Unix sockets or
+tailed files and calls ``evaluate`` every ``evaluate_interval`` seconds.
+"""
+
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List
+
+from domain import Event
+
+logger = logging.getLogger(__name__)
+
+Emit = Callable[[Event], Awaitable[None]]
+
+
+class SampleStreamDetector(ABC):
+    """Feed newline-terminated samples to ``feed`` and ``evaluate`` periodically."""
+
+    evaluate_interval: float = 1.0
+
+    def __init__(self) -> None:
+        self._tasks: List[asyncio.Task] = []
+        self._servers: List[asyncio.AbstractServer] = []
+
+    @abstractmethod
+    def feed(self, data: bytes) -> int:
+        """Count the complete lines in ``data``; return the sample count."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def evaluate(self) -> List[Event]:
+        """Emit and return the events due now."""
+        raise NotImplementedError
+
+    async def consume(self, reader: asyncio.StreamReader, chunk_size: int = 1 << 16) -> None:
+        """Feed samples from ``reader`` until EOF; partial lines wait for the next chunk."""
+        pending = b""
+        while True:
+            chunk = await reader.read(chunk_size)
+            if not chunk:
+                break
+            data = pending + chunk
+            end = data.rfind(b"\n") + 1
+            pending = data[end:]
+            if end:
+                self._feed(data[:end])
+        if pending.strip():
+            self._feed(pending)
+
+    async def start(self) -> None:
+        """Start calling ``evaluate`` every ``evaluate_interval`` seconds."""
+        if not any(task.get_name() == "detector-evaluate" for task in self._tasks):
+            self._tasks.append(asyncio.create_task(self._evaluate_loop(), name="detector-evaluate"))
+
+    async def serve_unix(self, path: str) -> None:
+        """Accept sample streams on a Unix socket at ``path``."""
+        await self.start()
+
+        async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await self.consume(reader)
+            finally:
+                writer.close()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self._servers.append(await asyncio.start_unix_server(on_connection, path))
+        logger.info("%s listening on %s", type(self).__name__, path)
+
+    async def tail(self, path: str, poll_interval: float = 0.2, from_start: bool = False) -> None:
+        """Follow ``path`` like ``tail -F``; a truncated or replaced file is read from the start."""
+        await self.start()
+        self._tasks.append(asyncio.create_task(self._tail(path, poll_interval, from_start), name="detector-tail"))
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _feed(self, data: bytes) -> None:
+        # one bad chunk must not end the stream it came from
+        try:
+            self.feed(data)
+        except Exception:
+            logger.exception("%s failed to count %d bytes of samples", type(self).__name__, len(data))
+
+    async def _evaluate_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.evaluate_interval)
+            try:
+                await self.evaluate()
+            except Exception:
+                logger.exception("%s evaluation failed", type(self).__name__)
+
+    async def _tail(self, path: str, poll_interval: float, from_start: bool) -> None:
+        handle = None
+        pending = b""
+        try:
+            while True:
+                if handle is None:
+                    try:
+                        handle = open(path, "rb")
+                    except FileNotFoundError:
+                        await asyncio.sleep(poll_interval)
+                        continue
+                    if not from_start:
+                        handle.seek(0, os.SEEK_END)
+                    from_start = True
+                    pending = b""
+                chunk = handle.read(1 << 16)
+                if chunk:
+                    data = pending + chunk
+                    end = data.rfind(b"\n") + 1
+                    pending = data[end:]
+                    if end:
+                        self._feed(data[:end])
+                    # a long backlog must not starve evaluate() and the other streams
+                    await asyncio.sleep(0)
+                    continue
+                await asyncio.sleep(poll_interval)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_ino != os.fstat(handle.fileno()).st_ino or stat.st_size < handle.tell():
+                    handle.close()
+                    handle = None
+        finally:
+            if handle is not None:
+                handle.close()
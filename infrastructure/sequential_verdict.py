@@ -0,0 +1,90 @@
+import math
+from typing import Dict, Hashable, Optional
+
+
+class SequentialProbabilityRatioTest:
+    """單一 agent 成功率的序貫機率比檢定 (SPRT)
+
+    H0: 成功率 = threshold + margin (通過)
+    H1: 成功率 = threshold - margin (失敗)
+    alpha 與 beta 皆為 1 - confidence。
+    """
+
+    def __init__(self, threshold: float, confidence: float, margin: float = 0.05):
+        p_pass = min(threshold + margin, 1 - 1e-6)
+        p_fail = max(threshold - margin, 1e-6)
+        error = 1.0 - confidence
+        self._success_llr = math.log(p_fail / p_pass)
+        self._failure_llr = math.log((1 - p_fail) / (1 - p_pass))
+        self._upper = math.log((1 - error) / error)
+        self._lower = math.log(error / (1 - error))
+        self._llr = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.verdict: Optional[bool] = None
+
+    def record(self, success: bool, allow_pass: bool = True) -> Optional[bool]:
+        """加入一筆請求結果，回傳 True/False 表示已判定通過/失敗，None 表示尚未判定
+
+        allow_pass 為 False 時 (例如尚未達最短測試時間) 只允許判定失敗，
+        避免負載剛開始、佇列尚未累積時就過早判定通過。
+        """
+        if self.verdict is not None:
+            return self.verdict
+        if success:
+            self.successes += 1
+            self._llr += self._success_llr
+        else:
+            self.failures += 1
+            self._llr += self._failure_llr
+        if self._llr >= self._upper:
+            self.verdict = False
+        elif self._llr <= self._lower:
+            if allow_pass:
+                self.verdict = True
+            else:
+                self._llr = self._lower
+        return self.verdict
+
+
+class StreamingVerdict:
+    """彙整多個 agent 的 SPRT 結果
+
+    當通過的 agent 數已達 success_threshold 要求，或失敗數已使其不可能達成時，
+    即得到整體判定。
+    """
+
+    def __init__(
+        self,
+        agent_ids,
+        success_threshold: float,
+        agent_success_threshold: float,
+        confidence: float,
+    ):
+        self._tests: Dict[Hashable, SequentialProbabilityRatioTest] = {
+            agent_id: SequentialProbabilityRatioTest(agent_success_threshold, confidence)
+            for agent_id in agent_ids
+        }
+        total = len(self._tests)
+        self._required = math.ceil(success_threshold * total - 1e-9)
+        self._tolerated = total - self._required
+        self._passed = 0
+        self._failed = 0
+        self.verdict: Optional[bool] = None
+
+    def record(self, agent_id: Hashable, success: bool, allow_pass: bool = True) -> Optional[bool]:
+        if self.verdict is not None:
+            return self.verdict
+        test = self._tests[agent_id]
+        if test.verdict is not None:
+            return None
+        decided = test.record(success, allow_pass)
+        if decided is True:
+            self._passed += 1
+        elif decided is False:
+            self._failed += 1
+        if self._passed >= self._required:
+            self.verdict = True
+        elif self._failed > self._tolerated:
+            self.verdict = False
+        return self.verdict
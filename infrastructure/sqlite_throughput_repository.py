@@ -0,0 +1,181 @@
+"""Throughput repository backed by SQLite with measurement history."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from domain.services import ThroughputRepository
+from utils.helpers import ThroughputKey, normalize_throughput_key
+from utils.metrics import FAST_BUCKETS, REGISTRY
+
+_SECONDS = REGISTRY.histogram(
+    "event_handler_throughput_repository_seconds",
+    "Throughput repository call duration",
+    ["backend", "op"],
+    buckets=FAST_BUCKETS,
+)
+
+# Saves without a category are stored under this sentinel category.
+_NO_CATEGORY = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS throughput (
+    key TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    throughput INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (key, category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_throughput_category ON throughput (category);
+CREATE TABLE IF NOT EXISTS throughput_history (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    throughput INTEGER NOT NULL,
+    measured_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_key ON throughput_history (key, category, measured_at);
+"""
+
+
+class SQLiteThroughputRepository(ThroughputRepository):
+    """Persist the latest throughput per key/category plus every measurement.
+
+    The connection lives on a single dedicated worker thread, so all queries
+    run off the event loop and SQLite never sees concurrent use of one
+    connection.  The database runs in WAL mode.  ``get``/``save`` follow the
+    same category semantics as :class:`JSONThroughputRepository`.
+    """
+
+    def __init__(self, db_path: str = "throughput.db") -> None:
+        self._db_path = db_path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="throughput-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            # "_get_many_sync" -> "get_many"
+            _SECONDS.labels("sqlite", fn.__name__[1:-5]).observe(time.perf_counter() - started)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def get(self, key: Union[str, Mapping[str, Any], ThroughputKey], category: Optional[str] = None) -> Optional[int]:
+        key = normalize_throughput_key(key)
+        return (await self._run(self._get_many_sync, [key], category))[key]
+
+    async def get_many(
+        self, keys: Iterable[Union[str, Mapping[str, Any], ThroughputKey]], category: Optional[str] = None
+    ) -> Dict[str, Optional[int]]:
+        normalized = list(dict.fromkeys(normalize_throughput_key(key) for key in keys))
+        if not normalized:
+            return {}
+        return await self._run(self._get_many_sync, normalized, category)
+
+    async def save(self, key: Union[str, Mapping[str, Any], ThroughputKey], throughput: int, category: Optional[str] = None) -> None:
+        key = normalize_throughput_key(key)
+        await self._run(self._save_sync, key, throughput, category, time.time())
+
+    async def history(
+        self, key: Union[str, Mapping[str, Any], ThroughputKey], category: Optional[str] = None
+    ) -> List[Tuple[float, int]]:
+        """Return ``(measured_at, throughput)`` for every save, oldest first."""
+        key = normalize_throughput_key(key)
+        return await self._run(self._history_sync, key, category)
+
+    async def entries(self) -> List[Tuple[str, Optional[str], int]]:
+        return await self._run(self._entries_sync)
+
+    async def close(self) -> None:
+        await self._run(self._close_sync)
+        self._executor.shutdown(wait=True)
+
+    def _get_many_sync(self, keys: List[str], category: Optional[str]) -> Dict[str, Optional[int]]:
+        conn = self._connection()
+        rows: Dict[str, Dict[str, int]] = {}
+        # stay below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            if category is None:
+                cursor = conn.execute(
+                    f"SELECT key, category, throughput FROM throughput WHERE key IN ({placeholders})",
+                    chunk,
+                )
+            else:
+                cursor = conn.execute(
+                    f"SELECT key, category, throughput FROM throughput "
+                    f"WHERE category = ? AND key IN ({placeholders})",
+                    [category, *chunk],
+                )
+            for key, row_category, value in cursor:
+                rows.setdefault(key, {})[row_category] = value
+
+        result: Dict[str, Optional[int]] = {}
+        for key in keys:
+            buckets = rows.get(key, {})
+            if category is not None:
+                result[key] = buckets.get(category)
+            elif _NO_CATEGORY in buckets:
+                result[key] = buckets[_NO_CATEGORY]
+            elif len(buckets) == 1:
+                result[key] = next(iter(buckets.values()))
+            else:
+                result[key] = None
+        return result
+
+    def _save_sync(self, key: str, throughput: int, category: Optional[str], now: float) -> None:
+        conn = self._connection()
+        stored_category = _NO_CATEGORY if category is None else category
+        with conn:
+            # a plain value replaces all categories and vice versa
+            if category is None:
+                conn.execute("DELETE FROM throughput WHERE key = ? AND category != ''", (key,))
+            else:
+                conn.execute("DELETE FROM throughput WHERE key = ? AND category = ''", (key,))
+            conn.execute(
+                "INSERT INTO throughput (key, category, throughput, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key, category) DO UPDATE SET "
+                "throughput = excluded.throughput, updated_at = excluded.updated_at",
+                (key, stored_category, throughput, now),
+            )
+            conn.execute(
+                "INSERT INTO throughput_history (key, category, throughput, measured_at) VALUES (?, ?, ?, ?)",
+                (key, stored_category, throughput, now),
+            )
+
+    def _history_sync(self, key: str, category: Optional[str]) -> List[Tuple[float, int]]:
+        conn = self._connection()
+        stored_category = _NO_CATEGORY if category is None else category
+        cursor = conn.execute(
+            "SELECT measured_at, throughput FROM throughput_history "
+            "WHERE key = ? AND category = ? ORDER BY measured_at, id",
+            (key, stored_category),
+        )
+        return [(measured_at, value) for measured_at, value in cursor]
+
+    def _entries_sync(self) -> List[Tuple[str, Optional[str], int]]:
+        cursor = self._connection().execute("SELECT key, category, throughput FROM throughput")
+        return [
+            (key, None if category == _NO_CATEGORY else category, value)
+            for key, category, value in cursor
+        ]
+
+    def _close_sync(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,182 @@
+"""Nearest-neighbour throughput estimation over stored deployment signatures."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from domain.services import ThroughputEstimate, ThroughputEstimator, ThroughputRepository
+from utils.helpers import ThroughputKey, normalize_throughput_key
+
+logger = logging.getLogger(__name__)
+
+
+def _distance(left: Dict[str, int], right: Dict[str, int]) -> int:
+    return sum(abs(left.get(svc, 0) - right.get(svc, 0)) for svc in left.keys() | right.keys())
+
+
+class _NodeIndex:
+    """Service-count vectors of one node/category, ordered by total instance count.
+
+    The L1 distance between two vectors is at least the difference of their
+    totals, so a nearest-neighbour scan can walk outwards from the query's
+    total and stop once that gap exceeds the k-th best distance found.
+    """
+
+    def __init__(self) -> None:
+        self._order: List[Tuple[int, str]] = []
+        self._entries: Dict[str, Tuple[Dict[str, int], int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[int]:
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def add(self, key: str, counts: Dict[str, int], value: int) -> None:
+        if key not in self._entries:
+            insort(self._order, (sum(counts.values()), key))
+        self._entries[key] = (counts, value)
+
+    def nearest(self, counts: Dict[str, int], k: int) -> List[Tuple[int, str, Dict[str, int], int]]:
+        total = sum(counts.values())
+        order = self._order
+        lo = bisect_left(order, (total, "")) - 1
+        hi = lo + 1
+        best: List[Tuple[int, str]] = []  # max-heap on distance via negation
+
+        while lo >= 0 or hi < len(order):
+            low_gap = total - order[lo][0] if lo >= 0 else None
+            high_gap = order[hi][0] - total if hi < len(order) else None
+            if high_gap is None or (low_gap is not None and low_gap <= high_gap):
+                gap, key = low_gap, order[lo][1]
+                lo -= 1
+            else:
+                gap, key = high_gap, order[hi][1]
+                hi += 1
+            if len(best) == k and gap >= -best[0][0]:
+                break
+            distance = _distance(counts, self._entries[key][0])
+            if len(best) < k:
+                heapq.heappush(best, (-distance, key))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, key))
+
+        found = sorted((-negated, key) for negated, key in best)
+        return [(distance, key, *self._entries[key]) for distance, key in found]
+
+
+class NearestNeighbourThroughputEstimator(ThroughputEstimator):
+    """Estimate throughput from neighbouring service-count vectors on the same node.
+
+    When the nearest neighbours differ from the query in a single service the
+    estimate is a least-squares line along that service's count (interpolated
+    or extrapolated); otherwise it is an inverse-distance weighted mean.
+    Confidence falls with distance and is lower for extrapolation and the
+    weighted mean.  The index is built lazily from ``recorder.entries()`` and
+    kept current through :meth:`observe`.
+    """
+
+    def __init__(self, recorder: ThroughputRepository, k: int = 4) -> None:
+        self._recorder = recorder
+        self._k = k
+        self._indexes: Dict[Tuple[str, Optional[str]], _NodeIndex] = {}
+        self._built = False
+        self._build_lock = asyncio.Lock()
+
+    async def _ensure_built(self) -> None:
+        if self._built:
+            return
+        async with self._build_lock:
+            if self._built:
+                return
+            for key, category, value in await self._recorder.entries():
+                self._add(key, value, category)
+            self._built = True
+
+    def _add(self, key: str, value: int, category: Optional[str]) -> None:
+        try:
+            parsed = ThroughputKey.from_string(key)
+        except (TypeError, ValueError):
+            logger.warning("Skipping malformed throughput key %r", key)
+            return
+        index = self._indexes.setdefault((parsed.node_name, category), _NodeIndex())
+        index.add(key, parsed.service_counts, value)
+
+    async def observe(
+        self, key: Union[str, Mapping[str, Any]], throughput: int, category: Optional[str] = None
+    ) -> None:
+        await self._ensure_built()
+        self._add(normalize_throughput_key(key), throughput, category)
+
+    async def estimate(
+        self, key: Union[str, Mapping[str, Any]], category: Optional[str] = None
+    ) -> Optional[ThroughputEstimate]:
+        await self._ensure_built()
+        key = normalize_throughput_key(key)
+        query = ThroughputKey.from_string(key)
+        index = self._indexes.get((query.node_name, category))
+        if not index:
+            return None
+
+        exact = index.get(key)
+        if exact is not None:
+            return ThroughputEstimate(exact, 1.0, [key])
+
+        neighbours = index.nearest(query.service_counts, self._k)
+        if not neighbours:
+            return None
+        # distance 0: a stored key with the same counts, written in another form
+        same = [(key, value) for distance, key, _, value in neighbours if distance == 0]
+        if same:
+            return ThroughputEstimate(same[0][1], 1.0, [same[0][0]])
+        return self._line_estimate(query.service_counts, neighbours) or self._weighted_estimate(neighbours)
+
+    @staticmethod
+    def _line_estimate(counts: Dict[str, int], neighbours) -> Optional[ThroughputEstimate]:
+        lines: Dict[str, List[Tuple[int, str, int, int]]] = {}
+        for distance, key, other, value in neighbours:
+            differing = [svc for svc in counts.keys() | other.keys() if counts.get(svc, 0) != other.get(svc, 0)]
+            if len(differing) == 1:
+                svc = differing[0]
+                lines.setdefault(svc, []).append((distance, key, other.get(svc, 0), value))
+
+        candidates = [
+            (svc, points) for svc, points in lines.items() if len({x for _, _, x, _ in points}) >= 2
+        ]
+        if not candidates:
+            return None
+        svc, points = max(candidates, key=lambda item: (len(item[1]), -sum(d for d, _, _, _ in item[1])))
+        target = counts.get(svc, 0)
+
+        xs = [x for _, _, x, _ in points]
+        ys = [value for _, _, _, value in points]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+        predicted = mean_y + slope * (target - mean_x)
+
+        mean_distance = sum(d for d, _, _, _ in points) / len(points)
+        base = 0.9 if min(xs) <= target <= max(xs) else 0.75
+        if predicted < 1:
+            predicted, base = 1, base / 2
+        return ThroughputEstimate(
+            int(round(predicted)),
+            base / (1 + 0.25 * (mean_distance - 1)),
+            [key for _, key, _, _ in points],
+        )
+
+    @staticmethod
+    def _weighted_estimate(neighbours) -> ThroughputEstimate:
+        weights = [1.0 / (distance + 1e-9) for distance, _, _, _ in neighbours]
+        value = sum(w * v for w, (_, _, _, v) in zip(weights, neighbours)) / sum(weights)
+        mean_distance = sum(d for d, _, _, _ in neighbours) / len(neighbours)
+        return ThroughputEstimate(
+            int(round(value)),
+            0.5 / (1 + 0.25 * (mean_distance - 1)),
+            [key for _, key, _, _ in neighbours],
+        )
@@ -2,49 +2,78 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional, Union, Mapping
+from typing import Any, Dict, List, Optional, Tuple, Union, Mapping
 
 from domain.services import ThroughputRepository
-from utils.helpers import ThroughputKey
+from utils.helpers import ThroughputKey, normalize_throughput_key
+from utils.metrics import FAST_BUCKETS, REGISTRY
+
+_SECONDS = REGISTRY.histogram(
+    "event_handler_throughput_repository_seconds",
+    "Throughput repository call duration",
+    ["backend", "op"],
+    buckets=FAST_BUCKETS,
+)
+_GET_SECONDS = _SECONDS.labels("json", "get")
+_SAVE_SECONDS = _SECONDS.labels("json", "save")
 
 
 class JSONThroughputRepository(ThroughputRepository):
-    """Persist throughput values in memory with optional JSON file."""
+    """Persist throughput values in memory with optional JSON file.
+
+    With ``file_path`` the repository keeps a JSON snapshot at that path plus
+    an append-only journal next to it (``<file>.journal``).  Saves update the
+    in-memory table immediately and are appended to the journal in batches by
+    a background flush, with all file I/O done in a worker thread.  Every
+    ``compact_every`` journal records the table is written to a temporary file
+    and atomically renamed over the snapshot, after which the journal is
+    truncated.  Files are read lazily on first access.
+    """
 
-    def __init__(self, *, initial_data: Optional[Dict[str, Any]] = None, file_path: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        *,
+        initial_data: Optional[Dict[str, Any]] = None,
+        file_path: Optional[str] = None,
+        flush_interval: float = 0.05,
+        compact_every: int = 1000,
+    ) -> None:
         self._values: Dict[str, Any] = initial_data.copy() if initial_data else {}
         self._path: Optional[Path] = Path(file_path) if file_path else None
-        if self._path:
-            try:
-                if not self._path.exists():
-                    self._path.parent.mkdir(parents=True, exist_ok=True)
-                    self._path.write_text(json.dumps(self._values, indent=2))
-                loaded = json.loads(self._path.read_text())
-                if isinstance(loaded, dict):
-                    self._values.update(loaded)
-            except json.JSONDecodeError:
-                pass
+        self._journal_path: Optional[Path] = (
+            self._path.with_name(self._path.name + ".journal") if self._path else None
+        )
+        self._flush_interval = flush_interval
+        self._compact_every = compact_every
+        self._loaded = self._path is None
+        self._load_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._journal_entries = 0
+        self._flush_task: Optional[asyncio.Task] = None
 
     @staticmethod
     def make_key(node_name: str, service_counts: Dict[str, int]) -> str:
         return ThroughputKey(node_name, service_counts).to_string()
 
     def _normalize_key(self, key: Union[str, Mapping[str, Any], ThroughputKey]) -> str:
-        if isinstance(key, ThroughputKey):
-            key = key.to_string()
-        elif isinstance(key, Mapping):
-            key = self.make_key(key.get("node"), dict(key.get("services", {})))
-        if ":" not in key:
-            return key
-        prefix, rest = key.split(":", 1)
-        parts = [p for p in rest.split(",") if p]
-        if not parts:
-            return prefix
-        return f"{prefix}:{','.join(sorted(parts))}"
+        return normalize_throughput_key(key)
 
     async def get(self, key: Union[str, Mapping[str, Any], ThroughputKey], category: Optional[str] = None) -> Optional[int]:
+        started = time.perf_counter()
+        try:
+            return await self._get(key, category)
+        finally:
+            _GET_SECONDS.observe(time.perf_counter() - started)
+
+    async def _get(self, key: Union[str, Mapping[str, Any], ThroughputKey], category: Optional[str]) -> Optional[int]:
+        if not self._loaded:
+            await self._load()
         key = self._normalize_key(key)
         value = self._values.get(key)
         if category is None:
@@ -58,18 +87,137 @@ class JSONThroughputRepository(ThroughputRepository):
         return None
 
     async def save(self, key: Union[str, Mapping[str, Any], ThroughputKey], throughput: int, category: Optional[str] = None) -> None:
+        started = time.perf_counter()
+        if not self._loaded:
+            await self._load()
         key = self._normalize_key(key)
+        self._apply(key, throughput, category)
+        if self._path:
+            record: Dict[str, Any] = {"key": key, "throughput": throughput}
+            if category is not None:
+                record["category"] = category
+            self._pending.append(record)
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_later())
+        _SAVE_SECONDS.observe(time.perf_counter() - started)
+
+    async def entries(self) -> List[Tuple[str, Optional[str], int]]:
+        if not self._loaded:
+            await self._load()
+        result: List[Tuple[str, Optional[str], int]] = []
+        for key, value in self._values.items():
+            if isinstance(value, dict):
+                for category, inner in value.items():
+                    if isinstance(inner, dict) and "throughput" in inner:
+                        result.append((key, category, inner["throughput"]))
+            else:
+                result.append((key, None, value))
+        return result
+
+    def _apply(self, key: str, throughput: int, category: Optional[str]) -> None:
         if category is None:
             self._values[key] = throughput
         else:
-            bucket = self._values.setdefault(key, {})
-            if not isinstance(bucket, dict):
-                bucket = {}
-                self._values[key] = bucket
-            entry = bucket.setdefault(category, {})
-            if not isinstance(entry, dict):
-                entry = {}
-                bucket[category] = entry
+            # replace nested dicts instead of mutating them, so a shallow copy
+            # of _values is a stable snapshot for compaction off the loop
+            bucket = self._values.get(key)
+            bucket = dict(bucket) if isinstance(bucket, dict) else {}
+            entry = bucket.get(category)
+            entry = dict(entry) if isinstance(entry, dict) else {}
             entry["throughput"] = throughput
-        if self._path:
-            self._path.write_text(json.dumps(self._values, indent=2))
+            bucket[category] = entry
+            self._values[key] = bucket
+
+    async def _load(self) -> None:
+        async with self._load_lock:
+            if self._loaded:
+                return
+            snapshot, records = await asyncio.to_thread(self._read_files)
+            self._values.update(snapshot)
+            for record in records:
+                self._apply(record["key"], record["throughput"], record.get("category"))
+            self._journal_entries = len(records)
+            self._loaded = True
+
+    def _read_files(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        snapshot: Dict[str, Any] = {}
+        try:
+            loaded = json.loads(self._path.read_text())
+            if isinstance(loaded, dict):
+                snapshot = loaded
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        records: List[Dict[str, Any]] = []
+        try:
+            with self._journal_path.open() as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # a torn trailing line from an interrupted append
+                        continue
+                    if isinstance(record, dict) and "key" in record and "throughput" in record:
+                        records.append(record)
+        except FileNotFoundError:
+            pass
+        return snapshot, records
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Append pending saves to the journal, compacting when it grows large."""
+        if not self._path:
+            return
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            if batch:
+                lines = "".join(json.dumps(record) + "\n" for record in batch)
+                await asyncio.to_thread(self._append_journal, lines)
+                self._journal_entries += len(batch)
+            if self._journal_entries >= self._compact_every:
+                await self._compact_locked()
+
+    async def compact(self) -> None:
+        """Rewrite the snapshot from memory and truncate the journal."""
+        if not self._path:
+            return
+        if not self._loaded:
+            await self._load()
+        async with self._write_lock:
+            await self._compact_locked()
+
+    async def _compact_locked(self) -> None:
+        # the snapshot already contains every pending save
+        self._pending = []
+        await asyncio.to_thread(self._write_snapshot, dict(self._values))
+        self._journal_entries = 0
+
+    def _append_journal(self, lines: str) -> None:
+        self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._journal_path.open("a") as journal:
+            journal.write(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _write_snapshot(self, values: Dict[str, Any]) -> None:
+        snapshot = json.dumps(values, indent=2)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w") as tmp:
+            tmp.write(snapshot)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, self._path)
+        # replaying records already in the snapshot is harmless, so a crash
+        # between the rename and the truncation loses nothing
+        with self._journal_path.open("w"):
+            pass
+
+    async def close(self) -> None:
+        """Flush outstanding saves; call before shutting down."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
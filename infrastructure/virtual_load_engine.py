@@ -0,0 +1,139 @@
+import random
+from typing import Dict, List, Optional, Tuple
+
+from .frequency_test_executor import FrequencyTestExecutor
+from .load_test_config import LoadTestConfig
+from .load_test_result import AgentLoadResult, FrequencyProbeResult
+from .sequential_verdict import StreamingVerdict
+
+
+class VirtualClock:
+    """離散事件模擬使用的虛擬時鐘 (秒)"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def advance(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+
+class CapacityModel:
+    """每個 (node, service) 的處理能力 (請求/秒)"""
+
+    def __init__(self, capacities: Optional[Dict[Tuple[str, str], float]] = None, default_capacity: float = 100.0):
+        self.capacities = dict(capacities or {})
+        self.default_capacity = default_capacity
+
+    @classmethod
+    def from_servicespec(cls, spec: Dict, default_capacity: float = 100.0) -> "CapacityModel":
+        """由 servicespec-info 的 spec.raw[*].workAbility 建立能力模型"""
+        capacities = {}
+        for item in spec.get("raw", []):
+            service = item.get("serviceType")
+            for node, capacity in (item.get("workAbility") or {}).items():
+                capacities[(node, service)] = float(capacity)
+        return cls(capacities, default_capacity)
+
+    def capacity(self, node: str, service: str) -> float:
+        return self.capacities.get((node, service), self.default_capacity)
+
+
+class VirtualFrequencyTestExecutor(FrequencyTestExecutor):
+    """以虛擬時鐘進行離散事件模擬的頻率測試執行器
+
+    每個 (node, service) 視為單一 FIFO 伺服器，服務時間為 1/capacity 並加上
+    種子控制的隨機抖動；agent 以開迴路方式依頻率送出請求。延遲超過
+    request_timeout 或命中 error_rate 的請求視為失敗。整個測試不呼叫
+    asyncio.sleep，結果可重現。
+    """
+
+    def __init__(
+        self,
+        capacity_model: Optional[CapacityModel] = None,
+        config: LoadTestConfig = None,
+        *,
+        seed: int = 0,
+        service_time_jitter: float = 0.1,
+        error_rate: float = 0.0,
+        clock: Optional[VirtualClock] = None,
+    ):
+        self.config = config or LoadTestConfig()
+        self.simulator = None
+        self.capacity_model = capacity_model or CapacityModel()
+        self.seed = seed
+        self.service_time_jitter = service_time_jitter
+        self.error_rate = error_rate
+        self.clock = clock or VirtualClock()
+
+    async def close(self) -> None:
+        return None
+
+    async def recover(self, seconds: float) -> None:
+        self.clock.advance(seconds)
+
+    async def run_probe(self, agents: List[Dict], frequency: int, deployment_hash: str) -> FrequencyProbeResult:
+        interval = 1.0 / frequency if frequency > 0 else 1.0
+        duration = self.config.max_test_duration
+        timeout = self.config.request_timeout
+        rng = random.Random(f"{self.seed}:{deployment_hash}:{frequency}")
+
+        # 依 (node, service) 分組各 agent 的請求到達時間
+        arrivals: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        for index, agent in enumerate(agents):
+            server = (agent.get("nodeName"), agent.get("serviceType"))
+            phase = rng.random() * interval
+            count = int((duration - phase) / interval) + 1 if phase < duration else 0
+            bucket = arrivals.setdefault(server, [])
+            bucket.extend((phase + i * interval, index) for i in range(count))
+
+        # Lindley 遞迴計算每個請求的完成時間
+        completions: List[Tuple[float, int, bool, float]] = []
+        jitter = self.service_time_jitter
+        for (node, service), requests in arrivals.items():
+            requests.sort()
+            mean_service = 1.0 / self.capacity_model.capacity(node, service)
+            free_at = 0.0
+            for arrived, index in requests:
+                service_time = mean_service * (1.0 + jitter * (2.0 * rng.random() - 1.0))
+                started = arrived if arrived > free_at else free_at
+                free_at = started + service_time
+                latency = free_at - arrived
+                ok = latency <= timeout and rng.random() >= self.error_rate
+                completions.append((free_at, index, ok, latency))
+        completions.sort()
+
+        results = [AgentLoadResult(agent=agent, target_rate=1.0 / interval) for agent in agents]
+        verdict = None
+        if self.config.verdict_mode == "sequential":
+            verdict = StreamingVerdict(
+                range(len(agents)),
+                self.config.success_threshold,
+                self.config.agent_success_threshold,
+                self.config.verdict_confidence,
+            )
+
+        elapsed = duration
+        for completed_at, index, ok, latency in completions:
+            result = results[index]
+            result.sent += 1
+            result.record(ok, latency)
+            allow_pass = completed_at >= self.config.min_test_duration
+            if verdict is not None and verdict.record(index, ok, allow_pass) is not None:
+                elapsed = completed_at
+                break
+        else:
+            if completions:
+                elapsed = max(duration, completions[-1][0])
+
+        for result in results:
+            result.elapsed = elapsed
+            result.passed = result.success_rate >= self.config.agent_success_threshold
+        self.clock.advance(elapsed)
+
+        if verdict is not None and verdict.verdict is not None:
+            passed = verdict.verdict and (
+                self.config.latency_slo_ms is None or self._quorum_passed(results, len(agents))
+            )
+        else:
+            passed = bool(agents) and self._quorum_passed(results, len(agents))
+        return FrequencyProbeResult(frequency, passed, results)
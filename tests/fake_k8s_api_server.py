@@ -0,0 +1,240 @@
+"""Local stand-in for the Kubernetes API server's custom-object endpoints."""
+
+import asyncio
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+Key = Tuple[str, str, str, str, str]
+
+
+class FakeK8sApiServer:
+    """Serve namespaced custom objects from memory.
+
+    Supports get/list/watch/create/replace/merge- and JSON-patch/delete.
+    A JSON patch setting ``metadata.resourceVersion`` to anything but the
+    current version fails with 409 Conflict, like the real API server.  Every write
+    bumps a global resourceVersion and is kept in a watch history;
+    :meth:`expire_history` drops it so watches from older versions get
+    410 Gone.  ``latency`` delays every non-watch response, and ``requests``
+    records ``(method, path)`` tuples together with the peak number of
+    concurrent requests; ``patches`` keeps every applied patch body.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.objects: Dict[Key, Dict[str, Any]] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.patches: List[Any] = []
+        self.peak_concurrency = 0
+        self.resource_version = 0
+        self.history: List[Tuple[int, str, Key, Dict[str, Any]]] = []
+        self._history_floor = 0
+        self._changed: Optional[asyncio.Event] = None
+        self._active = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def put_object(self, group: str, version: str, namespace: str, plural: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Store ``obj`` directly, as if another controller wrote it."""
+        obj = copy.deepcopy(obj)
+        metadata = obj.setdefault("metadata", {})
+        metadata["namespace"] = namespace
+        self.resource_version += 1
+        metadata["resourceVersion"] = str(self.resource_version)
+        key = (group, version, namespace, plural, metadata["name"])
+        self._record("MODIFIED" if key in self.objects else "ADDED", key, obj)
+        self.objects[key] = obj
+        return obj
+
+    def delete_object(self, group: str, version: str, namespace: str, plural: str, name: str) -> Dict[str, Any]:
+        key = (group, version, namespace, plural, name)
+        obj = self.objects.pop(key)
+        self.resource_version += 1
+        self._record("DELETED", key, obj)
+        return obj
+
+    def expire_history(self) -> None:
+        """Forget the watch history, as etcd compaction would."""
+        self.history.clear()
+        self._history_floor = self.resource_version
+
+    def _record(self, kind: str, key: Key, obj: Dict[str, Any]) -> None:
+        self.history.append((self.resource_version, kind, key, copy.deepcopy(obj)))
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def get_object(self, group: str, version: str, namespace: str, plural: str, name: str) -> Optional[Dict[str, Any]]:
+        return self.objects.get((group, version, namespace, plural, name))
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests.append((request.method, request.path))
+        if request.query.get("watch") == "true":
+            return await self._watch(request)
+        self._active += 1
+        self.peak_concurrency = max(self.peak_concurrency, self._active)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return await self._dispatch(request)
+        finally:
+            self._active -= 1
+
+    async def _dispatch(self, request: web.Request) -> web.Response:
+        info = request.match_info
+        group, version, namespace, plural = info["group"], info["version"], info["namespace"], info["plural"]
+        name = info.get("name")
+        key = (group, version, namespace, plural, name)
+
+        if name is None:
+            if request.method == "GET":
+                selected = _field_name(request.query.get("fieldSelector"))
+                items = [
+                    copy.deepcopy(obj) for k, obj in self.objects.items()
+                    if k[:4] == (group, version, namespace, plural) and selected in (None, k[4])
+                ]
+                return web.json_response({
+                    "items": items, "metadata": {"resourceVersion": str(self.resource_version)},
+                })
+            if request.method == "POST":
+                body = await request.json()
+                if (group, version, namespace, plural, body["metadata"]["name"]) in self.objects:
+                    return self._status(409, "AlreadyExists")
+                return web.json_response(self.put_object(group, version, namespace, plural, body), status=201)
+            return self._status(405, "MethodNotAllowed")
+
+        current = self.objects.get(key)
+        if current is None:
+            return self._status(404, "NotFound")
+        if request.method == "GET":
+            return web.json_response(current)
+        if request.method == "DELETE":
+            return web.json_response(self.delete_object(*key))
+        if request.method == "PUT":
+            body = await request.json()
+            expected = body.get("metadata", {}).get("resourceVersion")
+            if expected and expected != current["metadata"]["resourceVersion"]:
+                return self._status(409, "Conflict")
+            return web.json_response(self.put_object(group, version, namespace, plural, body))
+        if request.method == "PATCH":
+            if request.content_type == "application/json-patch+json":
+                try:
+                    patched = _json_patch(copy.deepcopy(current), await request.json())
+                except (KeyError, IndexError, ValueError):
+                    return self._status(422, "Invalid")
+                if patched["metadata"]["resourceVersion"] != current["metadata"]["resourceVersion"]:
+                    return self._status(409, "Conflict")
+            else:
+                patched = _merge_patch(copy.deepcopy(current), await request.json())
+            self.patches.append(await request.json())
+            return web.json_response(self.put_object(group, version, namespace, plural, patched))
+        return self._status(405, "MethodNotAllowed")
+
+    async def _watch(self, request: web.Request) -> web.StreamResponse:
+        info = request.match_info
+        prefix = (info["group"], info["version"], info["namespace"], info["plural"])
+        name = _field_name(request.query.get("fieldSelector"))
+        since = int(request.query.get("resourceVersion") or self.resource_version)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + float(request.query.get("timeoutSeconds", 30))
+
+        response = web.StreamResponse()
+        response.content_type = "application/json"
+        await response.prepare(request)
+        if since < self._history_floor:
+            gone = {"kind": "Status", "code": 410, "reason": "Expired"}
+            await response.write(json.dumps({"type": "ERROR", "object": gone}).encode() + b"\n")
+            return response
+        while True:
+            for version, kind, key, obj in self.history:
+                if version > since and key[:4] == prefix and (name is None or key[4] == name):
+                    await response.write(json.dumps({"type": kind, "object": obj}).encode() + b"\n")
+                since = max(since, version)
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._runner is None:
+                return response
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return response
+
+    @staticmethod
+    def _status(code: int, reason: str) -> web.Response:
+        return web.json_response({"kind": "Status", "code": code, "reason": reason}, status=code)
+
+    async def start(self) -> int:
+        self._changed = asyncio.Event()
+        app = web.Application()
+        base = "/apis/{group}/{version}/namespaces/{namespace}/{plural}"
+        app.router.add_route("*", base, self._handle)
+        app.router.add_route("*", base + "/{name}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            runner, self._runner = self._runner, None
+            # end open watches instead of waiting for their timeout
+            self._changed.set()
+            await runner.cleanup()
+
+
+def _merge_patch(target: Any, patch: Any) -> Any:
+    # RFC 7386
+    if not isinstance(patch, dict):
+        return patch
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = _merge_patch(target.get(key), value)
+    return target
+
+
+def _json_patch(target: Any, operations: List[Dict[str, Any]]) -> Any:
+    # RFC 6902 add/replace/remove/test on object keys and list indexes
+    for operation in operations:
+        *parents, last = [
+            part.replace("~1", "/").replace("~0", "~") for part in operation["path"].split("/")[1:]
+        ]
+        container = target
+        for part in parents:
+            container = container[int(part) if isinstance(container, list) else part]
+        key = int(last) if isinstance(container, list) and last != "-" else last
+        op = operation["op"]
+        if op == "test":
+            if container[key] != operation["value"]:
+                raise ValueError(f"test failed at {operation['path']}")
+        elif op == "remove":
+            del container[key]
+        elif op == "replace":
+            container[key]  # must exist
+            container[key] = operation["value"]
+        elif op == "add":
+            if isinstance(container, list):
+                container.insert(len(container) if key == "-" else key, operation["value"])
+            else:
+                container[key] = operation["value"]
+        else:
+            raise ValueError(f"unsupported op {op}")
+    return target
+
+
+def _field_name(selector: Optional[str]) -> Optional[str]:
+    # only "metadata.name=<name>" is supported
+    if selector and selector.startswith("metadata.name="):
+        return selector.split("=", 1)[1]
+    return None
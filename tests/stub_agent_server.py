@@ -0,0 +1,64 @@
+"""Local stand-in for a subscription agent used by HTTP driver tests."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+
+class StubAgentServer:
+    """HTTP agent with configurable per-request latency and concurrency capacity.
+
+    Requests beyond ``capacity`` concurrent requests are rejected with 503,
+    and the first ``failures`` requests are answered with 500.
+    """
+
+    def __init__(self, latency: float = 0.0, capacity: Optional[int] = None, failures: int = 0) -> None:
+        self.latency = latency
+        self.capacity = capacity
+        self.failures = failures
+        self.requests: List[Dict[str, Any]] = []
+        self.rejected = 0
+        self.peers: Set[Tuple[str, int]] = set()
+        self._active = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.peers.add(request.transport.get_extra_info("peername")[:2])
+        if self.capacity is not None and self._active >= self.capacity:
+            self.rejected += 1
+            return web.json_response({"error": "overloaded"}, status=503)
+        if self.failures:
+            self.failures -= 1
+            return web.json_response({"error": "unavailable"}, status=500)
+        self._active += 1
+        try:
+            body = await request.json() if request.can_read_body else None
+            self.requests.append({"path": request.path, "body": body})
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return web.json_response({"ok": True})
+        finally:
+            self._active -= 1
+
+    async def start(self) -> int:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def agent(self, **extra: Any) -> Dict[str, Any]:
+        """Return a subscription-info style agent entry pointing to this server."""
+        entry = {"agentIP": "127.0.0.1", "agentPort": self.port, "nodeName": "pdclab", "serviceType": "pose"}
+        entry.update(extra)
+        return entry
@@ -0,0 +1,28 @@
+from benchmarks.generators import churn_spec, service_info_spec, throughput_keys
+from benchmarks.runner import BenchmarkResult, compare
+from domain.deployment_change_detector import has_deployment_changed
+from utils.helpers import normalize_throughput_key
+
+
+def test_generators_are_deterministic_and_churn_keeps_composition():
+    spec = service_info_spec(200, seed=3)
+    assert spec == service_info_spec(200, seed=3)
+    assert len(spec["raw"]) == 200
+    changed, _ = has_deployment_changed(spec, churn_spec(spec))
+    assert not changed
+
+    keys = throughput_keys(1000)
+    assert len({normalize_throughput_key(key) for key in keys}) == 1000
+
+
+def test_compare_flags_slower_or_larger_results():
+    baseline = {
+        "a": {"ops_per_sec": 100.0, "peak_bytes": 1000},
+        "b": {"ops_per_sec": 100.0, "peak_bytes": 1000},
+    }
+    results = [
+        BenchmarkResult("a", 85.0, 1100, 85, 1.0),
+        BenchmarkResult("b", 70.0, 900, 70, 1.0),
+        BenchmarkResult("new", 1.0, 1, 1, 1.0),
+    ]
+    assert compare(results, baseline, tolerance=0.2) == ["b"]
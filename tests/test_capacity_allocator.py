@@ -0,0 +1,174 @@
+import asyncio
+import random
+from datetime import datetime
+
+import numpy as np
+
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler
+from domain import Event, StateManager
+from infrastructure import InMemoryDispatcher, JSONThroughputRepository
+from infrastructure.capacity_allocator import (
+    AllocationProblem,
+    CapacityAwareAdjustmentStrategy,
+    allocate,
+    water_fill,
+)
+from benchmarks.generators import servicespec_info_spec, subscription_info_spec
+
+SERVICESPEC = {"raw": [
+    {"serviceType": "gesture", "frequencyLimit": [20, 10], "workAbility": {"pdclab": 230, "workgpu": 180}},
+    {"serviceType": "pose", "frequencyLimit": [30, 15], "workAbility": {"pdclab": 80, "workgpu": 66}},
+]}
+
+
+def _agent(port, node, service):
+    return {"agentIP": "10.52.52.111", "agentPort": port, "nodeName": node, "serviceType": service}
+
+
+def test_water_fill_is_max_min_fair_per_group():
+    groups = np.array([0, 0, 0, 1, 1])
+    demand = np.array([1.0, 10.0, 5.0, 4.0, 4.0])
+    allocation = water_fill(groups, demand, np.array([12.0, np.inf]))
+    assert allocation.tolist() == [1.0, 6.0, 5.0, 4.0, 4.0]
+
+    allocation = water_fill(groups, demand, np.array([9.0, 6.0]))
+    assert allocation.tolist() == [1.0, 4.0, 4.0, 3.0, 3.0]
+
+
+def test_allocation_respects_limits_and_node_capacity():
+    subscriptions = {"raw": [_agent(8888 + i, "pdclab", "pose") for i in range(4)] + [
+        _agent(8888, "workgpu", "gesture"),
+        _agent(8889, "workgpu", "gesture"),
+    ]}
+    problem = AllocationProblem.from_specs(SERVICESPEC, subscriptions)
+
+    # pose on pdclab: 80 req/s shared by four agents; gesture fits its limit
+    allocation = allocate(problem)
+    assert allocation.frequencies.tolist() == [20, 20, 20, 20, 20, 20]
+    plan = allocation.to_plan()
+    assert plan.for_agent("10.52.52.111:8888") == {"pose": 20, "gesture": 20}
+
+    # the measured throughput caps every agent
+    assert allocate(problem, max_frequency=12).frequencies.tolist() == [12] * 6
+
+    # six pose agents cannot all get their minimum of 15
+    crowded = AllocationProblem.from_specs(SERVICESPEC, {"raw": [_agent(9000 + i, "pdclab", "pose") for i in range(6)]})
+    allocation = allocate(crowded)
+    assert allocation.frequencies.tolist() == [13] * 6
+    assert len(allocation.below_minimum()) == 6
+
+
+def test_allocation_matches_reference_on_random_problems():
+    rng = random.Random(3)
+    for _ in range(20):
+        groups = np.array([rng.randrange(4) for _ in range(30)])
+        demand = np.array([float(rng.randint(0, 40)) for _ in range(30)])
+        capacity = np.array([float(rng.randint(0, 300)) for _ in range(4)])
+        allocation = water_fill(groups, demand, capacity)
+        for group in range(4):
+            members = demand[groups == group]
+            given = allocation[groups == group]
+            assert np.all(given <= members + 1e-9)
+            if members.sum() <= capacity[group]:
+                assert np.allclose(given, members)
+            else:
+                # capacity used up, and nobody below their demand gets less than anyone else
+                assert abs(given.sum() - capacity[group]) < 1e-6
+                unmet = given < members - 1e-9
+                assert np.all(given[unmet] >= given.max() - 1e-9)
+
+
+def test_thousands_of_agents_are_solved_at_once():
+    problem = AllocationProblem.from_specs(servicespec_info_spec(40), subscription_info_spec(5000, nodes=40))
+    allocation = allocate(problem, max_frequency=25)
+    pool_load = np.bincount(problem.pool_of, weights=allocation.frequencies)
+    assert np.all(pool_load <= problem.capacity)
+    assert np.all(allocation.frequencies <= np.minimum(problem.upper, 25))
+    assert len(allocation.to_plan().agents) > 0
+
+
+class _Specs:
+    async def get_servicespec_info(self, namespace="arha-system"):
+        return {"metadata": {"resourceVersion": "1"}, "spec": SERVICESPEC}
+
+    async def get_subscription_info(self, namespace="arha-system"):
+        return {"metadata": {"resourceVersion": "1"}, "spec": {"raw": [
+            _agent(8888, "pdclab", "pose"),
+            _agent(8888, "workgpu", "gesture"),
+        ]}}
+
+
+def test_deployment_change_dispatches_the_allocated_plan():
+    async def run():
+        recorder = JSONThroughputRepository()
+        await recorder.save({"node": "pdclab", "services": {"pose": 1}}, 25)
+        dispatcher = InMemoryDispatcher()
+        ctx = Context(None, None, recorder, CapacityAwareAdjustmentStrategy(_Specs()), dispatcher, StateManager())
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", DeploymentChangeHandler())
+        await processor.process(Event(
+            type="DEPLOYMENT_CHANGE",
+            payload={"hash": {"node": "pdclab", "services": {"pose": 1}}},
+            timestamp=datetime.utcnow(),
+            source="test",
+        ))
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert dispatcher.last_dispatched is None
+    assert dispatcher.last_plan.for_agent("10.52.52.111:8888") == {"pose": 25, "gesture": 20}
+
+
+def test_node_throughput_caps_only_that_nodes_streams():
+    class Specs(_Specs):
+        async def get_subscription_info(self, namespace="arha-system"):
+            return {"metadata": {"resourceVersion": "1"}, "spec": {"raw": [
+                _agent(8888, "pdclab", "pose"),
+                _agent(8889, "workgpu", "gesture"),
+            ]}}
+
+    async def run():
+        strategy = CapacityAwareAdjustmentStrategy(Specs())
+        plans = [
+            await strategy.compute_plan(25, node="pdclab"),
+            await strategy.compute_plan(12, node="workgpu"),
+            await strategy.compute_plan(16),
+        ]
+        return [(plan.for_agent("10.52.52.111:8888"), plan.for_agent("10.52.52.111:8889")) for plan in plans]
+
+    first, second, third = asyncio.run(run())
+    # workgpu has no measured throughput yet, so only its frequencyLimit applies
+    assert first == ({"pose": 25}, {"gesture": 20})
+    # pdclab keeps its own throughput when workgpu's is measured
+    assert second == ({"pose": 25}, {"gesture": 12})
+    # a throughput without a node caps every node
+    assert third == ({"pose": 16}, {"gesture": 16})
+
+
+def test_agent_throughput_is_bounded_by_frequency_limit_and_work_ability():
+    class Specs(_Specs):
+        async def get_subscription_info(self, namespace="arha-system"):
+            return {"metadata": {"resourceVersion": "1"}, "spec": {"raw": [
+                *(_agent(port, "pdclab", "pose") for port in range(8888, 8892)),
+                _agent(8888, "workgpu", "gesture"),
+            ]}}
+
+    async def run():
+        strategy = CapacityAwareAdjustmentStrategy(Specs())
+        await strategy.compute_plan(18, node="pdclab")
+        await strategy.compute_plan(12, node="workgpu")
+        raised = await strategy.compute_plan(50, node="pdclab", agents=["10.52.52.111:8888"], services=["pose"])
+        both = await strategy.compute_plan(50, node="workgpu", agents=["10.52.52.111:8888"])
+        reset = await strategy.compute_plan(18, node="pdclab")
+        return raised, both, reset
+
+    raised, both, reset = asyncio.run(run())
+    pose = lambda plan: [plan.for_agent(f"10.52.52.111:{port}").get("pose") for port in range(8888, 8892)]
+    # pdclab's 80 req/s of pose leaves the raised agent 26 above the others' minimum of 15
+    assert pose(raised) == [26, 18, 18, 18]
+    assert raised.for_agent("10.52.52.111:8888")["gesture"] == 12
+    # the gesture stream stops at its frequencyLimit of 20; the pdclab raise is kept
+    assert both.for_agent("10.52.52.111:8888")["gesture"] == 20 and pose(both) == [26, 18, 18, 18]
+    # a throughput for the whole node replaces its agents' own
+    assert pose(reset) == [18, 18, 18, 18]
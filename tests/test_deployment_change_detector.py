@@ -0,0 +1,64 @@
+from domain import DeploymentChangeDetector
+from domain.deployment_change_detector import has_deployment_changed
+
+
+def _spec(*services, connection=0):
+    return {
+        "raw": [
+            {"nodeName": node, "serviceType": svc, "currentConnection": connection}
+            for node, svc in services
+        ]
+    }
+
+
+def test_churn_without_composition_change_is_ignored():
+    detector = DeploymentChangeDetector()
+    base = _spec(("n1", "pose"), ("n1", "gesture"))
+    changed, _ = detector.detect("uid-1", base, old_spec=None, resource_version="1")
+    assert not changed
+
+    # reordered items and a changed connection count keep the same composition
+    churn = _spec(("n1", "gesture"), ("n1", "pose"), connection=5)
+    changed, details = detector.detect("uid-1", churn, old_spec=base, resource_version="2")
+    assert not changed
+    assert details["new_signatures"] == {"n1": "n1:gesture=1,pose=1"}
+
+
+def test_composition_change_matches_full_diff():
+    detector = DeploymentChangeDetector()
+    old = _spec(("n1", "gesture"), ("n1", "gesture"), ("n1", "pose"))
+    new = _spec(("n1", "gesture"), ("n1", "pose"), ("n1", "pose"), ("n2", "pose"))
+
+    changed, details = detector.detect("uid-1", new, old_spec=old, resource_version="7")
+    expected_changed, expected = has_deployment_changed(old, new)
+    assert changed and expected_changed
+    assert details["old_signatures"] == expected["old_signatures"]
+    assert details["new_signatures"] == expected["new_signatures"]
+    assert details["diff"]["changed_nodes"] == expected["diff"]["changed_nodes"]
+    assert details["diff"]["added_nodes"] == ["n2"]
+
+    # the cached composition, not the caller's stale old spec, is the baseline
+    changed, _ = detector.detect("uid-1", new, old_spec=old, resource_version="8")
+    assert not changed
+    # a redelivered resource version is rejected immediately
+    changed, _ = detector.detect("uid-1", old, old_spec=new, resource_version="8")
+    assert not changed
+    changed, details = detector.detect("uid-1", old, old_spec=new, resource_version="9")
+    assert changed
+    assert details["diff"]["removed_nodes"] == ["n2"]
+
+
+def test_uncommitted_change_is_reported_again_on_retry():
+    detector = DeploymentChangeDetector()
+    old = _spec(("n1", "pose"))
+    new = _spec(("n1", "pose"), ("n2", "pose"))
+    detector.detect("uid-1", old, resource_version="1")
+
+    changed, _ = detector.detect("uid-1", new, old_spec=old, resource_version="2", commit=False)
+    assert changed
+    # forwarding failed, so the retry of the same resource version is still a change
+    changed, _ = detector.detect("uid-1", new, old_spec=old, resource_version="2", commit=False)
+    assert changed
+    detector.commit("uid-1")
+    changed, _ = detector.detect("uid-1", new, old_spec=old, resource_version="2", commit=False)
+    assert not changed
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+
+from domain import Event, StateManager
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler
+
+
+class BlockingHandler(DeploymentChangeHandler):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.handled = []
+
+    async def handle(self, event, ctx):
+        self.handled.append(event.payload["hash"])
+        if len(self.handled) == 1:
+            await self.release.wait()
+
+    def partition_keys(self, event):
+        # serialize all nodes so every event during the first one is deferred
+        return None
+
+
+def _event(node, count):
+    return Event(
+        type="DEPLOYMENT_CHANGE",
+        payload={"hash": {"node": node, "services": {"gesture": count}}},
+        timestamp=datetime.utcnow(),
+        source="test",
+    )
+
+
+def _processor(handler, max_pending=100):
+    ctx = Context(None, None, None, None, None, StateManager())
+    processor = EventProcessor(ctx, max_pending=max_pending)
+    processor.register_handler("DEPLOYMENT_CHANGE", handler)
+    return processor
+
+
+def test_events_during_adjusting_are_coalesced_and_replayed():
+    async def run():
+        handler = BlockingHandler()
+        processor = _processor(handler)
+
+        first = asyncio.create_task(processor.process(_event("workgpu", 1)))
+        await asyncio.sleep(0)
+        for count in (2, 3, 4):
+            await processor.process(_event("workgpu", count))
+        await processor.process(_event("pdclab", 1))
+
+        assert processor.pending_events == 2
+        assert processor.coalesced_events == 2
+
+        handler.release.set()
+        await first
+
+        assert [h["services"]["gesture"] for h in handler.handled] == [1, 4, 1]
+        assert [h["node"] for h in handler.handled] == ["workgpu", "workgpu", "pdclab"]
+        assert processor.pending_events == 0
+        assert processor.ctx.state.state.value == "stable"
+
+    asyncio.run(run())
+
+
+def test_pending_queue_drops_oldest_when_full():
+    async def run():
+        handler = BlockingHandler()
+        processor = _processor(handler, max_pending=2)
+
+        first = asyncio.create_task(processor.process(_event("n0", 1)))
+        await asyncio.sleep(0)
+        for node in ("n1", "n2", "n3"):
+            await processor.process(_event(node, 1))
+
+        assert processor.dropped_events == 1
+        handler.release.set()
+        await first
+        assert [h["node"] for h in handler.handled] == ["n0", "n2", "n3"]
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+
+from domain import Event, StateManager
+from application import Context, EventIngestionPipeline, EventProcessor
+from application.handlers import DeploymentChangeHandler
+
+
+class RecordingHandler(DeploymentChangeHandler):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.handled = []
+
+    async def handle(self, event, ctx):
+        await self.release.wait()
+        hash_ = event.payload["hash"]
+        self.handled.append((hash_["node"], hash_["services"]["gesture"]))
+
+
+def _event(node, count):
+    return Event(
+        type="DEPLOYMENT_CHANGE",
+        payload={"hash": {"node": node, "services": {"gesture": count}}},
+        timestamp=datetime.utcnow(),
+        source="test",
+    )
+
+
+def _pipeline(handler, **kwargs):
+    processor = EventProcessor(Context(None, None, None, None, None, StateManager()))
+    processor.register_handler("DEPLOYMENT_CHANGE", handler)
+    return EventIngestionPipeline(processor, **kwargs)
+
+
+def test_submit_returns_before_handling_and_stop_drains():
+    async def run():
+        handler = RecordingHandler()
+        pipeline = _pipeline(handler, workers=2)
+        await asyncio.wait_for(pipeline.submit(_event("workgpu", 1)), 0.5)
+        await pipeline.submit(_event("pdclab", 1))
+        assert handler.handled == []
+
+        handler.release.set()
+        await pipeline.stop()
+        assert sorted(handler.handled) == [("pdclab", 1), ("workgpu", 1)]
+        stats = pipeline.stats()
+        assert stats.enqueued == stats.handled == 2
+        assert stats.queue_depth == 0
+        assert stats.latency_count == 2 and stats.latency_max >= stats.mean_latency > 0
+        assert not pipeline.running
+
+    asyncio.run(run())
+
+
+def test_full_queue_applies_backpressure():
+    async def run():
+        handler = RecordingHandler()
+        pipeline = _pipeline(handler, workers=1, max_queue_size=2)
+        # one event is taken by the worker, two fill the queue
+        for count in (1, 2, 3):
+            await pipeline.submit(_event("workgpu", count))
+            await asyncio.sleep(0)
+
+        blocked = asyncio.create_task(pipeline.submit(_event("workgpu", 4)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert pipeline.stats().max_queue_depth == 2
+
+        handler.release.set()
+        await asyncio.wait_for(blocked, 1)
+        await pipeline.stop()
+        # a single node is handled by one worker in arrival order
+        assert [count for _, count in handler.handled] == [1, 2, 3, 4]
+
+    asyncio.run(run())
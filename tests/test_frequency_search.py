@@ -0,0 +1,94 @@
+import asyncio
+
+from infrastructure.frequency_search import (
+    ExponentialBisectionSearch,
+    LinearFrequencySearch,
+    create_search_strategy,
+)
+from infrastructure.load_test_config import LoadTestConfig
+from infrastructure.load_test_result import FrequencyProbeResult
+from infrastructure.pressure_tester import SimplePressureTester
+
+
+def _capacity_probe(capacity: int):
+    probed = []
+
+    async def probe(frequency: int) -> bool:
+        probed.append(frequency)
+        return frequency <= capacity
+
+    return probe, probed
+
+
+def test_linear_search_walks_in_steps():
+    async def run():
+        probe, probed = _capacity_probe(537)
+        result = await LinearFrequencySearch().search(probe, LoadTestConfig())
+        assert result.max_successful_frequency == 531
+        assert result.probes == len(probed) == 55
+
+    asyncio.run(run())
+
+
+def test_exponential_search_brackets_and_bisects():
+    async def run():
+        probe, probed = _capacity_probe(537)
+        config = LoadTestConfig(search_mode="exponential", search_resolution=10)
+        result = await ExponentialBisectionSearch().search(probe, config)
+        assert 537 - 10 <= result.max_successful_frequency <= 537
+        assert result.probes == len(probed)
+        assert result.probes < 20
+
+    asyncio.run(run())
+
+
+def test_exponential_search_edges():
+    async def run():
+        config = LoadTestConfig(search_mode="exponential", search_resolution=1)
+
+        probe, _ = _capacity_probe(0)
+        result = await ExponentialBisectionSearch().search(probe, config)
+        assert result.max_successful_frequency == 0
+        assert result.probes == 1
+
+        probe, _ = _capacity_probe(5000)
+        result = await ExponentialBisectionSearch().search(probe, config)
+        assert result.max_successful_frequency == config.max_frequency
+
+        probe, _ = _capacity_probe(537)
+        result = await ExponentialBisectionSearch().search(probe, config)
+        assert result.max_successful_frequency == 537
+
+    asyncio.run(run())
+
+
+def test_pressure_tester_uses_configured_search():
+    class FakeExecutor:
+        def __init__(self):
+            self.calls = 0
+
+        async def recover(self, seconds):
+            pass
+
+        async def run_probe(self, agents, frequency, deployment_hash):
+            self.calls += 1
+            return FrequencyProbeResult(frequency, frequency <= 300)
+
+    async def run():
+        executor = FakeExecutor()
+        config = LoadTestConfig(search_mode="exponential", recovery_time=0)
+        tester = SimplePressureTester(config, test_executor=executor)
+        result = await tester._execute_load_test([{"agentIP": "127.0.0.1"}], "node:pose=1")
+        assert 290 <= result <= 300
+        assert executor.calls < 20
+
+    asyncio.run(run())
+
+
+def test_unknown_search_mode():
+    try:
+        create_search_strategy("random")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
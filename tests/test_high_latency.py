@@ -4,9 +4,10 @@ import logging
 
 logging.basicConfig(level=logging.INFO)
 
-from domain import Event, StateManager
+from domain import AimdController, Event, FrequencyPlan, StateManager
 from application import Context, EventProcessor
-from application.handlers import HighLatencyHandler
+from application.handlers import DeploymentChangeHandler, HighLatencyHandler
+from application.handlers.adjustment import PLAN_KEY, suspect_key
 from infrastructure import (
     InMemoryRepository,
     SimplePressureTester,
@@ -50,3 +51,118 @@ def test_high_latency_handler_registration():
         assert state.state.value == "stable"
 
     asyncio.run(run())
+
+
+def test_aimd_controller_cooldown_and_hysteresis():
+    controller = AimdController(high_latency_ms=200, low_latency_ms=100, cooldown=10)
+    key = ("pdclab", None)
+    assert controller.observe(key, 500, now=0) == 0.5
+    # the same spike reported again within the cooldown does not cut twice
+    assert controller.observe(key, 500, now=5) is None
+    # between the thresholds: hold
+    assert controller.observe(key, 150, now=20) is None
+    # healthy, but too soon after the last change
+    assert controller.observe(key, 50, now=5) is None
+    assert controller.observe(key, 50, now=10) == 0.6
+    assert controller.observe(key, 500, now=12) == 0.3
+    for now in (22, 32, 42, 52, 62, 72):
+        controller.increase(key, now)
+    assert controller.scale(key) == 0.9
+    assert controller.increase(key, 82) == 1.0
+    assert controller.reduced() == {}
+
+
+def test_high_latency_cuts_the_node_and_recovers():
+    plan = FrequencyPlan(
+        {"10.0.0.1:8888": {"pose": 30, "gesture": 20}, "10.0.0.2:8888": {"pose": 30}},
+        {"10.0.0.1:8888": {"pose": "pdclab", "gesture": "workgpu"}, "10.0.0.2:8888": {"pose": "pdclab"}},
+    )
+
+    async def run():
+        repo = InMemoryRepository()
+        await repo.set(PLAN_KEY, plan)
+        dispatcher = InMemoryDispatcher()
+        ctx = Context(repo, None, JSONThroughputRepository(), SimpleAdjustmentStrategy(), dispatcher, StateManager())
+        handler = HighLatencyHandler(AimdController(cooldown=0.02, increase_step=0.25))
+        processor = EventProcessor(ctx)
+        processor.register_handler("HIGH_LATENCY", handler)
+
+        await processor.process(Event(
+            type="HIGH_LATENCY",
+            payload={"node": "pdclab", "latency_ms": 800, "hash": "pdclab:pose=2"},
+            timestamp=datetime.utcnow(),
+            source="detector",
+        ))
+        # applied within the event, only to streams served by pdclab
+        assert dispatcher.last_plan.frequencies == {
+            "10.0.0.1:8888": {"pose": 15, "gesture": 20}, "10.0.0.2:8888": {"pose": 15},
+        }
+        assert await repo.get(suspect_key("pdclab:pose=2"))
+        assert handler.recovering
+
+        await asyncio.wait_for(handler._recovery, 2)
+        assert dispatcher.last_plan.frequencies == plan.frequencies
+
+    asyncio.run(run())
+
+
+def test_suspect_record_is_measured_again():
+    class CountingTester:
+        calls = 0
+
+        async def load_test(self, deployment_hash, node=None):
+            self.calls += 1
+            return 42
+
+    async def run():
+        repo = InMemoryRepository()
+        recorder = JSONThroughputRepository()
+        await recorder.save("pdclab:pose=2", 30)
+        await repo.set(suspect_key("pdclab:pose=2"), {"latency_ms": 800})
+        tester = CountingTester()
+        dispatcher = InMemoryDispatcher()
+        ctx = Context(repo, tester, recorder, SimpleAdjustmentStrategy(), dispatcher, StateManager())
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", DeploymentChangeHandler())
+        event = Event(type="DEPLOYMENT_CHANGE", payload={"hash": "pdclab:pose=2"}, timestamp=datetime.utcnow(), source="t")
+
+        await processor.process(event)
+        assert tester.calls == 1 and dispatcher.last_dispatched == 42
+        # the flag is cleared: the new record is trusted again
+        await processor.process(event)
+        assert tester.calls == 1
+
+    asyncio.run(run())
+
+
+def test_later_adjustments_keep_the_latency_cut():
+    dispatcher = InMemoryDispatcher([("10.0.0.1:8888", "pose", "pdclab"), ("10.0.0.2:8888", "gesture", "workgpu")])
+
+    def change(deployment_hash):
+        return Event(type="DEPLOYMENT_CHANGE", payload={"hash": deployment_hash}, timestamp=datetime.utcnow(), source="t")
+
+    async def run():
+        repo = InMemoryRepository()
+        recorder = JSONThroughputRepository()
+        await recorder.save("pdclab:pose=1", 30)
+        await recorder.save("pdclab:pose=2", 40)
+        await recorder.save("workgpu:gesture=1", 24)
+        ctx = Context(repo, None, recorder, SimpleAdjustmentStrategy(), dispatcher, StateManager())
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", DeploymentChangeHandler())
+        processor.register_handler("HIGH_LATENCY", HighLatencyHandler(AimdController(cooldown=60)))
+
+        await processor.process(change("pdclab:pose=1"))
+        await processor.process(change("workgpu:gesture=1"))
+        # the single frequency is stored as a plan the latency handler can scale, one node at a time
+        assert (await repo.get(PLAN_KEY)).frequencies == {"10.0.0.1:8888": {"pose": 30}, "10.0.0.2:8888": {"gesture": 24}}
+        await processor.process(Event(
+            type="HIGH_LATENCY", payload={"node": "pdclab", "latency_ms": 800}, timestamp=datetime.utcnow(), source="t",
+        ))
+        assert dispatcher.last_plan.frequencies == {"10.0.0.1:8888": {"pose": 15}, "10.0.0.2:8888": {"gesture": 24}}
+
+        await processor.process(change("pdclab:pose=2"))
+        assert dispatcher.last_plan.frequencies == {"10.0.0.1:8888": {"pose": 20}, "10.0.0.2:8888": {"gesture": 24}}
+        assert dispatcher.last_dispatched is None
+
+    asyncio.run(run())
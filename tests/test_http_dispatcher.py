@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from domain import FrequencyPlan
+from infrastructure.http_dispatcher import HttpFanOutDispatcher, agent_id
+from tests.stub_agent_server import StubAgentServer
+from utils.metrics import REGISTRY
+
+
+class _Subscriptions:
+    def __init__(self, agents):
+        self.agents = agents
+
+    async def get_subscription_info(self):
+        return {"raw": self.agents}
+
+
+def test_dispatch_fans_out_concurrently_and_skips_unchanged_agents():
+    async def run():
+        servers = [StubAgentServer(latency=0.05) for _ in range(3)]
+        for server in servers:
+            await server.start()
+        agents = [server.agent(serviceType=service) for server, service in zip(servers, ["pose", "gesture", "pose"])]
+        dispatcher = HttpFanOutDispatcher(_Subscriptions(agents), max_parallel=3)
+        try:
+            started = time.perf_counter()
+            await dispatcher.dispatch(30)
+            # three agents, one round trip
+            assert time.perf_counter() - started < 0.14
+            assert [server.requests for server in servers] == [
+                [{"path": "/frequency", "body": {"frequencies": {"pose": 30}}}],
+                [{"path": "/frequency", "body": {"frequencies": {"gesture": 30}}}],
+                [{"path": "/frequency", "body": {"frequencies": {"pose": 30}}}],
+            ]
+
+            await dispatcher.dispatch(30)
+            assert [len(server.requests) for server in servers] == [1, 1, 1]
+
+            plan = FrequencyPlan({
+                agent_id(agents[0]): {"pose": 30},
+                agent_id(agents[1]): {"gesture": 12},
+                agent_id(agents[2]): {"pose": 30},
+            })
+            await dispatcher.dispatch_plan(plan)
+            assert [len(server.requests) for server in servers] == [1, 2, 1]
+            assert servers[1].requests[-1]["body"] == {"frequencies": {"gesture": 12}}
+        finally:
+            await dispatcher.close()
+            for server in servers:
+                await server.stop()
+
+    asyncio.run(run())
+
+
+def test_dispatch_retries_and_resends_to_failed_agents():
+    async def run():
+        flaky = StubAgentServer(failures=2)
+        down = StubAgentServer(failures=4)
+        await flaky.start()
+        await down.start()
+        agents = [flaky.agent(), down.agent()]
+        dispatcher = HttpFanOutDispatcher(_Subscriptions(agents), retries=2, retry_backoff=0.001)
+        try:
+            await dispatcher.dispatch(20)
+            assert len(flaky.requests) == 1
+            assert not down.requests
+            assert agent_id(agents[0]) in dispatcher.applied
+            assert agent_id(agents[1]) not in dispatcher.applied
+
+            # the failed agent is retried on the next dispatch, the other is unchanged
+            await dispatcher.dispatch(20)
+            assert len(flaky.requests) == 1
+            assert down.requests == [{"path": "/frequency", "body": {"frequencies": {"pose": 20}}}]
+        finally:
+            await dispatcher.close()
+            await flaky.stop()
+            await down.stop()
+
+    asyncio.run(run())
+    rendered = REGISTRY.render()
+    assert 'event_handler_agent_push_seconds_count{result="failed"}' in rendered
+    assert "event_handler_dispatch_seconds_bucket" in rendered
@@ -0,0 +1,70 @@
+import asyncio
+
+from infrastructure.frequency_test_executor import FrequencyTestExecutor
+from infrastructure.http_load_driver import HttpAgentLoadSimulator
+from infrastructure.load_test_config import LoadTestConfig
+from tests.stub_agent_server import StubAgentServer
+
+
+def test_http_driver_reuses_pooled_connections():
+    async def run():
+        server = StubAgentServer(latency=0.002)
+        await server.start()
+        simulator = HttpAgentLoadSimulator(request_path="/load", max_connections_per_agent=4)
+        try:
+            result = await simulator.run_load(server.agent(), 0.01, 0.3, "pdclab:pose=1")
+        finally:
+            await simulator.close()
+            await server.stop()
+
+        assert result.passed
+        assert result.succeeded == len(server.requests) > 10
+        assert server.requests[0]["path"] == "/load"
+        assert server.requests[0]["body"]["deploymentHash"] == "pdclab:pose=1"
+        # closed-loop requests on a keep-alive session share one connection
+        assert len(server.peers) == 1
+
+    asyncio.run(run())
+
+
+def test_http_driver_custom_payload_and_bounded_connections():
+    async def run():
+        server = StubAgentServer(latency=0.05)
+        await server.start()
+        simulator = HttpAgentLoadSimulator(
+            pacing="open",
+            max_connections_per_agent=2,
+            payload_factory=lambda agent, deployment_hash: {"frame": agent["serviceType"]},
+        )
+        try:
+            result = await simulator.run_load(server.agent(), 0.01, 0.2, "pdclab:pose=1")
+        finally:
+            await simulator.close()
+            await server.stop()
+
+        assert server.requests[0]["body"] == {"frame": "pose"}
+        assert len(server.peers) <= 2
+        # requests queue for the two pooled connections, so latency grows beyond the service time
+        assert result.latency.maximum > 0.1
+
+    asyncio.run(run())
+
+
+def test_http_probe_fails_when_agent_over_capacity():
+    async def run():
+        server = StubAgentServer(latency=0.05, capacity=1)
+        await server.start()
+        config = LoadTestConfig(load_driver="http", pacing_mode="open", max_test_duration=0.3)
+        executor = FrequencyTestExecutor(config=config)
+        try:
+            assert isinstance(executor.simulator, HttpAgentLoadSimulator)
+            result = await executor.run_probe([server.agent()], 100, "pdclab:pose=1")
+        finally:
+            await executor.close()
+            await server.stop()
+
+        assert not result.passed
+        assert server.rejected > 0
+        assert result.errors >= server.rejected
+
+    asyncio.run(run())
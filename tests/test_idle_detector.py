@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+
+from infrastructure.idle_detector import EwmaAgentStats, IdleDetector
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_batched_ewma_matches_one_sample_at_a_time():
+    batched, single = EwmaAgentStats(alpha=0.3, capacity=2), EwmaAgentStats(alpha=0.3, capacity=2)
+    for index in range(5):
+        stream = (f"10.0.0.{index}:8888", f"node{index % 2}", "pose")
+        batched.slot(stream)
+        single.slot(stream)
+    rng = np.random.default_rng(1)
+    for _ in range(4):
+        slots = rng.integers(0, 5, 50)
+        depths, ratios = rng.random(50) * 3, rng.random(50)
+        batched.update(slots, depths, ratios, now=1.0)
+        for slot, depth, ratio in zip(slots, depths, ratios):
+            single.update(np.array([slot]), np.array([depth]), np.array([ratio]), now=1.0)
+    assert np.allclose(batched.queue_depth, single.queue_depth)
+    assert np.allclose(batched.zero_ratio, single.zero_ratio)
+    assert batched.samples.tolist() == single.samples.tolist()
+    assert batched.nodes == ["node0", "node1"] and batched.node_of[:5].tolist() == [0, 1, 0, 1, 0]
+
+
+def test_idle_agents_emit_one_debounced_event_per_node():
+    clock = _Clock()
+    events = []
+
+    async def emit(event):
+        events.append(event)
+
+    async def run():
+        detector = IdleDetector(emit, min_samples=3, debounce=5, cooldown=20, stale_after=10, clock=clock)
+        for second in range(30):
+            clock.now = float(second)
+            lines = [
+                b"10.0.0.1:8888 pdclab pose 0 1.0",
+                b"10.0.0.2:8888 pdclab pose 0.1 0.95",
+                # busy agent on the same node
+                b"10.0.0.3:8888 pdclab gesture 4 0.1",
+                # workgpu goes idle only for a moment
+                b"10.0.0.1:8888 workgpu gesture %s" % (b"0 1.0" if second in (10, 11) else b"3 0.0"),
+            ]
+            if second < 8:
+                # stops reporting after t=7, so it has gone stale by the second event
+                lines.append(b"10.0.0.4:8888 pdclab hand 0 1.0")
+            detector.feed(b"\n".join(lines) + b"\n")
+            await detector.evaluate()
+
+    asyncio.run(run())
+    # idle from t=2 (third sample), settled at t=7, cooldown until t=27
+    assert len(events) == 2
+    payload = events[0].payload
+    assert events[0].type == "IDLE_SYSTEM"
+    assert payload["node"] == "pdclab"
+    assert payload["agents"] == ["10.0.0.1:8888", "10.0.0.2:8888", "10.0.0.4:8888"]
+    assert payload["services"] == ["hand", "pose"]
+    assert events[1].payload["agents"] == ["10.0.0.1:8888", "10.0.0.2:8888"]
+    assert events[1].payload["services"] == ["pose"]
+
+
+def test_misaligned_lines_do_not_shift_into_other_streams():
+    async def emit(event):
+        return None
+
+    detector = IdleDetector(emit)
+    # ten tokens over two lines, but neither line has five fields
+    assert detector.feed(b"10.0.0.1:8888 pdclab pose 0 1.0 extra\n10.0.0.2:8888 pdclab pose 0\n") == 1
+    assert detector.stats.streams == [("10.0.0.1:8888", "pdclab", "pose")]
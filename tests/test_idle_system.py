@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime
+
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler, IdleSystemHandler
+from application.handlers.adjustment import PLAN_KEY, subset_key, suspect_key
+from domain import Event, FrequencyPlan, StateManager
+from infrastructure import (
+    InMemoryDispatcher,
+    InMemoryRepository,
+    JSONThroughputRepository,
+    SimpleAdjustmentStrategy,
+    SimplePressureTester,
+)
+from infrastructure.idle_detector import IdleDetector
+from infrastructure.load_test_config import LoadTestConfig
+from infrastructure.virtual_load_engine import CapacityModel, VirtualFrequencyTestExecutor
+
+HASH = {"node": "pdclab", "services": {"pose": 2}}
+
+
+class _Subscriptions:
+    async def get_subscription_info(self, namespace="arha-system"):
+        return {"raw": [
+            {"agentIP": "10.0.0.1", "agentPort": 8888, "nodeName": "pdclab", "serviceType": "pose"},
+            {"agentIP": "10.0.0.2", "agentPort": 8888, "nodeName": "pdclab", "serviceType": "pose"},
+            {"agentIP": "10.0.0.1", "agentPort": 8888, "nodeName": "workgpu", "serviceType": "gesture"},
+        ]}
+
+
+class _RecordingExecutor(VirtualFrequencyTestExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.probes = []
+
+    async def run_probe(self, agents, frequency, deployment_hash):
+        self.probes.append((frequency, sorted(agent["nodeName"] for agent in agents)))
+        return await super().run_probe(agents, frequency, deployment_hash)
+
+
+def _context(recorded, capacity=80.0):
+    config = LoadTestConfig(frequency_step=10, idle_probe_steps=3, max_test_duration=5, request_timeout=0.2)
+    executor = _RecordingExecutor(CapacityModel({("pdclab", "pose"): capacity}), config, service_time_jitter=0.0)
+    tester = SimplePressureTester(config, test_executor=executor, k8s_client=_Subscriptions())
+    recorder = JSONThroughputRepository()
+    asyncio.run(recorder.save(HASH, recorded))
+    dispatcher = InMemoryDispatcher([
+        ("10.0.0.1:8888", "pose", "pdclab"), ("10.0.0.2:8888", "pose", "pdclab"), ("10.0.0.1:8888", "gesture", "workgpu"),
+    ])
+    ctx = Context(InMemoryRepository(), tester, recorder, SimpleAdjustmentStrategy(), dispatcher, StateManager())
+    return ctx, executor
+
+
+def _idle(payload):
+    return Event(type="IDLE_SYSTEM", payload=payload, timestamp=datetime.utcnow(), source="detector")
+
+
+def test_idle_probe_starts_at_recorded_throughput_and_raises_it():
+    ctx, executor = _context(recorded=20)
+    clock = iter([0.0, 10.0]).__next__
+
+    async def run():
+        await ctx.repo.set(PLAN_KEY, FrequencyPlan(
+            {"10.0.0.1:8888": {"pose": 20, "gesture": 25}, "10.0.0.2:8888": {"pose": 20}},
+            {"10.0.0.1:8888": {"pose": "pdclab", "gesture": "workgpu"}, "10.0.0.2:8888": {"pose": "pdclab"}},
+        ))
+        processor = EventProcessor(ctx)
+        processor.register_handler("IDLE_SYSTEM", IdleSystemHandler(cooldown=60, clock=clock))
+        await processor.process(_idle({"node": "pdclab", "hash": HASH}))
+        # a second idle report within the cooldown does not probe again
+        await processor.process(_idle({"node": "pdclab", "services": {"pose": 2}}))
+        return await ctx.recorder.get(HASH)
+
+    throughput = asyncio.run(run())
+    # two pose agents share 80 req/s: 40 each still fits, 50 each overloads the node
+    assert [frequency for frequency, _ in executor.probes] == [30, 40, 50]
+    assert all(nodes == ["pdclab", "pdclab"] for _, nodes in executor.probes)
+    assert throughput == 40
+    # only the idle node's streams are raised; workgpu keeps its planned gesture frequency
+    assert ctx.dispatcher.last_plan.frequencies == {"10.0.0.1:8888": {"pose": 40, "gesture": 25}, "10.0.0.2:8888": {"pose": 40}}
+    assert ctx.state.state.value == "stable"
+
+
+def test_idle_probe_keeps_throughput_when_the_first_step_fails():
+    ctx, executor = _context(recorded=38)
+
+    async def run():
+        await IdleSystemHandler().handle(_idle({"node": "pdclab", "hash": HASH}), ctx)
+        return await ctx.recorder.get(HASH)
+
+    assert asyncio.run(run()) == 38
+    assert [frequency for frequency, _ in executor.probes] == [48]
+    assert ctx.dispatcher.last_plan is None
+
+
+def test_idle_probe_skips_unrecorded_and_suspect_deployments():
+    ctx, executor = _context(recorded=20)
+
+    async def run():
+        handler = IdleSystemHandler()
+        await handler.handle(_idle({"node": "workgpu", "hash": {"node": "workgpu", "services": {"gesture": 1}}}), ctx)
+        await ctx.repo.set(suspect_key(HASH), {"latency_ms": 500})
+        await handler.handle(_idle({"node": "pdclab", "hash": HASH}), ctx)
+
+    asyncio.run(run())
+    assert executor.probes == []
+    assert ctx.dispatcher.last_plan is None
+
+
+def test_detected_idle_agents_are_probed_alone_under_the_last_deployment_hash():
+    ctx, executor = _context(recorded=20)
+    now = [0.0]
+
+    async def run():
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", DeploymentChangeHandler())
+        processor.register_handler("IDLE_SYSTEM", IdleSystemHandler(cooldown=60, clock=lambda: now[0]))
+        await processor.process(Event(
+            type="DEPLOYMENT_CHANGE", payload={"hash": HASH}, timestamp=datetime.utcnow(), source="test"
+        ))
+        detector = IdleDetector(processor.process, min_samples=1, debounce=0, cooldown=0, clock=lambda: now[0])
+        detector.feed(b"10.0.0.1:8888 pdclab pose 0 1.0\n10.0.0.2:8888 pdclab pose 3 0.2\n")
+        events = await detector.evaluate()
+        first = ctx.dispatcher.last_plan.frequencies
+        now[0] = 120.0
+        detector.feed(b"10.0.0.1:8888 pdclab pose 0 1.0\n10.0.0.2:8888 pdclab pose 3 0.2\n")
+        await detector.evaluate()
+        return events, first, await ctx.recorder.get(HASH), await ctx.repo.get(subset_key(HASH, ["10.0.0.1:8888"], ["pose"]))
+
+    events, first, throughput, subset = asyncio.run(run())
+    assert events[0].payload["agents"] == ["10.0.0.1:8888"] and events[0].payload["services"] == ["pose"]
+    # one agent alone on the 80 req/s pose server passes every step
+    assert [frequency for frequency, _ in executor.probes[:3]] == [30, 40, 50]
+    assert all(nodes == ["pdclab"] for _, nodes in executor.probes)
+    # only the probed agent is raised; the deployment's record still holds for both agents
+    assert first == {"10.0.0.1:8888": {"pose": 50}, "10.0.0.2:8888": {"pose": 20}}
+    assert throughput == 20
+    # the next probe of the same agents starts from what they sustained alone
+    assert [frequency for frequency, _ in executor.probes[3:]] == [60, 70, 80]
+    assert subset == 80
+    assert ctx.dispatcher.last_plan.frequencies == {"10.0.0.1:8888": {"pose": 80}, "10.0.0.2:8888": {"pose": 20}}
+
+
+def test_load_test_only_loads_the_deployments_node():
+    ctx, executor = _context(recorded=20)
+    asyncio.run(ctx.tester.load_test("pdclab:pose=2", node="pdclab"))
+    assert executor.probes and all(nodes == ["pdclab", "pdclab"] for _, nodes in executor.probes)
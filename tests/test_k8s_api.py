@@ -0,0 +1,195 @@
+import asyncio
+import threading
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from infrastructure.k8s_api import AsyncK8sApi
+from infrastructure.k8s_cr_client import K8sCustomResourceClient
+from infrastructure.k8s_subscription_client import K8sSubscriptionClient
+from tests.fake_k8s_api_server import FakeK8sApiServer
+
+GROUP, VERSION = "ha.example.com", "v1"
+
+
+def _service_info():
+    return {
+        "apiVersion": "ha.example.com/v1",
+        "kind": "Service",
+        "metadata": {"name": "service-info"},
+        "spec": {"raw": [
+            {"nodeName": "pdclab", "serviceType": "pose", "currentFrequency": 30},
+            {"nodeName": "workgpu", "serviceType": "gesture", "currentFrequency": 20},
+        ]},
+    }
+
+
+def test_clients_share_one_async_api():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "default", "services", _service_info())
+        server.put_object(GROUP, VERSION, "arha-system", "subscriptions", {
+            "metadata": {"name": "subscription-info"},
+            "spec": {"raw": [{"agentIP": "10.0.0.1", "agentPort": 8888}]},
+        })
+        api = AsyncK8sApi(server.url)
+        try:
+            cr_client = K8sCustomResourceClient(api)
+            subscriptions = K8sSubscriptionClient(api)
+
+            info = await cr_client.get_service_info()
+            assert info["metadata"]["name"] == "service-info"
+            assert (await subscriptions.get_subscription_info())["raw"][0]["agentPort"] == 8888
+            assert await cr_client.get_custom_resource(GROUP, VERSION, "default", "services", "missing") is None
+            assert len(await cr_client.list_custom_resources(GROUP, VERSION, "default", "services")) == 1
+
+            assert await cr_client.update_service_frequencies({"pose": 10})
+            raw = server.get_object(GROUP, VERSION, "default", "services", "service-info")["spec"]["raw"]
+            assert [item["currentFrequency"] for item in raw] == [10, 20]
+
+            assert await cr_client.delete_custom_resource(GROUP, VERSION, "default", "services", "service-info")
+            with pytest.raises(ApiException) as error:
+                await api.get_namespaced_custom_object(GROUP, VERSION, "default", "services", "service-info")
+            assert error.value.status == 404
+        finally:
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_concurrency_limit_and_timeout():
+    async def run():
+        server = FakeK8sApiServer(latency=0.05)
+        await server.start()
+        server.put_object(GROUP, VERSION, "default", "services", _service_info())
+        api = AsyncK8sApi(server.url, max_concurrency=2, request_timeout=1.0)
+        try:
+            await asyncio.gather(*(
+                api.get_namespaced_custom_object(GROUP, VERSION, "default", "services", "service-info")
+                for _ in range(8)
+            ))
+            assert server.peak_concurrency == 2
+
+            slow = AsyncK8sApi(server.url, request_timeout=0.01)
+            with pytest.raises(asyncio.TimeoutError):
+                await slow.get_namespaced_custom_object(GROUP, VERSION, "default", "services", "service-info")
+            await slow.close()
+        finally:
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_frequency_updates_are_minimal_batched_and_skip_no_ops():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "default", "services", _service_info())
+        api = AsyncK8sApi(server.url)
+        try:
+            cr_client = K8sCustomResourceClient(api)
+
+            assert await cr_client.update_service_frequencies({"pose": 30, "gesture": 20})
+            assert not [r for r in server.requests if r[0] == "PATCH"]
+
+            results = await asyncio.gather(
+                cr_client.update_service_frequencies({"pose": 10}),
+                cr_client.update_service_frequencies({"pose": 15}),
+                cr_client.update_service_frequencies({"gesture": 20}),
+            )
+            assert results == [True, True, True]
+            assert server.patches == [[
+                {"op": "replace", "path": "/metadata/resourceVersion", "value": "1"},
+                {"op": "replace", "path": "/spec/raw/0/currentFrequency", "value": 15},
+            ]]
+        finally:
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_frequency_update_retries_on_conflict():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "default", "services", _service_info())
+        api = AsyncK8sApi(server.url)
+        try:
+            cr_client = K8sCustomResourceClient(api)
+            stale = await cr_client.get_service_info()
+
+            async def stale_service_info(namespace="default"):
+                return stale
+
+            cr_client.get_service_info = stale_service_info
+            changed = _service_info()
+            changed["spec"]["raw"][1]["currentFrequency"] = 25
+            server.put_object(GROUP, VERSION, "default", "services", changed)
+
+            assert await cr_client.update_service_frequencies({"pose": 10})
+            assert [r[0] for r in server.requests].count("PATCH") == 2
+            raw = server.get_object(GROUP, VERSION, "default", "services", "service-info")["spec"]["raw"]
+            assert [item["currentFrequency"] for item in raw] == [10, 25]
+        finally:
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_session_from_a_previous_loop_is_released():
+    api = AsyncK8sApi("http://127.0.0.1:1")
+
+    async def session():
+        return api._ensure_session()
+
+    first = asyncio.run(session())
+    second = asyncio.run(session())
+    # the first loop is closed: its session is detached, nothing is left to close
+    assert second is not first and first.closed
+
+    # a loop still running in another thread closes its own session
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever)
+    thread.start()
+    try:
+        third = asyncio.run_coroutine_threadsafe(session(), other).result(1)
+        connector = third.connector
+
+        async def replace():
+            fourth = api._ensure_session()
+            await api.close()
+            return fourth
+
+        assert asyncio.run(replace()) is not third
+        assert third.closed and connector.closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
+
+
+def test_cancelled_frequency_flush_releases_its_callers():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "default", "services", _service_info())
+        api = AsyncK8sApi(server.url)
+        try:
+            cr_client = K8sCustomResourceClient(api, batch_window=10)
+            waiter = asyncio.create_task(cr_client.update_service_frequencies({"pose": 10}))
+            await asyncio.sleep(0)
+            (flush,) = cr_client._flush_tasks
+            flush.cancel()
+            assert await asyncio.wait_for(waiter, 1) is False
+            assert cr_client._flush_tasks == set() and cr_client._pending_frequencies == {}
+            assert not server.patches
+        finally:
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,143 @@
+import asyncio
+
+from infrastructure.k8s_api import AsyncK8sApi
+from infrastructure.k8s_cr_client import K8sCustomResourceClient
+from infrastructure.k8s_informer import CustomResourceCache, CustomResourceInformer
+from infrastructure.k8s_subscription_client import K8sSubscriptionClient
+from tests.fake_k8s_api_server import FakeK8sApiServer
+
+GROUP, VERSION = "ha.example.com", "v1"
+
+
+def _subscription_info(port):
+    return {"metadata": {"name": "subscription-info"}, "spec": {"raw": [{"agentIP": "10.0.0.1", "agentPort": port}]}}
+
+
+async def _until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_cache_serves_reads_from_memory_and_follows_the_watch():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(8888))
+        server.put_object(GROUP, VERSION, "default", "services", {
+            "metadata": {"name": "service-info"},
+            "spec": {"raw": [{"serviceType": "pose", "currentFrequency": 30}]},
+        })
+        api = AsyncK8sApi(server.url)
+        cache = CustomResourceCache(api)
+        try:
+            subscriptions = K8sSubscriptionClient(api, cache=cache)
+            cr_client = K8sCustomResourceClient(api, cache=cache)
+            for _ in range(5):
+                assert (await subscriptions.get_subscription_info())["raw"][0]["agentPort"] == 8888
+                assert (await cr_client.get_service_info())["spec"]["raw"][0]["currentFrequency"] == 30
+            # one list and one watch per object, however often it is read
+            await _until(lambda: len(server.requests) == 4)
+            for _ in range(5):
+                await subscriptions.get_subscription_info()
+            assert len(server.requests) == 4
+
+            server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(9999))
+            informer = cache.informer(GROUP, VERSION, "arha-system", "subscriptions", "subscription-info")
+            await _until(lambda: informer.object["spec"]["raw"][0]["agentPort"] == 9999)
+            assert (await subscriptions.get_subscription_info())["raw"][0]["agentPort"] == 9999
+            assert informer.resource_version == str(server.resource_version)
+
+            server.delete_object(GROUP, VERSION, "arha-system", "subscriptions", "subscription-info")
+            await _until(lambda: informer.object is None)
+            assert await subscriptions.get_subscription_info() == {}
+        finally:
+            await cache.close()
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_informer_relists_when_the_watch_version_expired():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(1))
+        api = AsyncK8sApi(server.url)
+        informer = CustomResourceInformer(api, GROUP, VERSION, "arha-system", "subscriptions", "subscription-info")
+        try:
+            await informer.get()
+            await informer.stop()
+            # changes missed while disconnected, then compacted away
+            server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(2))
+            server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(3))
+            server.expire_history()
+
+            # still within the freshness bound: served from memory
+            assert (await informer.get())["spec"]["raw"][0]["agentPort"] == 1
+            await _until(lambda: informer.object["spec"]["raw"][0]["agentPort"] == 3)
+            assert informer.resource_version == "3"
+        finally:
+            await informer.stop()
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_stale_cache_relists_before_serving():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(1))
+        api = AsyncK8sApi(server.url)
+        informer = CustomResourceInformer(
+            api, GROUP, VERSION, "arha-system", "subscriptions", "subscription-info", max_staleness=0.0
+        )
+        try:
+            await informer.get()
+            await informer.stop()
+            server.put_object(GROUP, VERSION, "arha-system", "subscriptions", _subscription_info(2))
+            assert (await informer.get())["spec"]["raw"][0]["agentPort"] == 2
+        finally:
+            await informer.stop()
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_frequency_no_op_check_rereads_a_cache_without_a_live_watch():
+    async def run():
+        server = FakeK8sApiServer()
+        await server.start()
+        server.put_object(GROUP, VERSION, "default", "services", {
+            "metadata": {"name": "service-info"},
+            "spec": {"raw": [{"serviceType": "pose", "currentFrequency": 30}]},
+        })
+        api = AsyncK8sApi(server.url)
+        cache = CustomResourceCache(api)
+        try:
+            cr_client = K8sCustomResourceClient(api, cache=cache)
+            await cr_client.get_service_info()
+            informer = cache.informer(GROUP, VERSION, "default", "services", "service-info")
+            await informer.stop()
+            # changed while the watch was down; the cache still says 30
+            server.put_object(GROUP, VERSION, "default", "services", {
+                "metadata": {"name": "service-info"},
+                "spec": {"raw": [{"serviceType": "pose", "currentFrequency": 10}]},
+            })
+            assert await cr_client.update_service_frequencies({"pose": 30})
+            assert server.patches[-1][-1] == {"op": "replace", "path": "/spec/raw/0/currentFrequency", "value": 30}
+            # the PATCH response updates the cache without waiting for the watch
+            assert informer.object["spec"]["raw"][0]["currentFrequency"] == 30
+            assert informer.object["metadata"]["resourceVersion"] == str(server.resource_version)
+        finally:
+            await cache.close()
+            await api.close()
+            await server.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,212 @@
+import asyncio
+import time
+
+import numpy as np
+
+from application import Context, EventProcessor
+from application.handlers import HighLatencyHandler
+from domain import Event, StateManager
+from infrastructure.latency_detector import LatencyDetector, SlidingLatencySketch
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _lines(node, service, latencies):
+    return b"".join(b"%s %s %.1f\n" % (node.encode(), service.encode(), latency) for latency in latencies)
+
+
+def test_sketch_percentiles_slide_out_of_the_window():
+    sketch = SlidingLatencySketch(window=10, slots=10)
+    fast = sketch.key_index(("pdclab", "pose"))
+    slow = sketch.key_index(("workgpu", "pose"))
+    sketch.add(np.full(1000, fast), np.linspace(1, 100, 1000), now=0.5)
+    sketch.add(np.full(10, slow), np.full(10, 400.0), now=0.5)
+
+    p99 = sketch.percentiles(99)
+    assert abs(p99[fast] - 99) / 99 < 0.03
+    assert abs(p99[slow] - 400) / 400 < 0.03
+    assert sketch.counts().tolist() == [1000, 10]
+
+    sketch.add(np.full(10, slow), np.full(10, 5.0), now=9.5)
+    assert sketch.counts().tolist() == [1000, 20]
+    # the first slot has left the window
+    sketch.advance(10.5)
+    assert sketch.counts().tolist() == [0, 10]
+    assert np.isnan(sketch.percentiles(99)[fast])
+    assert abs(sketch.percentiles(99)[slow] - 5) / 5 < 0.03
+
+
+def test_sustained_breach_emits_one_event_per_sustain_period():
+    clock = _Clock()
+    events = []
+
+    async def emit(event):
+        events.append(event)
+
+    async def run():
+        detector = LatencyDetector(emit, threshold_ms=200, sustain=3, window=10, slots=10, min_samples=50, clock=clock)
+        for second in range(10):
+            clock.now = float(second)
+            detector.feed(_lines("pdclab", "pose", [20.0] * 95 + [450.0] * 5))
+            detector.feed(_lines("workgpu", "gesture", [20.0] * 100))
+            # a malformed line does not drop the rest of the chunk
+            detector.feed(b"workgpu gesture fast\nworkgpu gesture 30\n")
+            await detector.evaluate()
+
+    asyncio.run(run())
+    # the breach starts at t=0 and is sustained at t=3, then repeats at t=6 and t=9
+    assert [event.payload["node"] for event in events] == ["pdclab"] * 3
+    payload = events[0].payload
+    assert events[0].type == "HIGH_LATENCY"
+    assert payload["service"] == "pose" and abs(payload["latency_ms"] - 450) / 450 < 0.03
+    assert payload["samples"] == 400 and payload["percentile"] == 99.0
+
+
+def test_short_spikes_and_sparse_keys_do_not_emit():
+    clock = _Clock()
+    events = []
+
+    async def emit(event):
+        events.append(event)
+
+    async def run():
+        detector = LatencyDetector(emit, threshold_ms=200, sustain=3, window=2, slots=2, min_samples=50, clock=clock)
+        for second in range(8):
+            clock.now = float(second)
+            slow = 10 if second in (1, 2) else 0
+            detector.feed(_lines("pdclab", "pose", [20.0] * (100 - slow) + [500.0] * slow))
+            detector.feed(_lines("workgpu", "pose", [900.0] * 5))
+            await detector.evaluate()
+
+    asyncio.run(run())
+    assert events == []
+
+
+def test_tailed_samples_reach_the_high_latency_handler(tmp_path):
+    path = tmp_path / "latency.log"
+    path.write_bytes(b"")
+
+    class RecordingHandler(HighLatencyHandler):
+        def __init__(self):
+            super().__init__()
+            self.seen = []
+
+        async def handle(self, event: Event, ctx: Context) -> None:
+            self.seen.append(event.payload)
+
+    async def run():
+        handler = RecordingHandler()
+        processor = EventProcessor(Context(None, None, None, None, None, StateManager()))
+        processor.register_handler("HIGH_LATENCY", handler)
+        detector = LatencyDetector(processor.process, sustain=0, window=60, slots=1, min_samples=10)
+        await detector.tail(str(path), poll_interval=0.01)
+        await asyncio.sleep(0.05)
+        with open(path, "ab") as sink:
+            sink.write(_lines("pdclab", "pose", [300.0] * 20))
+            sink.write(b"pdclab pose 30")
+        for _ in range(100):
+            if len(detector.sketch.keys):
+                break
+            await asyncio.sleep(0.01)
+        await detector.evaluate()
+        await detector.close()
+        return handler.seen, detector.sketch.counts().tolist()
+
+    seen, counts = asyncio.run(run())
+    # the unterminated last line waits for its newline
+    assert counts == [20]
+    assert [(payload["node"], payload["service"]) for payload in seen] == [("pdclab", "pose")]
+
+
+def test_feed_sustains_100k_samples_per_second():
+    async def emit(event):
+        return None
+
+    detector = LatencyDetector(emit)
+    chunks = [
+        b"".join(b"node%d svc%d %.1f\n" % (i % 40, i % 3, (i % 250) * 1.1) for i in range(start, start + 2000))
+        for start in range(0, 200_000, 2000)
+    ]
+    started = time.perf_counter()
+    samples = sum(detector.feed(chunk) for chunk in chunks)
+    elapsed = time.perf_counter() - started
+    assert samples == 200_000
+    assert samples / elapsed > 100_000
+
+
+def test_non_finite_latencies_are_dropped_and_the_stream_keeps_going():
+    async def emit(event):
+        return None
+
+    class Reader:
+        def __init__(self, chunks):
+            self.chunks = list(chunks)
+
+        async def read(self, size):
+            return self.chunks.pop(0) if self.chunks else b""
+
+    async def run():
+        detector = LatencyDetector(emit, min_samples=1)
+        assert detector.feed(b"pdclab pose nan\npdclab pose 20\npdclab pose inf\n") == 1
+        detector.record("pdclab", "pose", float("nan"))
+
+        failing = LatencyDetector(emit)
+        calls = []
+
+        def feed(data):
+            calls.append(data)
+            raise RuntimeError("bad chunk")
+
+        failing.feed = feed
+        await failing.consume(Reader([b"a b 1\n", b"a b 2\n"]))
+        return detector.sketch.counts().tolist(), calls
+
+    counts, calls = asyncio.run(run())
+    assert counts == [1]
+    # the failing chunk is logged and the next one is still fed
+    assert calls == [b"a b 1\n", b"a b 2\n"]
+
+
+def test_tailing_a_backlog_yields_to_the_event_loop(tmp_path):
+    path = tmp_path / "latency.log"
+    path.write_bytes(_lines("pdclab", "pose", [20.0] * 20_000))
+
+    async def emit(event):
+        return None
+
+    async def run():
+        detector = LatencyDetector(emit)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await detector.tail(str(path), poll_interval=0.01, from_start=True)
+        while detector.sketch.counts().sum() < 20_000:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await detector.close()
+        return ticks
+
+    # the backlog spans several chunks, and other tasks run between them
+    assert asyncio.run(run()) > 3
+
+
+def test_misaligned_lines_do_not_shift_into_other_keys():
+    async def emit(event):
+        return None
+
+    detector = LatencyDetector(emit)
+    # six tokens over two lines, but neither line has three fields
+    assert detector.feed(b"n1 s1 5 extra\nn2 10\n") == 1
+    assert detector.sketch.keys == [("n1", "s1")]
@@ -0,0 +1,74 @@
+import asyncio
+import random
+
+from infrastructure.agent_load_simulator import AgentLoadSimulator
+from infrastructure.frequency_test_executor import FrequencyTestExecutor
+from infrastructure.latency_histogram import LatencyHistogram
+from infrastructure.load_test_config import LoadTestConfig
+
+
+def test_histogram_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.uniform(0.001, 0.2) for _ in range(10000)]
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    values.sort()
+    for percentile in (50, 95, 99):
+        exact = values[int(len(values) * percentile / 100) - 1]
+        assert abs(histogram.percentile(percentile) - exact) / exact < 0.02
+    assert histogram.count == 10000
+    assert LatencyHistogram().percentile(99) is None
+
+
+def test_histogram_merge_matches_single_histogram():
+    left, right, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for index in range(1, 1001):
+        value = index / 10000
+        (left if index % 2 else right).record(value)
+        combined.record(value)
+    left.merge(right)
+    assert left.count == combined.count
+    assert left.p99 == combined.p99
+    assert left.maximum == combined.maximum
+
+    try:
+        left.merge(LatencyHistogram(growth=1.1))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+class FixedLatencySimulator(AgentLoadSimulator):
+    def __init__(self, latency):
+        super().__init__(pacing="open")
+        self.latency = latency
+
+    async def _send_request(self, agent, deployment_hash):
+        await asyncio.sleep(self.latency)
+
+
+def test_probe_result_and_latency_slo():
+    agents = [
+        {"agentIP": "a", "serviceType": "pose"},
+        {"agentIP": "b", "serviceType": "gesture"},
+    ]
+
+    async def run():
+        config = LoadTestConfig(max_test_duration=0.3)
+        result = await FrequencyTestExecutor(FixedLatencySimulator(0.03), config).run_probe(
+            agents, 50, "node:gesture=1,pose=1"
+        )
+        assert result.passed
+        assert result.errors == 0
+        assert 0.03 <= result.latency.p50 < 0.05
+        assert set(result.service_latency()) == {"pose", "gesture"}
+        assert result.summary()["p99"] >= result.summary()["p50"]
+
+        config = LoadTestConfig(max_test_duration=0.3, latency_slo_ms=20)
+        result = await FrequencyTestExecutor(FixedLatencySimulator(0.03), config).run_probe(
+            agents, 50, "node:gesture=1,pose=1"
+        )
+        assert not result.passed
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+
+import aiohttp
+
+from domain import Event, StateManager
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler
+from infrastructure import InMemoryDispatcher, JSONThroughputRepository, MetricsServer, SimpleAdjustmentStrategy
+from utils.metrics import REGISTRY, MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    events = registry.counter("events_total", "Events", ["type"])
+    events.labels("A").inc()
+    events.labels("A").inc(2)
+    registry.gauge("depth", "Depth").set(3)
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert '# TYPE events_total counter\nevents_total{type="A"} 3\n' in text
+    assert "depth 3\n" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_count 3\n" in text
+    # asking again returns the same metric
+    assert registry.counter("events_total", "Events", ["type"]) is events
+
+
+def test_pipeline_is_instrumented_and_served():
+    async def run():
+        lookups = REGISTRY.get("event_handler_throughput_lookups_total").labels("hit")
+        handled = REGISTRY.get("event_handler_handle_seconds").labels("DEPLOYMENT_CHANGE")
+        before_lookups, before_handled = lookups.value, handled.count
+
+        key = {"node": "n1", "services": {"pose": 1}}
+        recorder = JSONThroughputRepository()
+        await recorder.save(key, 50)
+        ctx = Context(None, None, recorder, SimpleAdjustmentStrategy(), InMemoryDispatcher(), StateManager())
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", DeploymentChangeHandler())
+        await processor.process(Event("DEPLOYMENT_CHANGE", {"hash": key}, datetime.utcnow(), "test"))
+
+        assert lookups.value == before_lookups + 1
+        assert handled.count == before_handled + 1
+
+        server = MetricsServer(host="127.0.0.1", port=0)
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                    assert response.status == 200
+                    body = await response.text()
+        finally:
+            await server.stop()
+        assert 'event_handler_throughput_lookups_total{result="hit"}' in body
+        assert 'event_handler_throughput_repository_seconds_count{backend="json",op="get"}' in body
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import asyncio
+
+from infrastructure.agent_load_simulator import AgentLoadSimulator
+from infrastructure.frequency_test_executor import FrequencyTestExecutor
+from infrastructure.load_test_config import LoadTestConfig
+from infrastructure.pressure_tester import SimplePressureTester
+
+
+class SlowAgentSimulator(AgentLoadSimulator):
+    """Every request takes 20 ms, comparable to the 25 ms send interval."""
+
+    async def _send_request(self, agent, deployment_hash):
+        await asyncio.sleep(0.02)
+
+
+def test_closed_loop_undershoots_target_rate():
+    async def run():
+        simulator = SlowAgentSimulator(pacing="closed")
+        result = await simulator.run_load({"agentIP": "a"}, 1 / 40, 0.5, "node:pose=1")
+        assert result.target_rate == 40
+        assert result.achieved_rate < 30
+
+    asyncio.run(run())
+
+
+def test_open_loop_sustains_target_rate():
+    async def run():
+        simulator = SlowAgentSimulator(pacing="open")
+        result = await simulator.run_load({"agentIP": "a"}, 1 / 40, 0.5, "node:pose=1")
+        assert result.sent == 20
+        assert result.completed == 20
+        assert 35 <= result.achieved_rate <= 40
+        assert result.passed
+        # latency is measured from the scheduled start time
+        assert result.mean_latency >= 0.02
+
+    asyncio.run(run())
+
+
+def test_open_loop_counts_dropped_requests_as_failures():
+    class StuckSimulator(AgentLoadSimulator):
+        async def _send_request(self, agent, deployment_hash):
+            await asyncio.sleep(0.3)
+
+    async def run():
+        simulator = StuckSimulator(pacing="open", max_in_flight=2)
+        result = await simulator.run_load({"agentIP": "a"}, 0.01, 0.1, "node:pose=1")
+        assert result.sent == 2
+        assert result.dropped == 8
+        assert not result.passed
+
+    asyncio.run(run())
+
+
+def test_executor_reports_sustained_frequency():
+    async def run():
+        config = LoadTestConfig(pacing_mode="open", max_test_duration=0.5)
+        executor = FrequencyTestExecutor(SlowAgentSimulator(pacing="open"), config)
+        result = await executor.run_probe([{"agentIP": "a"}, {"agentIP": "b"}], 40, "node:pose=1")
+        assert result.passed
+        assert len(result.agents) == 2
+        assert 35 <= result.sustained_frequency <= 40
+
+    asyncio.run(run())
+
+
+def test_closed_loop_records_the_passing_target():
+    class Subscriptions:
+        async def get_subscription_info(self):
+            return {"raw": [{"agentIP": "a", "agentPort": 1, "nodeName": "node", "serviceType": "pose"}]}
+
+    async def run():
+        config = LoadTestConfig(pacing_mode="closed", max_test_duration=0.3, frequency_step=10, idle_probe_steps=1)
+        executor = FrequencyTestExecutor(SlowAgentSimulator(pacing="closed"), config)
+        tester = SimplePressureTester(config, test_executor=executor, k8s_client=Subscriptions())
+        return await tester.probe_capacity("node:pose=1", 30)
+
+    # closed pacing achieves well under 40 req/s with 20 ms requests, but 40 passed
+    assert asyncio.run(run()) == 40
@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime
+
+from domain import AimdController, Event, StateManager
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler, HighLatencyHandler
+from application.handlers.adjustment import PLAN_KEY, apply_throughput
+from infrastructure import InMemoryDispatcher, InMemoryRepository, SimpleAdjustmentStrategy
+
+
+class GatedHandler(DeploymentChangeHandler):
+    def __init__(self):
+        super().__init__()
+        self.gates = {}
+        self.handled = []
+
+    async def handle(self, event, ctx):
+        node = event.payload["hash"]["node"]
+        self.handled.append((node, event.payload["hash"]["services"]["gesture"]))
+        gate = self.gates.get(node)
+        if gate is not None:
+            await gate.wait()
+
+
+def _event(node, count):
+    return Event(
+        type="DEPLOYMENT_CHANGE",
+        payload={"hash": {"node": node, "services": {"gesture": count}}},
+        timestamp=datetime.utcnow(),
+        source="test",
+    )
+
+
+def test_disjoint_partitions_adjust_concurrently():
+    async def run():
+        handler = GatedHandler()
+        handler.gates["pdclab"] = asyncio.Event()
+        state = StateManager()
+        processor = EventProcessor(Context(None, None, None, None, None, state))
+        processor.register_handler("DEPLOYMENT_CHANGE", handler)
+
+        blocked = asyncio.create_task(processor.process(_event("pdclab", 1)))
+        await asyncio.sleep(0)
+        # workgpu is not held up by the running pdclab adjustment
+        await processor.process(_event("workgpu", 1))
+        assert handler.handled == [("pdclab", 1), ("workgpu", 1)]
+
+        # a second pdclab event waits for its partition
+        await processor.process(_event("pdclab", 2))
+        assert processor.pending_events == 1
+        assert state.partition_state("pdclab").value == "adjusting"
+        assert state.partition_state("workgpu").value == "stable"
+
+        handler.gates["pdclab"].set()
+        await blocked
+        assert handler.handled[-1] == ("pdclab", 2)
+        assert state.state.value == "stable"
+
+    asyncio.run(run())
+
+
+def test_multi_key_claims_are_all_or_nothing():
+    async def run():
+        state = StateManager()
+        assert await state.try_enter_adjusting({"a"})
+        assert not await state.try_enter_adjusting({"a", "b"})
+        # the failed claim must not hold "b"
+        assert await state.try_enter_adjusting({"b"})
+        assert not await state.try_enter_adjusting()
+
+        waiter = asyncio.create_task(state.enter_adjusting({"b", "a"}))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await state.exit_adjusting({"a"})
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await state.exit_adjusting({"b"})
+        await asyncio.wait_for(waiter, 1)
+        assert state.partition_state("a").value == "adjusting"
+
+        await state.exit_adjusting({"a", "b"})
+        assert await state.try_enter_adjusting()
+        assert not await state.try_enter_adjusting({"c"})
+
+    asyncio.run(run())
+
+
+def test_partition_released_outside_the_processor_drains_pending_events():
+    async def run():
+        handler = GatedHandler()
+        state = StateManager()
+        processor = EventProcessor(Context(None, None, None, None, None, state))
+        processor.register_handler("DEPLOYMENT_CHANGE", handler)
+
+        # e.g. a background confirmation holding the node
+        await state.enter_adjusting({"pdclab"})
+        await processor.process(_event("pdclab", 1))
+        assert processor.pending_events == 1 and handler.handled == []
+
+        await state.exit_adjusting({"pdclab"})
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert handler.handled == [("pdclab", 1)]
+        assert processor.pending_events == 0
+        assert state.state.value == "stable"
+
+    asyncio.run(run())
+
+
+def test_deployment_changes_claim_only_their_node():
+    handler = DeploymentChangeHandler()
+    assert handler.partition_keys(_event("pdclab", 1)) == frozenset(["pdclab"])
+    assert handler.coalesce_key(_event("pdclab", 1)) == "pdclab"
+    # a hash without a node still claims the whole system
+    assert handler.partition_keys(Event(
+        type="DEPLOYMENT_CHANGE", payload={"hash": {"services": {"pose": 1}}}, timestamp=datetime.utcnow(), source="t",
+    )) is None
+
+
+class _SlowDispatcher(InMemoryDispatcher):
+    """Yields mid-dispatch, as an HTTP fan-out would."""
+
+    def __init__(self):
+        super().__init__([("10.0.0.1:8888", "pose", "pdclab"), ("10.0.0.2:8888", "gesture", "workgpu")])
+        self.plans = []
+
+    async def dispatch_plan(self, plan):
+        await asyncio.sleep(0.01)
+        await super().dispatch_plan(plan)
+        self.plans.append(plan.frequencies)
+
+
+def test_concurrent_node_adjustments_do_not_lose_plan_updates():
+    async def run():
+        dispatcher = _SlowDispatcher()
+        ctx = Context(InMemoryRepository(), None, None, SimpleAdjustmentStrategy(), dispatcher, StateManager())
+        await asyncio.gather(apply_throughput(30, ctx, node="pdclab"), apply_throughput(40, ctx, node="workgpu"))
+        stored = (await ctx.repo.get(PLAN_KEY)).frequencies
+        assert stored == {"10.0.0.1:8888": {"pose": 30}, "10.0.0.2:8888": {"gesture": 40}}
+        assert dispatcher.last_plan.frequencies == stored
+
+        # a latency cut racing an adjustment of another node still ends up dispatched
+        handler = HighLatencyHandler(AimdController(cooldown=60))
+        await asyncio.gather(
+            apply_throughput(24, ctx, node="workgpu"),
+            handler.handle(Event(
+                type="HIGH_LATENCY", payload={"node": "pdclab", "latency_ms": 800},
+                timestamp=datetime.utcnow(), source="test",
+            ), ctx),
+        )
+        assert dispatcher.last_plan.frequencies == {"10.0.0.1:8888": {"pose": 15}, "10.0.0.2:8888": {"gesture": 24}}
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from infrastructure.agent_load_simulator import AgentLoadSimulator
+from infrastructure.frequency_test_executor import FrequencyTestExecutor
+from infrastructure.load_test_config import LoadTestConfig
+from infrastructure.sequential_verdict import SequentialProbabilityRatioTest, StreamingVerdict
+
+
+class FixedOutcomeSimulator(AgentLoadSimulator):
+    def __init__(self, succeed: bool):
+        super().__init__()
+        self.succeed = succeed
+
+    async def _send_request(self, agent, deployment_hash):
+        await asyncio.sleep(0)
+        if not self.succeed:
+            raise Exception("fail")
+
+
+def test_sprt_decides_both_ways():
+    passing = SequentialProbabilityRatioTest(threshold=0.9, confidence=0.95)
+    for _ in range(200):
+        if passing.record(True) is not None:
+            break
+    assert passing.verdict is True
+    assert passing.successes < 100
+
+    failing = SequentialProbabilityRatioTest(threshold=0.9, confidence=0.95)
+    for _ in range(200):
+        if failing.record(False) is not None:
+            break
+    assert failing.verdict is False
+    assert failing.failures < 10
+
+
+def test_streaming_verdict_follows_agent_quorum():
+    verdict = StreamingVerdict(range(5), 0.8, 0.9, 0.95)
+    for _ in range(50):
+        verdict.record(0, False)
+    # one failing agent out of five is tolerated
+    assert verdict.verdict is None
+    for _ in range(50):
+        verdict.record(1, False)
+    assert verdict.verdict is False
+
+
+def test_sequential_mode_stops_early():
+    async def run():
+        config = LoadTestConfig(verdict_mode="sequential", max_test_duration=5, min_test_duration=0.5)
+        agents = [{"agentIP": "10.0.0.1"}, {"agentIP": "10.0.0.2"}]
+
+        executor = FrequencyTestExecutor(FixedOutcomeSimulator(succeed=True), config)
+        started = time.monotonic()
+        assert await executor.test_frequency(agents, 200, "node:pose=1") is True
+        assert 0.5 <= time.monotonic() - started < 2
+
+        executor = FrequencyTestExecutor(FixedOutcomeSimulator(succeed=False), config)
+        started = time.monotonic()
+        assert await executor.test_frequency(agents, 200, "node:pose=1") is False
+        assert time.monotonic() - started < 1
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+import asyncio
+
+from infrastructure.sqlite_throughput_repository import SQLiteThroughputRepository
+
+
+def test_sqlite_repository_matches_category_semantics(tmp_path):
+    async def run():
+        recorder = SQLiteThroughputRepository(str(tmp_path / "throughput.db"))
+        key = {"node": "node1", "services": {"pose": 1, "gesture": 2}}
+        await recorder.save(key, 20, "pose")
+        assert await recorder.get("node1:gesture=2,pose=1", "pose") == 20
+        # a single category is returned when no category is requested
+        assert await recorder.get(key) == 20
+        await recorder.save(key, 30, "gesture")
+        assert await recorder.get(key) is None
+        assert await recorder.get(key, "gesture") == 30
+
+        await recorder.save({"node": "simple", "services": {}}, 99)
+        assert await recorder.get("simple") == 99
+        assert await recorder.get("simple", "pose") is None
+        assert await recorder.get("missing") is None
+        await recorder.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_repository_history_bulk_and_persistence(tmp_path):
+    path = str(tmp_path / "throughput.db")
+
+    async def write():
+        recorder = SQLiteThroughputRepository(path)
+        for value in (10, 15, 12):
+            await recorder.save("node1:pose=1", value, "pose")
+        for count in range(1, 1201):
+            await recorder.save({"node": "node2", "services": {"gesture": count}}, count, "gesture")
+        await recorder.close()
+
+    async def read():
+        recorder = SQLiteThroughputRepository(path)
+        assert await recorder.get("node1:pose=1", "pose") == 12
+        assert [value for _, value in await recorder.history("node1:pose=1", "pose")] == [10, 15, 12]
+
+        keys = [{"node": "node2", "services": {"gesture": count}} for count in range(1, 1201)]
+        values = await recorder.get_many(keys + ["node2:gesture=9999"], "gesture")
+        assert values["node2:gesture=600"] == 600
+        assert values["node2:gesture=9999"] is None
+        assert len(values) == 1201
+        await recorder.close()
+
+    asyncio.run(write())
+    asyncio.run(read())
+
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime
+
+from domain import Event, StateManager
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler
+from application.handlers.adjustment import deployment_key
+from infrastructure import (
+    InMemoryRepository,
+    JSONThroughputRepository,
+    SimpleAdjustmentStrategy,
+    InMemoryDispatcher,
+    NearestNeighbourThroughputEstimator,
+)
+
+sample_data = {
+    "workergpu:gesture=2": 40,
+    "workergpu:gesture=3": 30,
+    "workergpu:gesture=2,pose=1": 25,
+    "pdclab:pose=1": 50,
+}
+
+
+def test_estimator_extrapolates_along_one_service():
+    async def run():
+        estimator = NearestNeighbourThroughputEstimator(JSONThroughputRepository(initial_data=sample_data))
+        estimate = await estimator.estimate({"node": "workergpu", "services": {"gesture": 4}})
+        assert estimate.throughput == 20
+        assert 0.5 < estimate.confidence < 0.9
+
+        exact = await estimator.estimate("workergpu:gesture=3")
+        assert (exact.throughput, exact.confidence) == (30, 1.0)
+
+        assert await estimator.estimate("unknown:gesture=1") is None
+
+        await estimator.observe("workergpu:gesture=4", 22)
+        assert (await estimator.estimate("workergpu:gesture=4")).throughput == 22
+
+    asyncio.run(run())
+
+
+def test_estimator_tolerates_unnormalized_and_malformed_keys():
+    async def run():
+        recorder = JSONThroughputRepository(initial_data={
+            "n:gesture=0,pose=1": 40,
+            "n:pose=x": 10,
+            "n:pose=3": 20,
+        })
+        estimator = NearestNeighbourThroughputEstimator(recorder)
+        estimate = await estimator.estimate("n:pose=1")
+        assert (estimate.throughput, estimate.confidence) == (40, 1.0)
+
+    asyncio.run(run())
+
+
+def test_estimator_index_scales_to_many_records():
+    async def run():
+        data = {
+            f"node{n}:gesture={g},pose={p}": 100 - g - p
+            for n in range(3) for g in range(1, 40) for p in range(1, 40)
+        }
+        estimator = NearestNeighbourThroughputEstimator(JSONThroughputRepository(initial_data=data))
+        estimate = await estimator.estimate("node1:gesture=45,pose=10")
+        assert estimate is not None
+        assert all(key.startswith("node1:") for key in estimate.neighbours)
+        assert estimate.throughput == 45
+
+    asyncio.run(run())
+
+
+def test_handler_applies_estimate_then_confirms_in_background():
+    class CountingTester:
+        def __init__(self):
+            self.calls = []
+
+        async def load_test(self, deployment_hash, node=None):
+            self.calls.append(deployment_hash)
+            return 21
+
+    async def run():
+        recorder = JSONThroughputRepository(initial_data=sample_data)
+        tester = CountingTester()
+        dispatcher = InMemoryDispatcher()
+        dispatched = []
+        original = dispatcher.dispatch
+
+        async def record_dispatch(frequency):
+            dispatched.append(frequency)
+            await original(frequency)
+
+        dispatcher.dispatch = record_dispatch
+        ctx = Context(
+            InMemoryRepository(), tester, recorder, SimpleAdjustmentStrategy(), dispatcher,
+            StateManager(), NearestNeighbourThroughputEstimator(recorder),
+        )
+        handler = DeploymentChangeHandler()
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", handler)
+
+        deployment_hash = {"node": "workergpu", "services": {"gesture": 4}}
+        await processor.process(Event("DEPLOYMENT_CHANGE", {"hash": deployment_hash}, datetime.utcnow(), "test"))
+        assert dispatched == [20]
+
+        await asyncio.gather(*handler.pending_confirmations)
+        # finished confirmations are not kept around
+        assert handler._confirmations == {}
+        assert tester.calls == [deployment_hash]
+        assert dispatched == [20, 21]
+        assert await recorder.get(deployment_hash) == 21
+        assert ctx.state.state.value == "stable"
+
+    asyncio.run(run())
+
+
+def test_confirmation_is_dropped_when_a_newer_deployment_arrives():
+    class GatedTester:
+        def __init__(self):
+            self.calls = []
+            self.gate = asyncio.Event()
+
+        async def load_test(self, deployment_hash, node=None):
+            self.calls.append(deployment_hash)
+            await self.gate.wait()
+            return 21
+
+    async def run():
+        recorder = JSONThroughputRepository(initial_data=sample_data)
+        tester = GatedTester()
+        dispatcher = InMemoryDispatcher()
+        ctx = Context(
+            InMemoryRepository(), tester, recorder, SimpleAdjustmentStrategy(), dispatcher,
+            StateManager(), NearestNeighbourThroughputEstimator(recorder),
+        )
+        handler = DeploymentChangeHandler()
+        processor = EventProcessor(ctx)
+        processor.register_handler("DEPLOYMENT_CHANGE", handler)
+
+        old = {"node": "workergpu", "services": {"gesture": 4}}
+        await processor.process(Event("DEPLOYMENT_CHANGE", {"hash": old}, datetime.utcnow(), "test"))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert tester.calls == [old]
+        # the node moves on while the confirming load test runs
+        await ctx.repo.set(deployment_key("workergpu"), "workergpu:gesture=3")
+        await dispatcher.dispatch(30)
+        tester.gate.set()
+        await asyncio.gather(*handler.pending_confirmations)
+        return dispatcher.last_dispatched
+
+    # the old hash's result is recorded but not dispatched over the current deployment
+    assert asyncio.run(run()) == 30
@@ -1,4 +1,5 @@
 import asyncio
+import json
 
 from infrastructure.throughput_repository import JSONThroughputRepository
 
@@ -50,3 +51,57 @@ def test_throughput_recorder_key_normalization():
         assert await recorder.get(key_norm, "pose") == 99
 
     asyncio.run(run())
+
+
+def test_throughput_recorder_journal_roundtrip(tmp_path):
+    path = tmp_path / "throughput.json"
+
+    async def write():
+        recorder = JSONThroughputRepository(file_path=str(path), flush_interval=0)
+        key = {"node": "node1", "services": {"pose": 1, "gesture": 2}}
+        await recorder.save(key, 20, "pose")
+        await recorder.save(key, 30, "gesture")
+        await recorder.save({"node": "simple", "services": {}}, 99)
+        await recorder.close()
+
+    async def read():
+        recorder = JSONThroughputRepository(file_path=str(path))
+        assert await recorder.get({"node": "node1", "services": {"gesture": 2, "pose": 1}}, "pose") == 20
+        assert await recorder.get("node1:pose=1,gesture=2", "gesture") == 30
+        assert await recorder.get({"node": "simple", "services": {}}) == 99
+
+    asyncio.run(write())
+    # saves are journaled; the snapshot is only written on compaction
+    assert not path.exists()
+    assert len((tmp_path / "throughput.json.journal").read_text().splitlines()) == 3
+    asyncio.run(read())
+
+
+def test_throughput_recorder_compaction_and_torn_journal(tmp_path):
+    path = tmp_path / "throughput.json"
+    journal = tmp_path / "throughput.json.journal"
+    path.write_text(json.dumps({"node2:gesture=2": {"gesture": {"throughput": 38}}}))
+
+    async def write():
+        recorder = JSONThroughputRepository(file_path=str(path), compact_every=3)
+        for value in range(5):
+            await recorder.save("node1:pose=1", value, "pose")
+        await recorder.compact()
+        await recorder.save("node1:pose=2", 7, "pose")
+        await recorder.close()
+
+    asyncio.run(write())
+    snapshot = json.loads(path.read_text())
+    assert snapshot["node1:pose=1"]["pose"]["throughput"] == 4
+    assert snapshot["node2:gesture=2"]["gesture"]["throughput"] == 38
+    assert len(journal.read_text().splitlines()) == 1
+
+    with journal.open("a") as handle:
+        handle.write('{"key": "node1:pose=2", "thro')
+
+    async def read():
+        recorder = JSONThroughputRepository(file_path=str(path))
+        assert await recorder.get("node1:pose=2", "pose") == 7
+        assert await recorder.get("node1:pose=1", "pose") == 4
+
+    asyncio.run(read())
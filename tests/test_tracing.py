@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+
+from domain import Event, StateManager
+from application import Context, EventProcessor
+from application.handlers import DeploymentChangeHandler
+from infrastructure import InMemoryDispatcher, JSONThroughputRepository, SimpleAdjustmentStrategy
+from infrastructure.otlp_span_exporter import to_otlp
+from utils import tracing
+from utils.tracing import TRACER, InMemorySpanExporter, JsonlSpanExporter, critical_path
+
+
+class SlowTester:
+    async def load_test(self, deployment_hash, node=None):
+        with TRACER.span("probe", frequency=10):
+            await asyncio.sleep(0.02)
+        return 40
+
+
+def _run_traced_event(exporter):
+    async def run():
+        TRACER.exporter = exporter
+        try:
+            ctx = Context(
+                None, SlowTester(), JSONThroughputRepository(), SimpleAdjustmentStrategy(),
+                InMemoryDispatcher(), StateManager(),
+            )
+            processor = EventProcessor(ctx)
+            processor.register_handler("DEPLOYMENT_CHANGE", DeploymentChangeHandler())
+            with TRACER.span("kopf.forward") as root:
+                event = Event(
+                    "DEPLOYMENT_CHANGE", {"hash": {"node": "n1", "services": {"pose": 1}}},
+                    datetime.utcnow(), "test", trace=root.context,
+                )
+            await processor.process(event)
+            await exporter.close()
+            return root.trace_id
+        finally:
+            TRACER.exporter = None
+
+    return asyncio.run(run())
+
+
+def test_spans_follow_the_event_and_critical_path_reaches_the_probe():
+    exporter = InMemorySpanExporter()
+    trace_id = _run_traced_event(exporter)
+
+    spans = exporter.spans
+    assert {span.trace_id for span in spans} == {trace_id}
+    by_name = {span.name: span for span in spans}
+    assert by_name["processor.process"].parent_id == by_name["kopf.forward"].span_id
+    assert by_name["probe"].parent_id == by_name["tester.load_test"].span_id
+    assert by_name["dispatcher.dispatch"].attributes["frequency"] == 40
+
+    path = [span.name for span in critical_path(spans, trace_id)]
+    assert path[:2] == ["kopf.forward", "processor.process"]
+    assert path.index("tester.load_test") < path.index("probe") < path.index("dispatcher.dispatch")
+    assert path[-1] == "dispatcher.dispatch"
+
+
+def test_jsonl_export_and_cli(tmp_path, capsys):
+    path = tmp_path / "spans.jsonl"
+    trace_id = _run_traced_event(JsonlSpanExporter(str(path)))
+
+    assert tracing.main([str(path)]) == 0
+    assert trace_id in capsys.readouterr().out
+    assert tracing.main([str(path), trace_id[:8]]) == 0
+    out = capsys.readouterr().out
+    assert "critical path" in out and "processor.process" in out
+
+    encoded = to_otlp(tracing.load_spans(str(path)))
+    spans = encoded["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {span["traceId"] for span in spans} == {trace_id}
+
+
+def test_disabled_tracer_records_nothing():
+    assert not TRACER.enabled
+    with TRACER.span("anything") as span:
+        span.set_attribute("ignored", 1)
+    assert span.context is None
+
+
+def test_jsonl_export_is_buffered_off_the_event_loop(tmp_path):
+    path = tmp_path / "spans.jsonl"
+
+    async def run():
+        exporter = JsonlSpanExporter(str(path), flush_interval=0.05)
+        TRACER.exporter = exporter
+        try:
+            for index in range(3):
+                with TRACER.span("work", index=index):
+                    pass
+            # nothing is written while the spans are handled
+            assert path.read_text() == ""
+            await asyncio.sleep(0.2)
+            assert len(path.read_text().splitlines()) == 3
+            with TRACER.span("last"):
+                pass
+            await exporter.close()
+        finally:
+            TRACER.exporter = None
+
+    asyncio.run(run())
+    assert [span.name for span in tracing.load_spans(str(path))] == ["work"] * 3 + ["last"]
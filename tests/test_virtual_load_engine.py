@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from infrastructure.load_test_config import LoadTestConfig
+from infrastructure.pressure_tester import SimplePressureTester
+from infrastructure.virtual_load_engine import CapacityModel, VirtualFrequencyTestExecutor
+
+servicespec = {
+    "raw": [
+        {"serviceType": "gesture", "workAbility": {"pdclab": 230, "workgpu": 180}},
+        {"serviceType": "pose", "workAbility": {"pdclab": 80, "workgpu": 66}},
+    ]
+}
+
+agents = [
+    {"agentIP": "10.52.52.111", "agentPort": 8888, "nodeName": "pdclab", "serviceType": "pose"},
+    {"agentIP": "10.52.52.111", "agentPort": 8888, "nodeName": "workgpu", "serviceType": "gesture"},
+    {"agentIP": "10.52.52.111", "agentPort": 8889, "nodeName": "pdclab", "serviceType": "pose"},
+    {"agentIP": "10.52.52.111", "agentPort": 8889, "nodeName": "workgpu", "serviceType": "gesture"},
+]
+
+
+def _search(seed: int, mode: str = "linear", verdict_mode: str = "fixed"):
+    config = LoadTestConfig(
+        search_mode=mode, verdict_mode=verdict_mode, request_timeout=0.5, recovery_time=2
+    )
+    executor = VirtualFrequencyTestExecutor(
+        CapacityModel.from_servicespec(servicespec), config, seed=seed
+    )
+    tester = SimplePressureTester(config, test_executor=executor)
+    result = asyncio.run(tester._execute_load_test(agents, "pdclab:pose=2"))
+    return result, executor.clock.now
+
+
+def test_capacity_model_from_servicespec():
+    model = CapacityModel.from_servicespec(servicespec, default_capacity=5)
+    assert model.capacity("pdclab", "pose") == 80
+    assert model.capacity("workgpu", "gesture") == 180
+    assert model.capacity("unknown", "pose") == 5
+
+
+def test_virtual_search_is_fast_and_reproducible():
+    started = time.monotonic()
+    result, virtual_seconds = _search(seed=1)
+    wall_seconds = time.monotonic() - started
+
+    # two pose agents share pdclab's 80 req/s pose capacity
+    assert 35 <= result <= 41
+    # six 10 s probes plus recovery time, all on the virtual clock
+    assert virtual_seconds > 60
+    assert wall_seconds < 5
+    assert _search(seed=1) == (result, virtual_seconds)
+
+
+def test_virtual_engine_supports_search_and_verdict_modes():
+    fixed, fixed_seconds = _search(seed=3, mode="exponential")
+    sequential, sequential_seconds = _search(seed=3, mode="exponential", verdict_mode="sequential")
+    assert 30 <= fixed <= 41
+    # early stopping sees a shorter window, so a slowly growing backlog can pass slightly above capacity
+    assert 30 <= sequential <= 50
+    assert sequential_seconds < fixed_seconds
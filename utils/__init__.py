@@ -1,3 +1,3 @@
-from .helpers import ThroughputKey
+from .helpers import ThroughputKey, normalize_throughput_key
 
-__all__ = ["ThroughputKey"]
+__all__ = ["ThroughputKey", "normalize_throughput_key"]
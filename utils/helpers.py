@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Any, Dict, Mapping, Union
 
 @dataclass
 class ThroughputKey:
@@ -16,3 +16,29 @@ class ThroughputKey:
             return self.node_name
         parts = [f"{svc}={cnt}" for svc, cnt in sorted_services]
         return f"{self.node_name}:{','.join(parts)}"
+
+    @classmethod
+    def from_string(cls, key: str) -> "ThroughputKey":
+        """Parse a ``node:svc=n,...`` string back into a key."""
+        node, _, rest = key.partition(":")
+        counts: Dict[str, int] = {}
+        for part in rest.split(","):
+            svc, sep, cnt = part.partition("=")
+            if sep:
+                counts[svc] = int(cnt)
+        return cls(node, counts)
+
+
+def normalize_throughput_key(key: Union[str, Mapping[str, Any], ThroughputKey]) -> str:
+    """Return the canonical ``node:svc=n,...`` string for any supported key form."""
+    if isinstance(key, ThroughputKey):
+        key = key.to_string()
+    elif isinstance(key, Mapping):
+        key = ThroughputKey(key.get("node"), dict(key.get("services", {}))).to_string()
+    if ":" not in key:
+        return key
+    prefix, rest = key.split(":", 1)
+    parts = [p for p in rest.split(",") if p]
+    if not parts:
+        return prefix
+    return f"{prefix}:{','.join(sorted(parts))}"
@@ -0,0 +1,360 @@
+"""Lightweight trace spans for following one event through the pipeline.
+
+A :class:`TraceContext` travels on each :class:`domain.Event`; code opens
+spans with ``TRACER.span(name, ...)`` and nested spans find their parent
+through a context variable, which asyncio copies into new tasks.  Spans are
+only recorded once an exporter is installed, so tracing costs one attribute
+check per span when disabled.
+
+Print the critical path of a recorded trace with::
+
+    python -m utils.tracing spans.jsonl              # list traces
+    python -m utils.tracing spans.jsonl <trace_id>   # critical path
+"""
+
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+
+@dataclass(frozen=True)
+class TraceContext:
+    """Identifies a span that later spans may use as their parent."""
+
+    trace_id: str
+    span_id: str
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    exporter: Optional["SpanExporter"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def context(self) -> TraceContext:
+        return TraceContext(self.trace_id, self.span_id)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else self.start_ns
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, status: Optional[str] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if status is not None:
+                self.status = status
+            if self.exporter is not None:
+                self.exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Span":
+        return cls(**data)
+
+
+class _NoopSpan:
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, status: Optional[str] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current: ContextVar[Optional[TraceContext]] = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    """Make ``span`` current for the ``with`` block and end it on exit."""
+
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current.set(self.span.context)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.span.set_attribute("error", repr(exc))
+            self.span.end("error")
+        else:
+            self.span.end()
+
+
+class SpanExporter:
+    """Receives finished spans."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Append one JSON object per finished span to ``path``.
+
+    Spans are buffered and written from a worker thread ``flush_interval``
+    seconds after the first span of a batch, so exporting never blocks the
+    event loop on file I/O.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._file = open(path, "a")
+        self._pending: List[Span] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    def export(self, span: Span) -> None:
+        self._pending.append(span)
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                # no loop: keep the span for the next flush
+                pass
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # batches are written in order, never interleaved
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            if batch:
+                await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch: List[Span]) -> None:
+        self._file.write("".join(json.dumps(span.to_dict()) + "\n" for span in batch))
+        self._file.flush()
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        self._file.close()
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None) -> None:
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self, name: str, parent: Optional[TraceContext] = None, attributes: Optional[Dict[str, Any]] = None
+    ):
+        """Start a span without making it current; call ``span.end()`` when done.
+
+        Without ``parent`` the current span is the parent; without either the
+        span starts a new trace.
+        """
+        if self.exporter is None:
+            return _NOOP_SPAN
+        parent = parent or _current.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes) if attributes else {},
+            exporter=self.exporter,
+        )
+
+    def span(self, name: str, parent: Optional[TraceContext] = None, **attributes: Any):
+        """Context manager for a span that is current inside the block."""
+        if self.exporter is None:
+            return _NOOP_SPAN
+        return _SpanScope(self.start_span(name, parent, attributes))
+
+
+TRACER = Tracer()
+
+
+def current_trace() -> Optional[TraceContext]:
+    return _current.get()
+
+
+def traced(name: str):
+    """Decorate a coroutine function to run inside a span called ``name``."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def load_spans(path: str) -> List[Span]:
+    with open(path) as f:
+        return [Span.from_dict(json.loads(line)) for line in f if line.strip()]
+
+
+def critical_path(spans: Iterable[Span], trace_id: str) -> List[Span]:
+    """Return the spans on the trace's critical path, in start order.
+
+    Walking back from the end of each span, the child that finished last is
+    on the critical path; before it, the child that finished last before that
+    child started, and so on.  Each chosen child is expanded the same way.
+    A span's finish includes work its children did after it ended (e.g. the
+    processing of an event after ``kopf.forward`` queued it).
+    """
+    spans = [span for span in spans if span.trace_id == trace_id and span.end_ns is not None]
+    ids = {span.span_id for span in spans}
+    children: Dict[Optional[str], List[Span]] = {}
+    for span in spans:
+        parent = span.parent_id if span.parent_id in ids else None
+        children.setdefault(parent, []).append(span)
+
+    finish: Dict[str, int] = {}
+
+    def finished(span: Span) -> int:
+        if span.span_id not in finish:
+            finish[span.span_id] = max(
+                [span.end_ns] + [finished(child) for child in children.get(span.span_id, [])]
+            )
+        return finish[span.span_id]
+
+    def chain(candidates: List[Span]) -> List[Span]:
+        selected: List[Span] = []
+        cursor = None
+        remaining = sorted(candidates, key=finished, reverse=True)
+        for span in remaining:
+            if cursor is None or finished(span) <= cursor:
+                selected.append(span)
+                cursor = span.start_ns
+        return selected[::-1]
+
+    def expand(span: Span) -> List[Span]:
+        path = [span]
+        for child in chain(children.get(span.span_id, [])):
+            path.extend(expand(child))
+        return path
+
+    path: List[Span] = []
+    for root in chain(children.get(None, [])):
+        path.extend(expand(root))
+    return path
+
+
+def _self_time_ms(span: Span, spans: List[Span]) -> float:
+    # time in the span not covered by any child
+    intervals = sorted(
+        (max(child.start_ns, span.start_ns), min(child.end_ns, span.end_ns))
+        for child in spans
+        if child.parent_id == span.span_id and child.end_ns is not None
+    )
+    covered, cursor = 0, span.start_ns
+    for start, end in intervals:
+        start = max(start, cursor)
+        if end > start:
+            covered += end - start
+            cursor = end
+    return max(0, span.end_ns - span.start_ns - covered) / 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m utils.tracing SPANS.jsonl [TRACE_ID]", file=sys.stderr)
+        return 2
+    spans = load_spans(argv[0])
+
+    if len(argv) == 1:
+        traces: Dict[str, List[Span]] = {}
+        for span in spans:
+            traces.setdefault(span.trace_id, []).append(span)
+        for trace_id, members in traces.items():
+            start = min(span.start_ns for span in members)
+            end = max(span.end_ns or span.start_ns for span in members)
+            event_type = next((s.attributes["event.type"] for s in members if "event.type" in s.attributes), "-")
+            print(f"{trace_id}  {event_type:<20} {len(members):>4} spans  {(end - start) / 1e6:>10.1f} ms")
+        return 0
+
+    matches = {span.trace_id for span in spans if span.trace_id.startswith(argv[1])}
+    if len(matches) != 1:
+        print(f"{'no' if not matches else 'ambiguous'} trace matching {argv[1]}", file=sys.stderr)
+        return 1
+    trace_id = matches.pop()
+    path = critical_path(spans, trace_id)
+    origin = min(span.start_ns for span in spans if span.trace_id == trace_id)
+    print(f"critical path of trace {trace_id}")
+    print(f"{'offset ms':>10} {'duration ms':>12} {'self ms':>10}  span")
+    depths: Dict[str, int] = {}
+    for span in path:
+        depths[span.span_id] = depths.get(span.parent_id, -1) + 1
+    for span in path:
+        depth = depths[span.span_id]
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        print(
+            f"{(span.start_ns - origin) / 1e6:>10.1f} {span.duration_ms:>12.1f} "
+            f"{_self_time_ms(span, spans):>10.1f}  {'  ' * depth}{span.name}"
+            f"{' [' + span.status + ']' if span.status != 'ok' else ''} {attributes}".rstrip()
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())